@@ -1,11 +1,16 @@
-from typing import Dict, Any, Union, Callable
+import copy
+from typing import Dict, Any, Union, Callable, Iterable, List, Tuple
+
+import numpy as np
+import xarray as xr
 
 from brainscore_core.supported_data_standards.brainio.assemblies import DataAssembly
 from brainscore_core.benchmarks import Benchmark
 from brainscore_core.metrics import Score, Metric
 from brainscore_core.plugin_management.conda_score import wrap_score
-from brainscore_core.plugin_management.import_plugin import import_plugin
 from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.plugin_index import import_plugin
+from brainscore_language.utils.s3 import S3File, download_files
 
 data_registry: Dict[str, Callable[[], Union[DataAssembly, Any]]] = {}
 """ Pool of available data """
@@ -20,32 +25,67 @@ model_registry: Dict[str, Callable[[], ArtificialSubject]] = {}
 """ Pool of available models """
 
 
-def load_dataset(identifier: str) -> Union[DataAssembly, Any]:
-    import_plugin('brainscore_language', 'data', identifier)
+_loaded_datasets: Dict[str, Tuple[Callable, Union[DataAssembly, Any]]] = {}
+""" Datasets loaded in this process, with the factory they were loaded from """
+
 
-    return data_registry[identifier]()
+def load_dataset(identifier: str) -> Union[DataAssembly, Any]:
+    """
+    Datasets are only loaded once per process. Assemblies are returned as shallow copies which share the loaded data,
+    marked read-only, so that e.g. selecting from or assigning attributes to one copy does not affect other copies.
+    Lazily read data (e.g. from netCDF files) is loaded into memory once, memory-mapped data
+    (see :class:`brainscore_language.utils.s3.MemoryMappedAssemblyLoader`) is kept mapped so that processes
+    share its pages.
+    """
+    import_plugin('data', identifier)
+    factory = data_registry[identifier]
+    if identifier not in _loaded_datasets or _loaded_datasets[identifier][0] is not factory:
+        dataset = factory()
+        if isinstance(dataset, xr.DataArray):
+            if not dataset.variable._in_memory:  # rather than reading lazily loaded data again for every copy
+                dataset = dataset.load()
+            if isinstance(dataset.data, np.ndarray):
+                dataset.data.flags.writeable = False
+        _loaded_datasets[identifier] = factory, dataset
+    dataset = _loaded_datasets[identifier][1]
+    return dataset.copy(deep=False) if isinstance(dataset, xr.DataArray) else copy.copy(dataset)
 
 
 def load_metric(identifier: str, *args, **kwargs) -> Metric:
-    import_plugin('brainscore_language', 'metrics', identifier)
+    import_plugin('metrics', identifier)
 
     return metric_registry[identifier](*args, **kwargs)
 
 
 def load_benchmark(identifier: str) -> Benchmark:
-    import_plugin('brainscore_language', 'benchmarks', identifier)
+    import_plugin('benchmarks', identifier)
 
     return benchmark_registry[identifier]()
 
 
 def load_model(identifier: str) -> ArtificialSubject:
-    import_plugin('brainscore_language', 'models', identifier)
+    import_plugin('models', identifier)
 
     model = model_registry[identifier]()
     model.identifier = identifier
 
     return model
 
+def prefetch(benchmark_identifiers: Iterable[str], max_workers: int = 8) -> List[S3File]:
+    """
+    Download the files that the given benchmarks will load (e.g. data assemblies and ceilings) ahead of time,
+    concurrently rather than one after another when each benchmark first accesses them.
+    Files are only located, not loaded; benchmarks declare them via a `remote_files` property.
+
+    :return: the files that were downloaded, i.e. excluding files that were already available locally
+    """
+    remote_files = []
+    for benchmark_identifier in benchmark_identifiers:
+        benchmark = load_benchmark(benchmark_identifier)
+        remote_files += getattr(benchmark, 'remote_files', [])
+    return download_files(remote_files, max_workers=max_workers)
+
+
 def _run_score(model_identifier: str, benchmark_identifier: str) -> Score:
     """
     Score the model referenced by the `model_identifier` on the benchmark referenced by the `benchmark_identifier`.
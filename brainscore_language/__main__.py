@@ -2,7 +2,8 @@ from pathlib import Path
 
 import fire
 
-from brainscore_language import score as _score_function
+from brainscore_language import score as _score_function, prefetch as _prefetch_function
+from brainscore_language.plugin_index import plugin_index
 
 
 def score(model_identifier: str, benchmark_identifier: str, conda_active: bool=False):
@@ -10,5 +11,25 @@ def score(model_identifier: str, benchmark_identifier: str, conda_active: bool=F
     print(result)  # print instead of return because fire has issues with xarray objects
 
 
+def score_benchmarks(model_identifier: str, *benchmark_identifiers: str):
+    """ score one model on several benchmarks, loading the model only once and printing each score when ready """
+    from brainscore_language.session import ScoringSession  # only needed by this command
+
+    for result in ScoringSession(model_identifier).score_all(benchmark_identifiers):
+        print(result.attrs['benchmark_identifier'], result)
+
+
+def prefetch(*benchmark_identifiers: str):
+    """ download the files of the given benchmarks concurrently, ahead of scoring """
+    for s3_file in _prefetch_function(benchmark_identifiers):
+        print(f"Downloaded {s3_file.remote_path}")
+
+
+def plugins(plugin_type: str = 'models'):
+    """ list the identifiers registered by plugins of the given type, without importing the plugins """
+    for identifier, plugin_dirname in sorted(plugin_index.identifiers(plugin_type).items()):
+        print(f"{identifier}\t{plugin_dirname}")
+
+
 if __name__ == '__main__':
     fire.Fire()
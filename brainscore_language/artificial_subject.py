@@ -4,6 +4,14 @@ from brainscore_core.supported_data_standards.brainio.assemblies import DataAsse
 
 
 class ArtificialSubject:
+    supports_group_checkpoints = False
+    """
+    Whether the output of `digest_text` is independent of previous calls to `digest_text`, so that a benchmark can
+    checkpoint its predictions per group of stimuli and resume an interrupted run without re-digesting completed groups
+    (see :class:`~brainscore_language.utils.checkpoints.GroupCheckpoints`).
+    Subjects that carry state from one call to the next (e.g. recurrent states, or feature offsets) leave this off.
+    """
+
     def identifier(self) -> str:
         """
         The unique identifier for this model.
@@ -118,6 +126,13 @@ class ArtificialSubject:
         """
         raise NotImplementedError()
 
+    def reset(self):
+        """
+        Stop any behavioral task and neural recordings started on this subject, so that the same subject can take part
+        in another experiment without being re-loaded.
+        """
+        raise NotImplementedError()
+
     def digest_text(self, text: Union[str, List[str]]) -> Dict[str, DataAssembly]:
         """
         :param text: text to pass to the subject, either a single string (e.g. `"the quick brown fox jumped"`),
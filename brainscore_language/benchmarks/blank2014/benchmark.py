@@ -1,12 +1,19 @@
+from functools import cached_property
+from typing import List
+
 import xarray as xr
 
 from brainscore_core.benchmarks import BenchmarkBase
-from brainscore_core.metrics import Score
+from brainscore_core.metrics import Score, Metric
+from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
 from brainscore_language import load_dataset, load_metric
 from brainscore_language.artificial_subject import ArtificialSubject
 from brainscore_language.benchmarks.blank2014.ceiling import ExtrapolationCeiling
-from brainscore_language.data.blank2014 import BIBTEX
+from brainscore_language.data.blank2014 import BIBTEX, ASSEMBLY_FILE
 from brainscore_language.utils.ceiling import ceiling_normalize
+from brainscore_language.utils import group_indices
+from brainscore_language.utils.checkpoints import GroupCheckpoints
+from brainscore_language.utils.s3 import S3File
 
 
 class Blank2014Linear(BenchmarkBase):
@@ -21,30 +28,44 @@ class Blank2014Linear(BenchmarkBase):
     """
 
     def __init__(self):
-        self.data = load_dataset('Blank2014.fROI')
-        self.metric = load_metric('linear_pearsonr')
-        ceiler = ExtrapolationCeiling()
-        ceiling = ceiler(assembly=self.data, metric=self.metric)
         super(Blank2014Linear, self).__init__(
             identifier='Blank2014-linear',
             version=1,
             parent='neural_language',
-            ceiling=ceiling,
+            ceiling=None,  # computed lazily, see `ceiling`
             bibtex=BIBTEX)
 
+    @property
+    def remote_files(self) -> List[S3File]:
+        """ files that loading this benchmark's data fetches, see `brainscore_language.prefetch` """
+        return [ASSEMBLY_FILE]
+
+    @cached_property
+    def data(self) -> NeuroidAssembly:
+        return load_dataset('Blank2014.fROI')
+
+    @cached_property
+    def metric(self) -> Metric:
+        return load_metric('linear_pearsonr')
+
+    @cached_property
+    def ceiling(self) -> Score:
+        ceiler = ExtrapolationCeiling()
+        return ceiler(assembly=self.data, metric=self.metric)
+
     def __call__(self, candidate: ArtificialSubject) -> Score:
         candidate.start_neural_recording(recording_target=ArtificialSubject.RecordingTarget.language_system,
                                          recording_type=ArtificialSubject.RecordingType.fMRI)
-        stimuli = self.data['stimulus']
-        stories = self.data['story'].values
+        stimuli = self.data['stimulus'].values
+        stories, order = group_indices(self.data['story'].values)
+        checkpoints = GroupCheckpoints.for_run(candidate, self)
         predictions = []
-        for story in sorted(set(stories)):  # go over individual stories, sorting to keep consistency across runs
-            story_indexer = [stimulus_story == story for stimulus_story in stories]
-            story_stimuli = stimuli[story_indexer]
-            story_predictions = candidate.digest_text(story_stimuli.values)['neural']
-            story_predictions['stimulus_id'] = 'presentation', story_stimuli['stimulus_id'].values
-            predictions.append(story_predictions)
+        for story, story_indices in stories:  # go over individual stories, sorted to keep consistency across runs
+            story_stimuli = stimuli[story_indices]
+            predictions.append(checkpoints(story, lambda: candidate.digest_text(story_stimuli)['neural']))
         predictions = xr.concat(predictions, dim='presentation')
+        predictions['stimulus_id'] = 'presentation', self.data['stimulus_id'].values[order]
         raw_score = self.metric(predictions, self.data)
         score = ceiling_normalize(raw_score, self.ceiling)
+        checkpoints.clear()
         return score
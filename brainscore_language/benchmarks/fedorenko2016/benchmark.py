@@ -1,11 +1,19 @@
+from functools import cached_property
+from typing import List
+
 import xarray as xr
 
 from brainscore_core.benchmarks import BenchmarkBase
+from brainscore_core.metrics import Score, Metric
+from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
 from brainscore_language import load_dataset, load_metric
 from brainscore_language.artificial_subject import ArtificialSubject
 from brainscore_language.benchmarks.blank2014.ceiling import ExtrapolationCeiling
-from brainscore_language.data.fedorenko2016 import BIBTEX
+from brainscore_language.data.fedorenko2016 import BIBTEX, ASSEMBLY_FILE
 from brainscore_language.utils.ceiling import ceiling_normalize
+from brainscore_language.utils import group_indices
+from brainscore_language.utils.checkpoints import GroupCheckpoints
+from brainscore_language.utils.s3 import S3File
 
 from tqdm import tqdm
 
@@ -18,39 +26,51 @@ def Fedorenko2016_ridge():
 class Fedorenko2016(BenchmarkBase):
 
     def __init__(self, metric: str):
-        self.data = load_dataset('Fedorenko2016.language')
-        
         identifier = f"Fedorenko2016-{metric}"
-        self.metric = load_metric(metric)
+        self._metric_identifier = metric
 
-        ceiler = ExtrapolationCeiling(subject_column="subject_UID")
-        ceiling = ceiler(assembly=self.data, metric=self.metric)
-         
         super(Fedorenko2016, self).__init__(
             identifier=identifier,
             version=3,
             parent='neural_language',
-            ceiling=ceiling,
+            ceiling=None,  # computed lazily, see `ceiling`
             bibtex=BIBTEX)
 
+    @property
+    def remote_files(self) -> List[S3File]:
+        """ files that loading this benchmark's data fetches, see `brainscore_language.prefetch` """
+        return [ASSEMBLY_FILE]
+
+    @cached_property
+    def data(self) -> NeuroidAssembly:
+        return load_dataset('Fedorenko2016.language')
+
+    @cached_property
+    def metric(self) -> Metric:
+        return load_metric(self._metric_identifier)
+
+    @cached_property
+    def ceiling(self) -> Score:
+        ceiler = ExtrapolationCeiling(subject_column="subject_UID")
+        return ceiler(assembly=self.data, metric=self.metric)
+
     def __call__(self, candidate: ArtificialSubject):
         candidate.start_neural_recording(recording_target=ArtificialSubject.RecordingTarget.language_system,
                                          recording_type=ArtificialSubject.RecordingType.ECoG)
 
-        stimuli = self.data['stimulus']
-        sentences = self.data['sentence_id'].values
+        stimuli = self.data['stimulus'].values
+        sentences, order = group_indices(self.data['sentence_id'].values)
+        checkpoints = GroupCheckpoints.for_run(candidate, self)
         predictions = []
-        for sentence_id in tqdm(sorted(set(sentences))):  # go over individual stories, sorting to keep consistency across runs
-            sentence_indexer = [stimulus_sentence == sentence_id for stimulus_sentence in sentences]
-            sentence_stimuli = stimuli[sentence_indexer]
-            stimuli_values = sentence_stimuli.values
-            sentence_predictions = candidate.digest_text(stimuli_values)["neural"]
-            sentence_predictions['stimulus_id'] = 'presentation', sentence_stimuli['stimulus_id'].values
-            predictions.append(sentence_predictions)
-            
+        for sentence_id, sentence_indices in tqdm(sentences):  # go over individual sentences, sorted to keep consistency across runs
+            sentence_stimuli = stimuli[sentence_indices]
+            predictions.append(checkpoints(sentence_id, lambda: candidate.digest_text(sentence_stimuli)["neural"]))
+
         predictions = xr.concat(predictions, dim='presentation')
+        predictions['stimulus_id'] = 'presentation', self.data['stimulus_id'].values[order]
 
         raw_score = self.metric(predictions, self.data)
         scores = ceiling_normalize(raw_score, self.ceiling)
+        checkpoints.clear()
 
         return scores
\ No newline at end of file
@@ -1,4 +1,7 @@
 import logging
+from functools import cached_property
+from typing import List
+
 import numpy as np
 from numpy.random import RandomState
 
@@ -7,8 +10,10 @@ from brainscore_core.benchmarks import BenchmarkBase
 from brainscore_core.metrics import Score, Metric
 from brainscore_language import load_dataset, load_metric
 from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.data.futrell2018 import BIBTEX, ASSEMBLY_FILE
 from brainscore_language.utils import attach_presentation_meta
 from brainscore_language.utils.ceiling import ceiling_normalize
+from brainscore_language.utils.s3 import S3File
 
 logger = logging.getLogger(__name__)
 
@@ -25,16 +30,30 @@ class Futrell2018Pearsonr(BenchmarkBase):
     """
 
     def __init__(self):
-        self.data = load_dataset('Futrell2018')
-        self.metric = load_metric('pearsonr')
-        ceiler = SplitHalvesConsistency(num_splits=10, split_coordinate='subject_id', consistency_metric=self.metric)
-        ceiling = ceiler(self.data)
         super(Futrell2018Pearsonr, self).__init__(
             identifier='Futrell2018-pearsonr',
             version=1,
             parent='behavior',
-            ceiling=ceiling,
-            bibtex=self.data.bibtex)
+            ceiling=None,  # computed lazily, see `ceiling`
+            bibtex=BIBTEX)
+
+    @property
+    def remote_files(self) -> List[S3File]:
+        """ files that loading this benchmark's data fetches, see `brainscore_language.prefetch` """
+        return [ASSEMBLY_FILE]
+
+    @cached_property
+    def data(self) -> DataAssembly:
+        return load_dataset('Futrell2018')
+
+    @cached_property
+    def metric(self) -> Metric:
+        return load_metric('pearsonr')
+
+    @cached_property
+    def ceiling(self) -> Score:
+        ceiler = SplitHalvesConsistency(num_splits=10, split_coordinate='subject_id', consistency_metric=self.metric)
+        return ceiler(self.data)
 
     def __call__(self, candidate: ArtificialSubject) -> Score:
         # run experiment
@@ -22,6 +22,15 @@ class TestBenchmark:
             if task != ArtificialSubject.Task.reading_times:
                 raise NotImplementedError()
 
+    def test_lazy_data(self, monkeypatch):
+        from brainscore_language.benchmarks.futrell2018 import benchmark as benchmark_module
+        loaded = []
+        monkeypatch.setattr(benchmark_module, 'load_dataset', lambda identifier: loaded.append(identifier))
+        benchmark = load_benchmark('Futrell2018-pearsonr')
+        assert benchmark.identifier == 'Futrell2018-pearsonr'
+        assert benchmark.bibtex.startswith('@proceedings')
+        assert loaded == []
+
     def test_dummy_bad(self):
         benchmark = load_benchmark('Futrell2018-pearsonr')
         reading_times = RandomState(0).random(10256)
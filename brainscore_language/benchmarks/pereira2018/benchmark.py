@@ -1,13 +1,18 @@
+from functools import cached_property
+from typing import List
+
 import xarray as xr
 
 from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
 from brainscore_core.benchmarks import BenchmarkBase
-from brainscore_core.metrics import Score
+from brainscore_core.metrics import Score, Metric
 from brainscore_language import load_dataset, load_metric
 from brainscore_language.artificial_subject import ArtificialSubject
-from brainscore_language.data.pereira2018 import BIBTEX
+from brainscore_language.data.pereira2018 import BIBTEX, LANGUAGE_FILE
 from brainscore_language.utils.ceiling import ceiling_normalize
-from brainscore_language.utils.s3 import load_from_s3
+from brainscore_language.utils import group_indices
+from brainscore_language.utils.checkpoints import GroupCheckpoints
+from brainscore_language.utils.s3 import S3File
 
 
 def Pereira2018_243sentences():
@@ -52,17 +57,37 @@ class _Pereira2018ExperimentLinear(BenchmarkBase):
     """
 
     def __init__(self, experiment: str, ceiling_s3_kwargs: dict):
-        self.data = self._load_data(experiment)
-        self.metric = load_metric('linear_pearsonr')
+        self._experiment = experiment
+        self._ceiling_s3_kwargs = ceiling_s3_kwargs
         identifier = f'Pereira2018.{experiment}-linear'
-        ceiling = self._load_ceiling(identifier=identifier, **ceiling_s3_kwargs)
         super(_Pereira2018ExperimentLinear, self).__init__(
             identifier=identifier,
             version=1,
             parent='Pereira2018-linear',
-            ceiling=ceiling,
+            ceiling=None,  # loaded lazily, see `ceiling`
             bibtex=BIBTEX)
 
+    @cached_property
+    def data(self) -> NeuroidAssembly:
+        return self._load_data(self._experiment)
+
+    @cached_property
+    def metric(self) -> Metric:
+        return load_metric('linear_pearsonr')
+
+    @cached_property
+    def ceiling(self) -> Score:
+        ceilings = [ceiling_file.load(cls=Score) for ceiling_file in
+                    self._ceiling_files(identifier=self.identifier, **self._ceiling_s3_kwargs)]
+        for ceiling, raw in zip(ceilings[:-1], ceilings[1:]):  # each file holds the raw values of the one before
+            ceiling.attrs['raw'] = raw
+        return ceilings[0]
+
+    @property
+    def remote_files(self) -> List[S3File]:
+        """ files that loading this benchmark's data and ceiling fetches, see `brainscore_language.prefetch` """
+        return [LANGUAGE_FILE] + self._ceiling_files(identifier=self.identifier, **self._ceiling_s3_kwargs)
+
     def _load_data(self, experiment: str) -> NeuroidAssembly:
         data = load_dataset('Pereira2018.language')
         data = data.sel(experiment=experiment)  # filter experiment
@@ -70,26 +95,28 @@ class _Pereira2018ExperimentLinear(BenchmarkBase):
         data.attrs['identifier'] = f"{data.identifier}.{experiment}"
         return data
 
-    def _load_ceiling(self, identifier: str, sha1: str, version_id: str = None, assembly_prefix="ceiling_", raw_kwargs=None):
-        ceiling = load_from_s3(identifier, sha1=sha1, cls=Score, assembly_prefix=assembly_prefix, version_id=version_id)
-        if raw_kwargs:  # recursively load raw attributes
-            raw = self._load_ceiling(identifier=identifier, assembly_prefix=assembly_prefix + "raw_", **raw_kwargs)
-            ceiling.attrs['raw'] = raw
-        return ceiling
+    def _ceiling_files(self, identifier: str, sha1: str, version_id: str = None, assembly_prefix="ceiling_",
+                       raw_kwargs=None) -> List[S3File]:
+        """ the ceiling's file, followed by the files of its (recursively) raw attributes """
+        ceiling_files = [S3File(identifier, sha1=sha1, version_id=version_id, assembly_prefix=assembly_prefix)]
+        if raw_kwargs:
+            ceiling_files += self._ceiling_files(identifier=identifier, assembly_prefix=assembly_prefix + "raw_",
+                                                 **raw_kwargs)
+        return ceiling_files
 
     def __call__(self, candidate: ArtificialSubject) -> Score:
         candidate.start_neural_recording(recording_target=ArtificialSubject.RecordingTarget.language_system,
                                          recording_type=ArtificialSubject.RecordingType.fMRI)
-        stimuli = self.data['stimulus']
-        passages = self.data['passage_label'].values
+        stimuli = self.data['stimulus'].values
+        passages, order = group_indices(self.data['passage_label'].values)
+        checkpoints = GroupCheckpoints.for_run(candidate, self)
         predictions = []
-        for passage in sorted(set(passages)):  # go over individual passages, sorting to keep consistency across runs
-            passage_indexer = [stimulus_passage == passage for stimulus_passage in passages]
-            passage_stimuli = stimuli[passage_indexer]
-            passage_predictions = candidate.digest_text(passage_stimuli.values)['neural']
-            passage_predictions['stimulus_id'] = 'presentation', passage_stimuli['stimulus_id'].values
-            predictions.append(passage_predictions)
+        for passage, passage_indices in passages:  # go over individual passages, sorted to keep consistency across runs
+            passage_stimuli = stimuli[passage_indices]
+            predictions.append(checkpoints(passage, lambda: candidate.digest_text(passage_stimuli)['neural']))
         predictions = xr.concat(predictions, dim='presentation')
+        predictions['stimulus_id'] = 'presentation', self.data['stimulus_id'].values[order]
         raw_score = self.metric(predictions, self.data)
         score = ceiling_normalize(raw_score, self.ceiling)
+        checkpoints.clear()
         return score
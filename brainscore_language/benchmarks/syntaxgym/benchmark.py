@@ -1,15 +1,15 @@
+from functools import cached_property
 from pathlib import Path
 import json
-from typing import Dict, Tuple, List, Union
+from typing import Callable, Dict, Tuple, List, Union
 
 import numpy as np
-import requests
 
 from brainscore_core.benchmarks import BenchmarkBase
-from brainscore_core.metrics import Score
+from brainscore_core.metrics import Score, Metric
 from brainscore_language.artificial_subject import ArtificialSubject
 from brainscore_language import load_metric
-from brainscore_language.benchmarks.syntaxgym.sg_suite import _load_suite, Suite
+from brainscore_language.benchmarks.syntaxgym.sg_suite import _load_suite, fetch_suite, load_suite_file, Suite
 
 
 # This is a Brain-Score Language benchmark to perform SyntaxGym Targeted Syntactic Evaluations (TSE).
@@ -63,6 +63,17 @@ def SyntaxGym2020():
     return SyntaxGymTSE(test_suite_dict)
 
 
+def _supports_batched_digest(candidate: ArtificialSubject) -> bool:
+    """ whether the subject can digest many texts at once, see `HuggingfaceSubject.digest_text_batch` """
+    return callable(getattr(candidate, 'digest_text_batch', None))
+
+
+def _supports_context_snapshots(candidate: ArtificialSubject) -> bool:
+    """ whether the subject can extend a context region by region and return to earlier snapshots of it """
+    return all(callable(getattr(candidate, method, None))
+               for method in ('snapshot_context', 'restore_context', 'extend_context'))
+
+
 class SyntaxGymTSE(BenchmarkBase):
     """ collection of SyntaxGym benchmarks. """
     def __init__(self, test_suites: Dict[str, str]):
@@ -100,14 +111,19 @@ class SyntaxGymSingleTSE(BenchmarkBase):
             parent='SyntaxGym',
             ceiling=Score(1),
             bibtex=BIBTEX)
+        self._suite_ref = suite_ref
 
-        self.metric = load_metric('accuracy')
-        self.suite = self._load_suite(suite_ref)
+    @cached_property
+    def metric(self) -> Metric:
+        return load_metric('accuracy')
+
+    @cached_property
+    def suite(self) -> Suite:
+        return self._load_suite(self._suite_ref)
 
     def _load_suite(self, suite_ref: Union[str, Path]):
         if str(suite_ref).startswith("https"):
-            suite = requests.get(suite_ref).json()
-            return Suite.from_dict(suite)
+            return fetch_suite(suite_ref)
         if isinstance(suite_ref, (str, Path)):
             suite_ref = Path(suite_ref)
             if not suite_ref.exists():
@@ -118,6 +134,7 @@ class SyntaxGymSingleTSE(BenchmarkBase):
                     suite_ref = suite_ref.with_suffix(".json")
                     if not suite_ref.exists():
                         raise FileNotFoundError(f'Could not find suite at {suite_ref}')
+            return load_suite_file(suite_ref)
 
         return _load_suite(suite_ref)
 
@@ -127,6 +144,7 @@ class SyntaxGymSingleTSE(BenchmarkBase):
         Compute region-level surprisals for the given subject.
         """
         candidate.start_behavioral_task(task=ArtificialSubject.Task.reading_times)
+        condition_surprisals = self._condition_surprisals(candidate)
         region_totals = []
 
         # SyntaxGym logic wrapper around digest_text
@@ -134,10 +152,9 @@ class SyntaxGymSingleTSE(BenchmarkBase):
             region_totals_i = {}
 
             for condition in item["conditions"]:
-                text_parts = [region["content"] for region in condition["regions"]]
-                surprisals = candidate.digest_text(text_parts)['behavior']
+                surprisals = condition_surprisals(tuple(region["content"] for region in condition["regions"]))
                 for i, region in enumerate(self.suite.region_names):
-                    surprisal_i = surprisals[i].values
+                    surprisal_i = surprisals[i]
                     if np.isnan(surprisal_i):
                         surprisal_i = 0.
                     region_totals_i[condition["condition_name"], i + 1] = surprisal_i
@@ -146,19 +163,103 @@ class SyntaxGymSingleTSE(BenchmarkBase):
 
         return region_totals
 
+    def _condition_surprisals(self, candidate: ArtificialSubject) -> Callable[[Tuple[str, ...]], List[np.ndarray]]:
+        """
+        :return: a function from the region contents of a condition to the surprisal of each of its regions,
+            computed with the most efficient method the candidate supports:
+            one batched forward pass per many conditions (:meth:`_batched_surprisals`),
+            sharing common region prefixes across conditions (:meth:`_prefix_surprisals`),
+            or one `digest_text` call per condition.
+        """
+        for supports, method in [(_supports_batched_digest, self._batched_surprisals),
+                                 (_supports_context_snapshots, self._prefix_surprisals)]:
+            if supports(candidate):
+                try:
+                    return method(candidate)
+                except NotImplementedError:  # e.g. the subject was also asked to record neural activity
+                    pass
+
+        def digest_condition(region_contents):
+            surprisals = candidate.digest_text(list(region_contents))['behavior']
+            return [surprisals[i].values for i in range(len(region_contents))]
+
+        return digest_condition
+
+    def _batched_surprisals(self, candidate: ArtificialSubject) -> Callable[[Tuple[str, ...]], List[np.ndarray]]:
+        """
+        Digest the distinct region sequences of all conditions in the suite with the candidate's batched
+        `digest_text_batch`, which runs many sequences in one padded forward pass.
+        """
+        sequences = list(dict.fromkeys(tuple(region["content"] for region in condition["regions"])
+                                       for item in self.suite.items for condition in item["conditions"]))
+        outputs = candidate.digest_text_batch([list(sequence) for sequence in sequences])
+        sequence_surprisals = {}
+        for sequence, output in zip(sequences, outputs):
+            surprisals = output['behavior']
+            sequence_surprisals[sequence] = [surprisals[i].values for i in range(len(sequence))]
+        return sequence_surprisals.__getitem__
+
+    def _prefix_surprisals(self, candidate: ArtificialSubject) -> Callable[[Tuple[str, ...]], List[np.ndarray]]:
+        """
+        Digest every distinct prefix of region contents only once: conditions usually share their leading regions,
+        so a prefix trie over all conditions of the suite is traversed depth-first, extending the subject's context by
+        one region per trie node and restoring the parent's context snapshot before moving on to the next sibling.
+        """
+        trie = {}  # region content -> sub-trie
+        for item in self.suite.items:
+            for condition in item["conditions"]:
+                node = trie
+                for region in condition["regions"]:
+                    node = node.setdefault(region["content"], {})
+
+        prefix_surprisals = {}  # tuple of region contents -> surprisal of the last region
+
+        def visit(node, prefix):
+            snapshot = candidate.snapshot_context()
+            for content, children in node.items():
+                candidate.restore_context(snapshot)
+                surprisals = candidate.extend_context(content)['behavior']
+                prefix_surprisals[prefix + (content,)] = surprisals[0].values
+                visit(children, prefix + (content,))
+
+        candidate.restore_context(None)
+        visit(trie, ())
+        candidate.restore_context(None)
+
+        def condition_surprisals(region_contents):
+            surprisals = [prefix_surprisals[region_contents[:i + 1]] for i in range(len(region_contents))]
+            # same dtype as concatenating the regions' outputs in `digest_text`
+            dtype = np.result_type(*surprisals)
+            return [surprisal.astype(dtype) for surprisal in surprisals]
+
+        return condition_surprisals
+
+    @cached_property
+    def _compiled_predictions(self) -> List[Callable[[np.ndarray], np.ndarray]]:
+        """ the suite's prediction formulas, compiled once into functions over all items' surprisals """
+        return [prediction.compile(self.suite.condition_names) for prediction in self.suite.predictions]
+
+    def _region_tensor(self, region_totals: List[Dict[Tuple[str, int], float]]) -> np.ndarray:
+        """
+        Arrange region totals into a tensor of shape (items, conditions, regions),
+        with conditions in the order of the suite's `condition_names`.
+        """
+        keys = [(condition_name, region_number + 1) for condition_name in self.suite.condition_names
+                for region_number in range(len(self.suite.region_names))]
+        surprisals = np.array([[item_region_totals[key] for key in keys] for item_region_totals in region_totals],
+                              dtype=float)
+        return surprisals.reshape(len(region_totals), len(self.suite.condition_names), len(self.suite.region_names))
+
     def evaluate_predictions(self, region_totals: List[Dict[Tuple[str, int], float]]
                              ) -> List[List[bool]]:
         """
-        Compute prediction results for each item.
+        Compute prediction results for each item, evaluating each prediction on all items at once.
         """
-        prediction_results = []
-        for item_region_totals in region_totals:
-            prediction_results.append([
-                pred.apply_prediction_formula(item_region_totals)
-                for pred in self.suite.predictions
-            ])
-
-        return prediction_results
+        surprisals = self._region_tensor(region_totals)
+        prediction_results = np.zeros((len(region_totals), len(self._compiled_predictions)), dtype=bool)
+        for prediction_index, prediction in enumerate(self._compiled_predictions):
+            prediction_results[:, prediction_index] = prediction(surprisals)
+        return prediction_results.tolist()
 
     def __call__(self, candidate: ArtificialSubject) -> Score:
         region_totals = self.get_region_totals(candidate)
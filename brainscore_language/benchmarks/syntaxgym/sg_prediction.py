@@ -1,4 +1,4 @@
-from typing import Union, Optional as TOptional, List as TList
+from typing import Callable, Dict, Union, Optional as TOptional, List as TList
 from pyparsing import *
 import numpy as np
 
@@ -45,6 +45,22 @@ class Region:
 
         return surprisal_dict[self.condition_name, int(self.region_number)]
 
+    def compile(self, condition_index):
+        if self.condition_name not in condition_index:
+            raise ValueError("Unknown condition %s in region %s" % (self.condition_name, self))
+        condition = condition_index[self.condition_name]
+        if self.region_number == "*":
+            def region_sum(surprisals):
+                # accumulate regions in order, like the sum over the surprisal dict
+                total = 0
+                for region in range(surprisals.shape[2]):
+                    total = total + surprisals[:, condition, region]
+                return total
+            return region_sum
+
+        region = int(self.region_number) - 1
+        return lambda surprisals: surprisals[:, condition, region]
+
 class LiteralFloat:
     def __init__(self, tokens):
         self.value = float(tokens[0])
@@ -58,6 +74,9 @@ class LiteralFloat:
     def __call__(self, surprisal_dict):
         return self.value
 
+    def compile(self, condition_index):
+        return lambda surprisals: self.value
+
 class BinaryOp:
     operators: TOptional[TList[str]]
 
@@ -81,6 +100,22 @@ class BinaryOp:
     def _evaluate(self, evaluated_operands, surprisal_dict):
         raise NotImplementedError()
 
+    def compile(self, condition_index):
+        """
+        Compile this operation and its operands into a single function over a surprisal tensor of shape
+        ``(items, conditions, regions)``, evaluating all items at once.
+
+        Args:
+            condition_index: A dict mapping condition names to their index in
+                the tensor's second dimension.
+        """
+        left, right = [operand.compile(condition_index) for operand in self.operands]
+        vectorized_operator = self._vectorized_operator()
+        return lambda surprisals: vectorized_operator(left(surprisals), right(surprisals))
+
+    def _vectorized_operator(self):
+        raise NotImplementedError()
+
 class BoolOp(BinaryOp):
     operators = ["&", "|"]
     def _evaluate(self, op_vals, surprisal_dict):
@@ -89,6 +124,9 @@ class BoolOp(BinaryOp):
         elif self.operator == "|":
             return op_vals[0] or op_vals[1]
 
+    def _vectorized_operator(self):
+        return {"&": np.logical_and, "|": np.logical_or}[self.operator]
+
 class FloatOp(BinaryOp):
     operators = ["-", "+"]
     def _evaluate(self, op_vals, surprisal_dict):
@@ -97,6 +135,9 @@ class FloatOp(BinaryOp):
         elif self.operator == "+":
             return op_vals[0] + op_vals[1]
 
+    def _vectorized_operator(self):
+        return {"-": np.subtract, "+": np.add}[self.operator]
+
 class ComparatorOp(BinaryOp):
     operators = ["<", ">", "="]
     def _evaluate(self, op_vals, surprisal_dict):
@@ -109,6 +150,11 @@ class ComparatorOp(BinaryOp):
                                 rtol=EQUALITY_RTOL,
                                 atol=EQUALITY_ATOL)
 
+    def _vectorized_operator(self):
+        if self.operator == "=":
+            return lambda left, right: np.isclose(left, right, rtol=EQUALITY_RTOL, atol=EQUALITY_ATOL)
+        return {"<": np.less, ">": np.greater}[self.operator]
+
 def Chain(op_cls, left_assoc=True):
     def chainer(tokens):
         """
@@ -188,6 +234,30 @@ class Prediction(object):
     def apply_prediction_formula(self, surps):
         return self.formula(surps)
 
+    def compile(self, condition_names: TList[str]) -> Callable[[np.ndarray], np.ndarray]:
+        """
+        Compile the prediction formula into a vectorized function that
+        evaluates the prediction on all items at once.
+
+        Args:
+            condition_names: The condition names in the order of the surprisal
+                tensor's second dimension.
+
+        Returns:
+            A function mapping a surprisal tensor of shape
+            ``(items, conditions, regions)``, with regions numbered from 1 in
+            the third dimension, to an array of prediction results of shape
+            ``(items,)``.
+        """
+        condition_index: Dict[str, int] = {name: index for index, name in enumerate(condition_names)}
+        formula = self.formula.compile(condition_index)
+
+        def evaluate(surprisals: np.ndarray) -> np.ndarray:
+            # formulas over literals only evaluate to a scalar
+            return np.broadcast_to(formula(surprisals), surprisals.shape[:1])
+
+        return evaluate
+
     @classmethod
     def from_dict(cls, pred_dict, idx: int, metric: str):
         """
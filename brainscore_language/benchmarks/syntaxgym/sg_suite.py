@@ -1,14 +1,93 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
+import os
 import pandas as pd
+import pickle
 import re
+import requests
 from pathlib import Path
 from pprint import pformat
 from typing import Dict, List, Optional, Iterator, Union, TextIO
 
 from brainscore_language.benchmarks.syntaxgym.sg_prediction import Prediction
 
+_logger = logging.getLogger(__name__)
+
+SUITE_CACHE_DIRECTORY = Path.home() / ".cache" / "brainscore_language" / "syntaxgym_suites"
+SUITE_CACHE_VERSION = 1  # increment when the parsed representation of suites changes
+
+
+def _suite_cache_file(key: str) -> Path:
+    key = hashlib.sha1(f"{SUITE_CACHE_VERSION}:{key}".encode('utf-8')).hexdigest()
+    return SUITE_CACHE_DIRECTORY / f"{key}.pkl"
+
+
+def _read_suite_cache(cache_file: Path) -> Optional[dict]:
+    if not cache_file.is_file():
+        return None
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:  # e.g. written by an incompatible version of the code, re-parse instead
+        _logger.debug(f"Could not read cached suite {cache_file}: {e}")
+        return None
+
+
+def _write_suite_cache(cache_file: Path, entry: dict):
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temporary_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(temporary_file, 'wb') as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file, cache_file)
+    except OSError as e:  # caching is only an optimization, e.g. on read-only home directories
+        _logger.debug(f"Could not cache suite to {cache_file}: {e}")
+
+
+def load_suite_file(path: Union[str, Path]) -> Suite:
+    """
+    Load a suite from a JSON file. The parsed suite, including its parsed prediction formulas,
+    is cached on disk keyed by the hash of the file's contents so that re-loading an unchanged suite skips parsing.
+    """
+    with open(path, 'rb') as f:
+        contents = f.read()
+    cache_file = _suite_cache_file(hashlib.sha1(contents).hexdigest())
+    cached = _read_suite_cache(cache_file)
+    if cached is not None:
+        return cached['suite']
+    suite = Suite.from_dict(json.loads(contents))
+    _write_suite_cache(cache_file, {'suite': suite})
+    return suite
+
+
+def fetch_suite(url: str) -> Suite:
+    """
+    Load a suite from a URL. The parsed suite is cached on disk together with the response's ETag;
+    later fetches only re-download and re-parse the suite if the server reports that it changed.
+    If the server cannot be reached, a previously cached version of the suite is used.
+    """
+    cache_file = _suite_cache_file(url)
+    cached = _read_suite_cache(cache_file)
+    headers = {'If-None-Match': cached['etag']} if cached is not None else {}
+    try:
+        response = requests.get(url, headers=headers)
+    except requests.exceptions.ConnectionError:
+        if cached is None:
+            raise
+        _logger.warning(f"Could not reach {url}, using cached suite")
+        return cached['suite']
+    if cached is not None and response.status_code == 304:  # not modified
+        return cached['suite']
+    response.raise_for_status()
+    suite = Suite.from_dict(response.json())
+    etag = response.headers.get('ETag')
+    if etag is not None:
+        _write_suite_cache(cache_file, {'etag': etag, 'suite': suite})
+    return suite
+
 
 def _load_suite(suite_ref: Union[str, Path, TextIO, Dict, Suite]) -> Suite:
     if isinstance(suite_ref, Suite):
@@ -1,15 +1,19 @@
+import json
 import numpy as np
 import pandas as pd
 import pytest
+from pathlib import Path
 from pprint import pprint
 from pytest import approx
 from typing import List, Dict
 
 from brainscore_language import load_model
-from brainscore_language.benchmarks.syntaxgym import SyntaxGym2020
+from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.benchmarks.syntaxgym import SyntaxGym2020, sg_suite
 from brainscore_language.benchmarks.syntaxgym.benchmark import SyntaxGymTSE, SyntaxGymSingleTSE
 from brainscore_language.benchmarks.syntaxgym.gpt2_precomputed import REFERENCE_DISTILGPT2_SCORES, \
     REFERENCE_DISTILGPT2_REGION_TOTALS
+from brainscore_language.benchmarks.syntaxgym.sg_prediction import Prediction
 from brainscore_language.model_helpers.huggingface import HuggingfaceSubject
 
 
@@ -71,10 +75,168 @@ def test_region_totals_match(distilgpt2, suite: str):
     pd.testing.assert_frame_equal(actual_df, expected_df, atol=1e-3, check_exact=False)
 
 
+@pytest.mark.parametrize("methods", [
+    ('digest_text_batch',),
+    ('snapshot_context', 'restore_context', 'extend_context'),
+])
+def test_shared_computation_matches_sequential(distilgpt2, methods):
+    """
+    Batching conditions or sharing the computation of common region prefixes across conditions
+    should not change the region totals or the score, and is used when scoring a subject that supports it.
+    """
+    benchmark = SyntaxGymSingleTSE(identifier='cleft', suite_ref='cleft')
+    benchmark.suite.items = benchmark.suite.items[:4]
+
+    class RestrictedSubject(ArtificialSubject):  # only exposes the given methods of the wrapped subject
+        def __init__(self, methods):
+            self.calls = {}
+            for method in methods:
+                setattr(self, method, self._counted(method))
+
+        def _counted(self, method):
+            def call(*args, **kwargs):
+                self.calls[method] = self.calls.get(method, 0) + 1
+                return getattr(distilgpt2, method)(*args, **kwargs)
+
+            return call
+
+        def start_behavioral_task(self, task):
+            distilgpt2.start_behavioral_task(task)
+
+        def digest_text(self, text):
+            self.calls['digest_text'] = self.calls.get('digest_text', 0) + 1
+            return distilgpt2.digest_text(text)
+
+    shared_subject, sequential_subject = RestrictedSubject(methods), RestrictedSubject(methods=())
+    shared = benchmark.get_region_totals(shared_subject)
+    sequential = benchmark.get_region_totals(sequential_subject)
+    assert [item.keys() for item in shared] == [item.keys() for item in sequential]
+    np.testing.assert_allclose([list(item.values()) for item in shared],
+                               [list(item.values()) for item in sequential], atol=1e-3)
+
+    assert benchmark(shared_subject) == benchmark(sequential_subject)
+    assert 'digest_text' not in shared_subject.calls
+    assert shared_subject.calls[methods[-1]] > 0
+    assert set(sequential_subject.calls) == {'digest_text'}
+
+
+@pytest.mark.parametrize("suite_ref", [path.stem for path in
+                                       sorted((Path(__file__).parent / 'suites' / 'syntaxgym-2020').glob('*.json'))])
+def test_vectorized_predictions_match_per_item(suite_ref):
+    benchmark = SyntaxGymSingleTSE(identifier=suite_ref, suite_ref=suite_ref)
+    random_state = np.random.RandomState(0)
+    region_totals = []
+    for item in benchmark.suite.items:
+        # few distinct values, with near-equal ones within the equality tolerance, to exercise ties
+        values = random_state.choice([1., 2., 2.0005, 3.], size=(len(benchmark.suite.condition_names),
+                                                                 len(benchmark.suite.region_names)))
+        region_totals.append({(condition_name, region_number + 1): values[condition_index, region_number]
+                              for condition_index, condition_name in enumerate(benchmark.suite.condition_names)
+                              for region_number in range(len(benchmark.suite.region_names))})
+    per_item = [[bool(prediction.apply_prediction_formula(item_region_totals))
+                 for prediction in benchmark.suite.predictions]
+                for item_region_totals in region_totals]
+    assert benchmark.evaluate_predictions(region_totals) == per_item
+
+
+@pytest.mark.parametrize("formula, expected", [
+    ("(1;%a%) < (1;%b%)", [True, True, False]),
+    ("(1;%a%) = (1;%b%)", [False, True, True]),
+    ("(*;%a%) > (*;%b%) + 0.5", [False, False, True]),
+    ("((1;%a%) < (1;%b%)) | ((2;%a%) > (2;%b%))", [True, True, True]),
+    ("1 < 2", [True, True, True]),
+])
+def test_compiled_formula(formula, expected):
+    prediction = Prediction(idx=0, formula=formula, metric='sum')
+    surprisals = np.array([[[1., 1.], [2., 1.]],
+                           [[1., 1.], [1.0005, 1.]],
+                           [[2., 3.], [2., 1.]]])  # (items, conditions, regions)
+    compiled = prediction.compile(['a', 'b'])
+    assert compiled(surprisals).tolist() == expected
+    for item_surprisals, item_expected in zip(surprisals, expected):
+        surprisal_dict = {(condition_name, region_number + 1): item_surprisals[condition_index, region_number]
+                          for condition_index, condition_name in enumerate(['a', 'b'])
+                          for region_number in range(2)}
+        assert bool(prediction.apply_prediction_formula(surprisal_dict)) == item_expected
+
+
+class TestSuiteCache:
+    @pytest.fixture(autouse=True)
+    def cache_directory(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sg_suite, 'SUITE_CACHE_DIRECTORY', tmp_path / 'cache')
+
+    @pytest.fixture
+    def suite_file(self, tmp_path):
+        suite_file = tmp_path / 'cleft.json'
+        suite_file.write_text((Path(__file__).parent / 'suites' / 'syntaxgym-2020' / 'cleft.json').read_text())
+        return suite_file
+
+    @staticmethod
+    def _fail_parsing(monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("suite parsed despite cache")
+
+        monkeypatch.setattr(sg_suite.Suite, 'from_dict', fail)
+
+    def test_file_cached(self, suite_file, monkeypatch):
+        suite = sg_suite.load_suite_file(suite_file)
+        self._fail_parsing(monkeypatch)
+        cached_suite = sg_suite.load_suite_file(suite_file)
+        assert cached_suite == suite
+        assert [str(prediction) for prediction in cached_suite.predictions] == \
+               [str(prediction) for prediction in suite.predictions]
+
+    def test_changed_file_reparsed(self, suite_file):
+        suite = sg_suite.load_suite_file(suite_file)
+        suite_dict = json.loads(suite_file.read_text())
+        suite_dict['items'] = suite_dict['items'][:2]
+        suite_file.write_text(json.dumps(suite_dict))
+        changed_suite = sg_suite.load_suite_file(suite_file)
+        assert len(changed_suite.items) == 2 and len(suite.items) > 2
+
+    def test_url_revalidated_with_etag(self, suite_file, monkeypatch):
+        suite_dict = json.loads(suite_file.read_text())
+        requests_headers = []
+
+        class Response:
+            def __init__(self, status_code):
+                self.status_code = status_code
+                self.headers = {'ETag': '"v1"'}
+
+            def json(self):
+                return suite_dict
+
+            def raise_for_status(self):
+                pass
+
+        def get(url, headers):
+            requests_headers.append(headers)
+            return Response(304 if headers.get('If-None-Match') == '"v1"' else 200)
+
+        monkeypatch.setattr(sg_suite.requests, 'get', get)
+        suite = sg_suite.fetch_suite('https://example.com/cleft.json')
+        self._fail_parsing(monkeypatch)
+        assert sg_suite.fetch_suite('https://example.com/cleft.json') == suite
+        assert requests_headers == [{}, {'If-None-Match': '"v1"'}]
+
+        def unreachable(url, headers):
+            raise sg_suite.requests.exceptions.ConnectionError()
+
+        monkeypatch.setattr(sg_suite.requests, 'get', unreachable)
+        assert sg_suite.fetch_suite('https://example.com/cleft.json') == suite
+
+
 class TestSyntaxGym2020Root:
     def test_number_sub_benchmarks(self):
         assert len(SyntaxGym2020().sub_benchmarks) == 31
 
+    def test_suites_loaded_lazily(self):
+        benchmark = SyntaxGym2020()
+        assert not any('suite' in vars(sub_benchmark) for sub_benchmark in benchmark.sub_benchmarks)
+        sub_benchmark = SyntaxGymSingleTSE(identifier='cleft', suite_ref='cleft')
+        assert sub_benchmark.suite is sub_benchmark.suite  # memoized
+        assert len(sub_benchmark.suite.items) > 0
+
     @pytest.mark.travis_slow
     def test_model_score(self):
         model = load_model('distilgpt2')
@@ -1,10 +1,17 @@
+from functools import cached_property
+from typing import List
+
 import xarray as xr
 
 from brainscore_core.benchmarks import BenchmarkBase
-from brainscore_core.metrics import Score
+from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
+from brainscore_core.metrics import Score, Metric
 from brainscore_language import load_dataset, load_metric
 from brainscore_language.artificial_subject import ArtificialSubject
-from brainscore_language.data.tuckute2024 import BIBTEX
+from brainscore_language.data.tuckute2024 import BIBTEX, ASSEMBLY_FILE
+from brainscore_language.utils import group_indices
+from brainscore_language.utils.checkpoints import GroupCheckpoints
+from brainscore_language.utils.s3 import S3File
 
 from tqdm import tqdm
 
@@ -24,9 +31,8 @@ class _Tuckute2024(BenchmarkBase):
 
     def __init__(self, metric):
         identifier = f"Tuckute2024-{metric}"
-        self.data = load_dataset("Tuckute2024.language")
-        self.metric = load_metric(metric)
-     
+        self._metric_identifier = metric
+
         super(_Tuckute2024, self).__init__(
             identifier=identifier,
             version=1,
@@ -34,24 +40,35 @@ class _Tuckute2024(BenchmarkBase):
             ceiling=None,
             bibtex=BIBTEX)
 
+    @property
+    def remote_files(self) -> List[S3File]:
+        """ files that loading this benchmark's data fetches, see `brainscore_language.prefetch` """
+        return [ASSEMBLY_FILE]
+
+    @cached_property
+    def data(self) -> NeuroidAssembly:
+        return load_dataset("Tuckute2024.language")
+
+    @cached_property
+    def metric(self) -> Metric:
+        return load_metric(self._metric_identifier)
+
     def __call__(self, candidate: ArtificialSubject):
         candidate.start_neural_recording(recording_target=ArtificialSubject.RecordingTarget.language_system,
                                          recording_type=ArtificialSubject.RecordingType.fMRI)
 
-        stimuli = self.data['stimulus']
-        sentences = self.data['stimulus_id'].values
+        stimuli = self.data['stimulus'].values
+        sentences, order = group_indices(self.data['stimulus_id'].values)
+        checkpoints = GroupCheckpoints.for_run(candidate, self)
         predictions = []
-        for sentence_id in tqdm(sorted(set(sentences))):  # go over individual stories, sorting to keep consistency across runs
-            sentence_indexer = [stimulus_sentence == sentence_id for stimulus_sentence in sentences]
-            sentence_stimuli = stimuli[sentence_indexer]
-            stimuli_values = sentence_stimuli.values
-            sentence_predictions = candidate.digest_text(stimuli_values)["neural"]
-
-            sentence_predictions['stimulus_id'] = 'presentation', sentence_stimuli['stimulus_id'].values
-            predictions.append(sentence_predictions)
-            
+        for sentence_id, sentence_indices in tqdm(sentences):  # go over individual sentences, sorted to keep consistency across runs
+            sentence_stimuli = stimuli[sentence_indices]
+            predictions.append(checkpoints(sentence_id, lambda: candidate.digest_text(sentence_stimuli)["neural"]))
+
         predictions = xr.concat(predictions, dim='presentation')
+        predictions['stimulus_id'] = 'presentation', self.data['stimulus_id'].values[order]
             
         raw_score = self.metric(predictions, self.data)
+        checkpoints.clear()
         return raw_score
     
\ No newline at end of file
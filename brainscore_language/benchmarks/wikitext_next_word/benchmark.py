@@ -1,9 +1,13 @@
 import logging
-import re
 import string
+from collections.abc import Sequence
+from functools import cached_property
+from typing import Iterator, List, Tuple, Union
+
+import numpy as np
 
 from brainscore_core.benchmarks import BenchmarkBase
-from brainscore_core.metrics import Score
+from brainscore_core.metrics import Score, Metric
 from brainscore_language import load_dataset, load_metric
 from brainscore_language.artificial_subject import ArtificialSubject
 
@@ -26,8 +30,14 @@ class WikitextAccuracy(BenchmarkBase):
             parent='engineering',
             ceiling=None,
             bibtex=BIBTEX)
-        self.data = load_dataset('wikitext-2/test')
-        self.metric = load_metric('accuracy')
+
+    @cached_property
+    def data(self) -> List[str]:
+        return load_dataset('wikitext-2/test')
+
+    @cached_property
+    def metric(self) -> Metric:
+        return load_metric('accuracy')
 
     def __call__(self, candidate: ArtificialSubject) -> Score:
         candidate.start_behavioral_task(ArtificialSubject.Task.next_word)
@@ -36,30 +46,62 @@ class WikitextAccuracy(BenchmarkBase):
         score = self.metric(predictions, targets)
         return score
 
-    def build_contexts(self):
+    def build_contexts(self) -> Tuple['WikitextContexts', List[str]]:
         """
         Create context-target pairs from `self.data`.
         Note that there is *no tokenization* here, because we treat the candidate like a subject.
         This means we split on white spaces and ask for the next *word* within this context
         (rather than the next token).
-        :return:
+        :return: the contexts as lazy views into the text (see :class:`WikitextContexts`), and the target words
         """
-        contexts = []
+        lines, line_indices, end_offsets = [], [], []
         targets = []
-        previous_context = ''
-        page_header = r'^=[^=]*(=\n)$'  # = at beginning and end, but no more
         for line in self.data:
-            if re.match(page_header, line):
-                previous_context = ''
             line = line.strip()
             whitespace_indices = [i for i, char in enumerate(line) if char in string.whitespace and i > 0]
-            # the context is everything within this page up to (but not including) the current word
-            line_contexts = [previous_context + line[:index] for index in whitespace_indices[:-1]]
+            if len(whitespace_indices) < 2:  # no context-target pairs in this line
+                continue
+            # the context is everything within this line up to (but not including) the current word
+            line_indices += [len(lines)] * (len(whitespace_indices) - 1)
+            end_offsets += whitespace_indices[:-1]
+            lines.append(line)
             # the target for each of these contexts is the current word
             # this current implementation also makes the subject predict next "words" like whitespace, commas, or '@-@'
             line_targets = [line[whitespace_indices[indices_index - 1]:whitespace_indices[indices_index]].strip()
                             for indices_index in range(1, len(whitespace_indices))]
-            contexts += line_contexts
             targets += line_targets
+        contexts = WikitextContexts(lines, np.array(line_indices, dtype=np.int64), np.array(end_offsets, dtype=np.int64))
         assert len(contexts) == len(targets)
         return contexts, targets
+
+
+class WikitextContexts(Sequence):
+    """
+    Sequence of contexts, each represented as a view of a line's first characters up to an end offset.
+    Contexts of the same line share that line's text and are only resolved into strings when accessed,
+    so that the contexts do not hold quadratically many characters in memory.
+    Iterating streams the contexts one at a time, and slicing returns another lazy view.
+    """
+
+    def __init__(self, lines: List[str], line_indices: np.ndarray, end_offsets: np.ndarray):
+        """
+        :param lines: the text that contexts are views into
+        :param line_indices: for each context, the index of its line in `lines`
+        :param end_offsets: for each context, the (exclusive) character offset within its line where the context ends
+        """
+        assert len(line_indices) == len(end_offsets)
+        self._lines = lines
+        self._line_indices = line_indices
+        self._end_offsets = end_offsets
+
+    def __len__(self) -> int:
+        return len(self._line_indices)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, 'WikitextContexts']:
+        if isinstance(index, slice):
+            return WikitextContexts(self._lines, self._line_indices[index], self._end_offsets[index])
+        return self._lines[self._line_indices[index]][:self._end_offsets[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        for line_index, end_offset in zip(self._line_indices.tolist(), self._end_offsets.tolist()):
+            yield self._lines[line_index][:end_offset]
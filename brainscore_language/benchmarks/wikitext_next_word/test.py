@@ -4,6 +4,7 @@ from pytest import approx
 from brainscore_core.supported_data_standards.brainio.assemblies import BehavioralAssembly
 from brainscore_language import load_benchmark
 from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.benchmarks.wikitext_next_word.benchmark import WikitextAccuracy
 
 
 class TestBenchmark:
@@ -23,3 +24,16 @@ class TestBenchmark:
         dummy_model = TestBenchmark.DummyModel()
         score = benchmark(dummy_model)
         assert score == approx(0.05945, abs=0.001)
+
+
+class TestContexts:
+    def test_build_contexts(self):
+        benchmark = WikitextAccuracy()
+        benchmark.data = [' = Page = \n', ' the cat sat , down \n', '\n', ' one two \n']
+        contexts, targets = benchmark.build_contexts()
+        expected_contexts = ['=', 'the', 'the cat', 'the cat sat']
+        assert list(contexts) == expected_contexts
+        assert targets == ['Page', 'cat', 'sat', ',']
+        assert len(contexts) == len(expected_contexts)
+        assert [contexts[index] for index in range(-len(contexts), len(contexts))] == expected_contexts * 2
+        assert list(contexts[1:3]) == expected_contexts[1:3]
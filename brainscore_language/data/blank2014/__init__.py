@@ -1,7 +1,7 @@
 import logging
 
 from brainscore_language import data_registry
-from brainscore_language.utils.s3 import load_from_s3
+from brainscore_language.utils.s3 import S3File
 
 _logger = logging.getLogger(__name__)
 
@@ -16,6 +16,8 @@ BIBTEX = """@article{blank2014functional,
   publisher={American Physiological Society Bethesda, MD}
 }"""
 
-data_registry['Blank2014.fROI'] = lambda: load_from_s3(
+ASSEMBLY_FILE = S3File(
     identifier="Blank2014.fROI",
     sha1="af1e868821b897cb1684e4c8dcd33977121ef552")
+
+data_registry['Blank2014.fROI'] = ASSEMBLY_FILE.load
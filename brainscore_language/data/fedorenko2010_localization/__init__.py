@@ -1,10 +1,20 @@
+import hashlib
+import logging
+import os
 import pandas as pd
+import pickle
 
-from glob import glob
 from pathlib import Path
 
 from brainscore_language import data_registry
 
+_logger = logging.getLogger(__name__)
+
+# Parsed stimuli are cached keyed by the hash of the CSV files' contents, so that loading them skips parsing.
+CACHE_DIRECTORY = Path.home() / ".cache" / "brainscore_language" / "fedorenko2010_localization"
+CACHE_VERSION = 1  # increment when the parsed representation changes
+WORD_COLUMNS = [f"stim{stimuli_idx}" for stimuli_idx in range(2, 14)]
+
 BIBTEX = """@article{Fedorenko2010NewMF,
   title={New method for fMRI investigations of language: defining ROIs functionally in individual subjects.},
   author={Evelina Fedorenko and Po-Jang Hsieh and Alfonso Nieto-Castanon and Susan L. Whitfield-Gabrieli and Nancy G. Kanwisher},
@@ -17,18 +27,32 @@ BIBTEX = """@article{Fedorenko2010NewMF,
 
 # Code adapted from: https://github.com/bkhmsi/brain-language-suma
 
-def load_data():
-    paths = glob(f"{Path(__file__).parent }/*.csv")
-    data = pd.read_csv(paths[0])
-    for path in paths[1:]:
-        run_data = pd.read_csv(path)
-        data = pd.concat([data, run_data])
-
-    data["sent"] = data["stim2"].apply(str.lower)
-
-    for stimuli_idx in range(3, 14):
-        # lowercase each stimulus/word then add it to the sentence
-        data["sent"] += " " + data[f"stim{stimuli_idx}"].apply(str.lower)
+def load_data() -> pd.DataFrame:
+    paths = sorted(Path(__file__).parent.glob("*.csv"))
+    contents_hash = hashlib.sha1(f"{CACHE_VERSION}".encode('utf-8'))
+    for path in paths:
+        contents_hash.update(path.read_bytes())
+    cache_file = CACHE_DIRECTORY / f"{contents_hash.hexdigest()}.pkl"
+    if cache_file.is_file():
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:  # e.g. written by an incompatible version of pandas, re-parse instead
+            _logger.debug(f"Could not read cached stimuli {cache_file}: {e}")
+
+    data = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    # lowercase each stimulus/word and join them into the sentence
+    data["sent"] = data[WORD_COLUMNS].apply(lambda words: words.str.lower()).agg(" ".join, axis=1)
+
+    try:
+        CACHE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        temporary_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(temporary_file, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file, cache_file)
+    except OSError as e:  # caching is only an optimization, e.g. on read-only home directories
+        _logger.debug(f"Could not cache stimuli to {cache_file}: {e}")
     return data
 
+
 data_registry['Fedorenko2010.localization'] = load_data
\ No newline at end of file
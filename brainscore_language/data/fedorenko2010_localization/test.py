@@ -0,0 +1,20 @@
+import pandas as pd
+
+from brainscore_language import load_dataset
+from brainscore_language.data import fedorenko2010_localization
+
+
+def test_data():
+    data = load_dataset('Fedorenko2010.localization')
+    assert len(data) == 480
+    assert (data['stim14'] == 'S').sum() == (data['stim14'] == 'N').sum() == 240
+    assert "just the barest suggestion of a heel is found on teenage pumps" in data['sent'].values
+    assert all(len(sentence.split(" ")) == 12 for sentence in data['sent'])
+
+
+def test_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(fedorenko2010_localization, 'CACHE_DIRECTORY', tmp_path)
+    parsed = fedorenko2010_localization.load_data()
+    assert len(list(tmp_path.iterdir())) == 1
+    monkeypatch.setattr(pd, 'read_csv', None)  # loading again must not parse the files
+    pd.testing.assert_frame_equal(fedorenko2010_localization.load_data(), parsed)
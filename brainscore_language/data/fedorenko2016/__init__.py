@@ -1,7 +1,7 @@
 import logging
 
 from brainscore_language import data_registry
-from brainscore_language.utils.s3 import load_from_s3
+from brainscore_language.utils.s3 import S3File
 
 _logger = logging.getLogger(__name__)
 
@@ -17,6 +17,8 @@ BIBTEX = """@article{fedorenko2016neural,
   publisher={National Acad Sciences}
 }"""
 
-data_registry['Fedorenko2016.language'] = lambda: load_from_s3(
+ASSEMBLY_FILE = S3File(
     identifier="Fedorenko2016.language",
     sha1="2966b6d78e972a72068aa6907377483f427e8d9a")
+
+data_registry['Fedorenko2016.language'] = ASSEMBLY_FILE.load
@@ -1,7 +1,7 @@
 import logging
 
 from brainscore_language import data_registry
-from brainscore_language.utils.s3 import load_from_s3
+from brainscore_language.utils.s3 import S3File
 
 _logger = logging.getLogger(__name__)
 
@@ -15,10 +15,13 @@ BIBTEX = """@proceedings{futrell2018natural,
 }"""
 
 
+ASSEMBLY_FILE = S3File(
+    identifier="Futrell2018",
+    sha1="381ccc8038fbdb31235b5f3e1d350f359b5e287f")
+
+
 def load_assembly():
-    assembly = load_from_s3(
-        identifier="Futrell2018",
-        sha1="381ccc8038fbdb31235b5f3e1d350f359b5e287f")
+    assembly = ASSEMBLY_FILE.load()
     assembly.attrs['bibtex'] = BIBTEX
     return assembly
 
@@ -1,7 +1,7 @@
 import logging
 
 from brainscore_language import data_registry
-from brainscore_language.utils.s3 import load_from_s3
+from brainscore_language.utils.s3 import S3File
 
 _logger = logging.getLogger(__name__)
 
@@ -17,9 +17,12 @@ BIBTEX = """@article{pereira2018toward,
   publisher={Nature Publishing Group}
 }"""
 
-data_registry['Pereira2018.language'] = lambda: load_from_s3(
+LANGUAGE_FILE = S3File(
     identifier="Pereira2018.language",
     sha1="f8434b4022f5b2c862f0ff2854d5b3f5f2a7fb96")
-data_registry['Pereira2018.auditory'] = lambda: load_from_s3(
+AUDITORY_FILE = S3File(
     identifier="Pereira2018.auditory",
     sha1="08e576bd3b8caf64850bb879abf07ae228ff1f5f")
+
+data_registry['Pereira2018.language'] = LANGUAGE_FILE.load
+data_registry['Pereira2018.auditory'] = AUDITORY_FILE.load
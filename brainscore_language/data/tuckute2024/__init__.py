@@ -1,5 +1,5 @@
 from brainscore_language import data_registry
-from brainscore_language.utils.s3 import load_from_s3
+from brainscore_language.utils.s3 import S3File
 
 BIBTEX = """@article{article,
         author = {Tuckute, Greta and Sathe, Aalok and Srikant, Shashank and Taliaferro, Maya and Wang, Mingye and Schrimpf, Martin and Kay, Kendrick and Fedorenko, Evelina},
@@ -12,6 +12,8 @@ BIBTEX = """@article{article,
         doi = {10.1038/s41562-023-01783-7}
 }"""
 
-data_registry["Tuckute2024.language"] = lambda: load_from_s3(
+ASSEMBLY_FILE = S3File(
     identifier="Tuckute2024.language",
-    sha1="5c8fc7f3e24cc1af5f5296459377b638b6492641")
\ No newline at end of file
+    sha1="5c8fc7f3e24cc1af5f5296459377b638b6492641")
+
+data_registry["Tuckute2024.language"] = ASSEMBLY_FILE.load
\ No newline at end of file
@@ -2,6 +2,7 @@ import math
 import numpy as np
 
 from brainscore_core.metrics import Score
+from brainscore_language.utils import as_metric_dtype
 from brainscore_language.utils.transformations import TestOnlyCrossValidation
 
 
@@ -11,20 +12,20 @@ class Defaults:
     neuroid_dim = 'neuroid'
     neuroid_coord = 'neuroid_id'
 
-def centering(K):
-    n = K.shape[0]
-    unit = np.ones([n, n])
-    I = np.eye(n)
-    H = I - unit / n
+# Gram matrices are computed in the precision of the activations, centering and the sums over them in float64.
+# `CKAMetric` casts the model activations to the metric precision (see :meth:`brainscore_language.utils.metric_dtype`).
 
-    return np.dot(np.dot(H, K), H)
-    # HKH are the same with KH, KH is the first centering, H(KH) do the second time,
-    # results are the sme with one time centering
-    # return np.dot(H, K)  # KH
+def centering(K):
+    # HKH with H = I - 1/n, i.e. subtracting row and column means, without the two n x n matrix products
+    K = np.asarray(K, dtype=np.float64)
+    row_means = K.mean(axis=1, keepdims=True)
+    column_means = K.mean(axis=0, keepdims=True)
+    return K - row_means - column_means + K.mean()
 
 
 def rbf(X, sigma=None):
-    GX = np.dot(X, X.T)
+    X = np.asarray(X)
+    GX = np.dot(X, X.T).astype(np.float64)
     KX = np.diag(GX) - GX + (np.diag(GX) - GX).T
     if sigma is None:
         mdist = np.median(KX[KX != 0])
@@ -39,6 +40,7 @@ def kernel_HSIC(X, Y, sigma):
 
 
 def linear_HSIC(X, Y):
+    X, Y = np.asarray(X), np.asarray(Y)
     L_X = np.dot(X, X.T)
     L_Y = np.dot(Y, Y.T)
     return np.sum(centering(L_X) * centering(L_Y))
@@ -66,8 +68,9 @@ class CKAMetric:
     Kornblith et al., 2019 http://proceedings.mlr.press/v97/kornblith19a/kornblith19a.pdf
     """
 
-    def __init__(self, comparison_coord=Defaults.stimulus_coord):
+    def __init__(self, comparison_coord=Defaults.stimulus_coord, dtype=None):
         self._comparison_coord = comparison_coord
+        self._dtype = dtype
 
     def __call__(self, assembly1, assembly2):
         """
@@ -84,7 +87,8 @@ class CKAMetric:
         np.testing.assert_array_equal(assembly2[self._comparison_coord].dims, dims)
         assembly1 = assembly1.transpose(*(list(dims) + [dim for dim in assembly1.dims if dim not in dims]))
         assembly2 = assembly2.transpose(*(list(dims) + [dim for dim in assembly2.dims if dim not in dims]))
-        similarity = linear_CKA(assembly1, assembly2)
+        # only the model activations (`assembly1`) are cast, the data keeps its precision
+        similarity = linear_CKA(as_metric_dtype(assembly1, self._dtype), assembly2)
         return Score(similarity)
 
 class CKACrossValidated:
@@ -95,8 +99,8 @@ class CKACrossValidated:
     Kornblith et al., 2019 http://proceedings.mlr.press/v97/kornblith19a/kornblith19a.pdf
     """
 
-    def __init__(self, comparison_coord=Defaults.stimulus_coord, crossvalidation_kwargs=None):
-        self._metric = CKAMetric(comparison_coord=comparison_coord)
+    def __init__(self, comparison_coord=Defaults.stimulus_coord, crossvalidation_kwargs=None, dtype=None):
+        self._metric = CKAMetric(comparison_coord=comparison_coord, dtype=dtype)
         crossvalidation_defaults = dict(test_size=.9)  # leave 10% out
         crossvalidation_kwargs = {**crossvalidation_defaults, **(crossvalidation_kwargs or {})}
         self._cross_validation = TestOnlyCrossValidation(**crossvalidation_kwargs)
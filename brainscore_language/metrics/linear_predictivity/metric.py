@@ -6,6 +6,7 @@ from sklearn.preprocessing import scale
 from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly, array_is_element, DataAssembly
 from brainscore_core.supported_data_standards.brainio.assemblies import walk_coords
 from brainscore_core.metrics import Score, Metric
+from brainscore_language.utils import as_metric_dtype
 from brainscore_language.utils.transformations import CrossValidation
 
 
@@ -19,11 +20,14 @@ class Defaults:
 class XarrayRegression:
     """
     Adds alignment-checking, un- and re-packaging, and comparison functionality to a regression.
+    The source (model activations) is cast to the metric precision (see :meth:`brainscore_language.utils.metric_dtype`)
+    before fitting and predicting, the target keeps its own dtype.
     """
 
     def __init__(self, regression, expected_dims=Defaults.expected_dims, neuroid_dim=Defaults.neuroid_dim,
-                 neuroid_coord=Defaults.neuroid_coord, stimulus_coord=Defaults.stimulus_coord):
+                 neuroid_coord=Defaults.neuroid_coord, stimulus_coord=Defaults.stimulus_coord, dtype=None):
         self._regression = regression
+        self._dtype = dtype
         self._expected_dims = expected_dims
         self._neuroid_dim = neuroid_dim
         self._neuroid_coord = neuroid_coord
@@ -34,7 +38,7 @@ class XarrayRegression:
         source, target = self._align(source), self._align(target)
         source, target = source.sortby(self._stimulus_coord), target.sortby(self._stimulus_coord)
 
-        self._regression.fit(source, target)
+        self._regression.fit(as_metric_dtype(source, self._dtype), target)
 
         self._target_neuroid_values = {}
         for name, dims, values in walk_coords(target):
@@ -44,7 +48,7 @@ class XarrayRegression:
 
     def predict(self, source):
         source = self._align(source)
-        predicted_values = self._regression.predict(source)
+        predicted_values = self._regression.predict(as_metric_dtype(source, self._dtype))
         prediction = self._package_prediction(predicted_values, source=source)
         return prediction
 
@@ -89,10 +93,14 @@ class XarrayCorrelation:
         # compute correlation per neuroid
         neuroid_dims = target[self._neuroid_coord].dims
         assert len(neuroid_dims) == 1
+        # predictions keep the precision of the regression that made them, targets their own
+        target_values, target_axis = np.asarray(target), target.get_axis_num(neuroid_dims[0])
+        prediction_values, prediction_axis = np.asarray(prediction), prediction.get_axis_num(neuroid_dims[0])
         correlations = []
-        for i, coord_value in enumerate(target[self._neuroid_coord].values):
-            target_neuroids = target.isel(**{neuroid_dims[0]: i})  # `isel` is about 10x faster than `sel`
-            prediction_neuroids = prediction.isel(**{neuroid_dims[0]: i})
+        for i in range(target_values.shape[target_axis]):
+            # index the arrays directly rather than the assemblies, and correlate each neuroid in float64
+            target_neuroids = np.take(target_values, i, axis=target_axis).astype(np.float64)
+            prediction_neuroids = np.take(prediction_values, i, axis=prediction_axis).astype(np.float64)
             r, p = self._correlation(target_neuroids, prediction_neuroids)
             correlations.append(r)
         # package
@@ -165,7 +173,8 @@ def ridge_regression(xarray_kwargs=None):
 
 def linear_regression(xarray_kwargs=None):
     regression = LinearRegression()
-    xarray_kwargs = xarray_kwargs or {}
+    # without regularization, least squares on activations is often ill-conditioned and changes noticeably in float32
+    xarray_kwargs = {'dtype': np.float64, **(xarray_kwargs or {})}
     regression = XarrayRegression(regression, **xarray_kwargs)
     return regression
 
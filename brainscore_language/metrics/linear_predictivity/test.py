@@ -1,10 +1,11 @@
 import numpy as np
+import scipy.stats
 from numpy.random import RandomState
 from pytest import approx
 
 from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
 from brainscore_language import load_metric
-from .metric import linear_regression
+from .metric import linear_regression, pearsonr_correlation, ridge_regression
 
 
 class TestMetric:
@@ -50,6 +51,32 @@ class TestMetric:
             "should be 10 splits x 25 target neuroids"
         assert score.attrs['raw_regression_intercept'].dims == ('split', 'target_neuroid')
 
+    def test_ridge_precision(self, monkeypatch):
+        source = self._make_assembly(RandomState(1).standard_normal(30 * 25).reshape((30, 25)).astype(np.float32))
+        target = self._make_assembly(RandomState(2).standard_normal(30 * 25).reshape((30, 25)))
+        predictions = {}
+        for precision in ['float32', 'float64']:
+            monkeypatch.setenv('BS_METRIC_PRECISION', precision)
+            regression = ridge_regression()
+            regression.fit(source=source, target=target)
+            predictions[precision] = regression.predict(source=source)
+            assert predictions[precision].dtype == np.dtype(precision)
+        np.testing.assert_allclose(predictions['float32'], predictions['float64'], atol=1e-5)
+
+    def test_linear_regression_float64(self):
+        source = self._make_assembly(RandomState(1).standard_normal(30 * 25).reshape((30, 25)).astype(np.float32))
+        regression = linear_regression()
+        regression.fit(source=source, target=source)
+        assert regression.predict(source=source).dtype == np.float64
+
+    def test_correlation_keeps_precision(self, monkeypatch):
+        monkeypatch.setenv('BS_METRIC_PRECISION', 'float32')
+        prediction = self._make_assembly()
+        target = self._make_assembly(RandomState(2).standard_normal(30 * 25).reshape((30, 25)))
+        correlations = pearsonr_correlation()(prediction, target)
+        expected = [scipy.stats.pearsonr(target.values[:, i], prediction.values[:, i])[0] for i in range(25)]
+        np.testing.assert_allclose(correlations, expected, rtol=1e-12)
+
     def _make_assembly(self, values=None):
         if values is None:
             values = RandomState(1).standard_normal(30 * 25).reshape((30, 25))
@@ -3,6 +3,7 @@ from scipy.stats import spearmanr
 
 from brainscore_core.supported_data_standards.brainio.assemblies import DataAssembly, walk_coords, NeuroidAssembly
 from brainscore_core.metrics import Metric, Score
+from brainscore_language.utils import metric_dtype
 from brainscore_language.utils.transformations import TestOnlyCrossValidation
 
 class XarrayDefaults:
@@ -19,8 +20,8 @@ class RDMCrossValidated(Metric):
     """
 
     def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, comparison_coord=XarrayDefaults.stimulus_coord,
-                 crossvalidation_kwargs=None):
-        self._metric = RDMMetric(neuroid_dim=neuroid_dim, comparison_coord=comparison_coord)
+                 crossvalidation_kwargs=None, dtype=None):
+        self._metric = RDMMetric(neuroid_dim=neuroid_dim, comparison_coord=comparison_coord, dtype=dtype)
         crossvalidation_defaults = dict(test_size=.9)  # leave 10% out
         # crossvalidation_defaults = dict(train_size=.9, test_size=None)
         crossvalidation_kwargs = {**crossvalidation_defaults, **(crossvalidation_kwargs or {})}
@@ -37,13 +38,16 @@ class RDMMetric(Metric):
     Kriegeskorte et al., 2008 https://doi.org/10.3389/neuro.06.004.2008
     """
 
-    def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, comparison_coord=XarrayDefaults.stimulus_coord):
+    def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, comparison_coord=XarrayDefaults.stimulus_coord,
+                 dtype=None):
         self._neuroid_dim = neuroid_dim
+        self._dtype = dtype
         self._rdm = RDM(neuroid_dim=neuroid_dim)
         self._similarity = RDMSimilarity(comparison_coord=comparison_coord)
 
     def __call__(self, assembly1: NeuroidAssembly, assembly2: NeuroidAssembly) -> Score:
-        rdm1 = self._rdm(assembly1)
+        # only the model activations (`assembly1`) are cast to the metric precision, the data keeps its precision
+        rdm1 = self._rdm(assembly1.astype(metric_dtype(self._dtype), copy=False))
         rdm2 = self._rdm(assembly2)
         similarity = self._similarity(rdm1, rdm2)
         return Score(similarity)
@@ -53,6 +57,7 @@ class RDM:
     """
     Representational Dissimilarity Matrix.
     Converts an assembly of `presentation x neuroid` into a `neuroid x neuroid` RDM.
+    The products between presentations are computed in the precision of the assembly, their normalization in float64.
 
     Kriegeskorte et al., 2008 https://doi.org/10.3389/neuro.06.004.2008
     """
@@ -62,13 +67,25 @@ class RDM:
 
     def __call__(self, assembly):
         assert len(assembly.dims) == 2
-        correlations = np.corrcoef(assembly) if assembly.dims[-1] == self._neuroid_dim else np.corrcoef(assembly.T).T
+        correlations = self._correlation_matrix(assembly) if assembly.dims[-1] == self._neuroid_dim \
+            else self._correlation_matrix(assembly.T).T
         coords = {coord: coord_value for coord, coord_value in assembly.coords.items() if coord != self._neuroid_dim}
         dims = [dim if dim != self._neuroid_dim else assembly.dims[(i - 1) % len(assembly.dims)]
                 for i, dim in enumerate(assembly.dims)]
         similarities = DataAssembly(correlations, coords=coords, dims=dims)
         return 1 - similarities
 
+    def _correlation_matrix(self, assembly) -> np.ndarray:
+        """ like `np.corrcoef`, correlating rows, but without promoting the product of the rows to float64 """
+        values = np.asarray(assembly)
+        if not np.issubdtype(values.dtype, np.floating):
+            values = values.astype(np.float64)
+        centered = values - values.mean(axis=1, keepdims=True, dtype=np.float64).astype(values.dtype)
+        covariances = np.dot(centered, centered.T).astype(np.float64)
+        stddevs = np.sqrt(np.diag(covariances))
+        correlations = covariances / stddevs[:, np.newaxis] / stddevs[np.newaxis, :]
+        return np.clip(correlations, -1, 1, out=correlations)
+
 
 class RDMSimilarity:
     def __init__(self, comparison_coord=XarrayDefaults.stimulus_coord):
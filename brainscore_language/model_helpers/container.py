@@ -1,13 +1,20 @@
 from collections import OrderedDict
 
 import functools
+import hashlib
+import io
 import json
 import logging
 import multiprocessing
 import numpy as np
+import pickle
 import re
+import shutil
+import sqlite3
 import subprocess
+import tempfile
 import sys
+import time
 import torch
 import xarray as xr
 from joblib import Parallel, delayed, parallel_backend
@@ -22,6 +29,66 @@ from brainscore_language.model_helpers.preprocessing import prepare_context
 from brainscore_language.utils import fullname
 
 
+class PayloadFormat:
+    """ how the container returns its output to the host """
+
+    json = "json"
+    """ a JSON string on stdout (default) """
+    npy = "npy"
+    """ a NumPy `.npz` archive on stdout, holding one `.npy` array per output key """
+    file = "file"
+    """ one `.npy` file per output key, written to a directory shared with the host and memory-mapped on read """
+
+
+class _ResponseCache:
+    """
+    Size-bounded, least-recently-used on-disk cache of container responses.
+    Backed by a SQLite database so that parallel worker processes can safely share it.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._connection: Union[None, sqlite3.Connection] = None
+
+    def __getstate__(self):
+        # connections cannot be shared across processes, every worker opens its own
+        return {**self.__dict__, '_connection': None}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self._path, timeout=60, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                                     "key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)")
+        return self._connection
+
+    @staticmethod
+    def key(*request) -> str:
+        return hashlib.sha256(json.dumps(request).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        row = self.connection.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value):
+        value = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                                    (key, value, len(value), time.time()))
+            # evict least recently used entries beyond the size limit
+            self.connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM ("
+                "SELECT key, SUM(size) OVER (ORDER BY last_access DESC) AS cumulative_size FROM responses) "
+                "WHERE cumulative_size > ?)", (self._max_bytes,))
+
+
 class ContainerSubject(ArtificialSubject):
     """
     Evaluation interface for arbitary containerized models.
@@ -53,6 +120,20 @@ class ContainerSubject(ArtificialSubject):
     where MEASURE is the name of the representation as supported by your container 
     and REPRESENTATION is an array of shape (1, representation_size) cast to a list
 
+    Task: estimate reading times from surprisal computed inside the container (opt-in via `return_surprisal=True`)
+    Input: --measure "token-surprisal"
+    Output: {"measure": SURPRISALS}
+    where SURPRISALS are the per-token surprisals (in bits) of the target tokens, of shape (num_tokens,)
+    This avoids transferring vocabulary-sized logits for every token.
+
+    Output formats: by default, all outputs are returned as JSON. Containers that support binary payloads can be
+    evaluated with `payload_format=PayloadFormat.npy` or `payload_format=PayloadFormat.file`, in which case the
+    entrypoint is additionally called with `--output-format npy` or `--output-format file --output-dir <directory>`.
+    With `npy`, the container writes a NumPy `.npz` archive to stdout (e.g. `np.savez(sys.stdout.buffer, **output)`)
+    with the same keys as the JSON output above.
+    With `file`, the container writes one `.npy` file per key into `<directory>` (e.g. `<directory>/measure.npy`),
+    which is shared with the host and memory-mapped when reading.
+
     Note: While the internals of any containerized model are not restricted, the interface must be as described above. 
     It is highly recommended to raise detailed error messages from inside the container, so they can be escalated here.
     It is also recommended to include a list of supported measures in the container's documentation.
@@ -69,6 +150,10 @@ class ContainerSubject(ArtificialSubject):
             identifier: str,
             region_layer_mapping: dict,
             task_heads: Union[None, Dict[ArtificialSubject.Task, Callable]] = None,
+            payload_format: str = PayloadFormat.json,
+            return_surprisal: bool = False,
+            cache_responses: bool = True,
+            cache_max_bytes: int = 2 * 1024 ** 3,
     ):
         """
         :param container: Container name, e.g., "USERNAME/CONTAINER:TAG"
@@ -76,12 +161,23 @@ class ContainerSubject(ArtificialSubject):
         :param identifier: Model identifer passed to entrypoint, e.g., "model_name"
         :param region_layer_mapping: Mapping from brain region to requested measure, e.g., {"language_system": "model_layer_name"}
         :param task_heads: Mapping from task to callable that takes the output of the container and returns a score, e.g., {ArtificialSubject.Task.next_word: predict_next_word_function}
+        :param payload_format: How the container returns its output, one of the :class:`PayloadFormat` options.
+            The container has to support the requested format.
+        :param return_surprisal: If True, request per-token surprisals ("token-surprisal") from the container for
+            reading times instead of full logits ("token-logits").
+        :param cache_responses: If True, store container responses on disk, keyed by the container image digest and
+            the request, and reuse them for identical requests. Container models are assumed to be deterministic.
+        :param cache_max_bytes: Size limit of the response cache, least recently used responses are evicted beyond it.
         """
         self._logger = logging.getLogger(fullname(self))
         self._container: str = container
         self._entrypoint: str = entrypoint
         self._identifier: str = identifier
         self._region_layer_mapping: dict = region_layer_mapping
+        if payload_format not in (PayloadFormat.json, PayloadFormat.npy, PayloadFormat.file):
+            raise ValueError(f"Unknown payload format {payload_format}")
+        self._payload_format: str = payload_format
+        self._return_surprisal: bool = return_surprisal
 
         self._neural_recordings: List[Tuple] = []
         self._behavioral_task: Union[None, ArtificialSubject.Task] = None
@@ -100,6 +196,8 @@ class ContainerSubject(ArtificialSubject):
         self._cachedir = Path.home() / ".cache" / "brainscore_language"
         self._cachedir.mkdir(parents=True, exist_ok=True)
         self._download_container()
+        self._response_cache: Union[None, _ResponseCache] = _ResponseCache(
+            self._cachedir / "container_responses.sqlite", max_bytes=cache_max_bytes) if cache_responses else None
 
     def identifier(self):
         return self._identifier
@@ -115,6 +213,10 @@ class ContainerSubject(ArtificialSubject):
     ):
         self._neural_recordings.append((recording_target, recording_type))
 
+    def reset(self):
+        self._neural_recordings = []
+        self._behavioral_task = None
+
     def _select_container_backend(self):
         options = ["docker", "singularity"]
         for option in options:
@@ -161,7 +263,48 @@ class ContainerSubject(ArtificialSubject):
                 f"Could not pull container {self._container} using {self._backend}. Error message above traceback."
             ) from e
 
-    def _evaluate_container(self, context: str, text: str, measure: str) -> np.ndarray:
+    @functools.cached_property
+    def _image_digest(self) -> str:
+        """ the digest of the container image, only determined once responses are looked up in the cache """
+        return self._get_image_digest()
+
+    def _get_image_digest(self) -> str:
+        """
+        Identify the exact container image, so that cached responses are invalidated when the image changes.
+        """
+        if self._backend == "docker":
+            output = subprocess.check_output(["docker", "image", "inspect", "--format", "{{.Id}}", self._container])
+            return output.decode("utf-8").strip()
+        elif self._backend == "singularity":
+            f = self._get_singularity_container(self._cachedir, self._container)
+            digest_file = f.with_suffix(".sha256")
+            if digest_file.exists() and digest_file.stat().st_mtime >= f.stat().st_mtime:
+                return digest_file.read_text().strip()
+            sha256 = hashlib.sha256()
+            with open(f, "rb") as image:
+                for chunk in iter(lambda: image.read(1024 * 1024), b""):
+                    sha256.update(chunk)
+            digest = f"sha256:{sha256.hexdigest()}"
+            digest_file.write_text(digest)
+            return digest
+        else:
+            raise RuntimeError(f"Unknown container backend {self._backend}")
+
+    def _evaluate_container(self, context: str, text: str, measure: str) -> Dict[str, Union[str, list, np.ndarray]]:
+        """
+        Return the container's results for the given arguments, re-using cached responses for repeated requests.
+        """
+        if self._response_cache is None:
+            return self._run_container(context, text, measure)
+        key = self._response_cache.key(self._image_digest, self._entrypoint, self._identifier, measure,
+                                       self._payload_format, context, text)
+        output = self._response_cache.get(key)
+        if output is None:
+            output = self._run_container(context, text, measure)
+            self._response_cache.put(key, output)
+        return output
+
+    def _run_container(self, context: str, text: str, measure: str) -> Dict[str, Union[str, list, np.ndarray]]:
         """
         Pass arguments to container and return results if interface is followed.
         If the container fails, the error message is escalated.
@@ -177,35 +320,72 @@ class ContainerSubject(ArtificialSubject):
         else:
             raise RuntimeError(f"Unknown container backend {self._backend}")
 
-        cmd = f"""{self._backend} run {container} "{self._entrypoint} """
-        cmd += f"""--model {self._identifier} --measure {measure} """
+        payload_dir = None
+        format_args = ""
+        mount_args = ""
+        if self._payload_format == PayloadFormat.npy:
+            format_args = f"--output-format {PayloadFormat.npy} "
+        elif self._payload_format == PayloadFormat.file:
+            # the directory is mounted at the same path inside the container
+            payload_root = self._cachedir / "payloads"
+            payload_root.mkdir(parents=True, exist_ok=True)
+            payload_dir = Path(tempfile.mkdtemp(dir=payload_root))
+            format_args = f"--output-format {PayloadFormat.file} --output-dir {payload_dir} "
+            mount_args = f"-v {payload_dir}:{payload_dir} " if self._backend == "docker" else f"--bind {payload_dir} "
+
+        cmd = f"""{self._backend} run {mount_args}{container} "{self._entrypoint} """
+        cmd += f"""--model {self._identifier} --measure {measure} {format_args}"""
         cmd += f"""--context '{prep(context)}' --text '{prep(text)}' " """
 
         try:
             output = subprocess.check_output(cmd, shell=True)
+            return self._parse_output(output, payload_format=self._payload_format, payload_dir=payload_dir)
         except subprocess.CalledProcessError as e:
             self._logger.error(f"Error while running container: {e.output}")
             raise RuntimeError(
                 f"Container {self._container} raised an error. "
                 + "Please confirm it supports the requested interface and arguments."
             ) from e
+        finally:
+            if payload_dir is not None:
+                # memory-mapped arrays remain readable after their files are unlinked
+                shutil.rmtree(payload_dir, ignore_errors=True)
 
-        response_json = output.decode("utf-8")
-
-        return json.loads(response_json)
+    @staticmethod
+    def _parse_output(output: bytes, payload_format: str = PayloadFormat.json,
+                      payload_dir: Union[None, Path] = None) -> Dict[str, Union[str, list, np.ndarray]]:
+        """
+        Convert the raw container output into a dictionary following the interface, e.g. `{"measure": ...}`.
+        """
+        if payload_format == PayloadFormat.json:
+            return json.loads(output.decode("utf-8"))
+        if payload_format == PayloadFormat.npy:
+            with np.load(io.BytesIO(output), allow_pickle=False) as archive:
+                return {key: archive[key] for key in archive.files}
+        if payload_format == PayloadFormat.file:
+            return {path.stem: np.load(path, mmap_mode="r", allow_pickle=False)
+                    for path in sorted(Path(payload_dir).glob("*.npy"))}
+        raise ValueError(f"Unknown payload format {payload_format}")
 
     def _predict_next_word(self, context: str, text: str) -> str:
         output = self._evaluate_container(context, text, "next-word")
         next_word = output["measure"]
+        if isinstance(next_word, np.ndarray):  # binary payloads hold the word as a 0-d string array
+            next_word = next_word.item()
         assert isinstance(next_word, str)
         return next_word
 
     def _estimate_reading_times(self, context: str, text: str) -> float:
         import torch.nn.functional as F
 
+        if self._return_surprisal:
+            output = self._evaluate_container(context, text, "token-surprisal")
+            surprisals = np.asarray(output["measure"], dtype=np.float64)
+            return surprisals.sum()
+
         output = self._evaluate_container(context, text, "token-logits")
-        shifted_logits = torch.Tensor(output["measure"])
-        tokens = torch.Tensor(output["tokens"]).long()
+        shifted_logits = torch.as_tensor(np.array(output["measure"], dtype=np.float32))
+        tokens = torch.as_tensor(np.array(output["tokens"], dtype=np.int64))
         assert shifted_logits.shape[0] == tokens.shape[0]
         return F.cross_entropy(shifted_logits, tokens, reduction="sum") / np.log(2)
 
@@ -251,6 +431,8 @@ class ContainerSubject(ArtificialSubject):
         if type(text) == str:
             text = [text]
         text_iterator = tqdm(text, desc="digest text") if len(text) > 100 else text
+        if self._response_cache is not None:
+            self._image_digest  # determine the digest here rather than in every worker the parts are sent to
         with parallel_backend("loky", n_jobs=multiprocessing.cpu_count()):
             assemblies = Parallel()(
                 delayed(_build_assembly)(part_number, text_part)
@@ -1,7 +1,7 @@
-import copy
 import functools
 import logging
 import numpy as np
+import os
 import re
 from gensim.models.keyedvectors import KeyedVectors
 from numpy.core import defchararray
@@ -23,6 +23,7 @@ class EmbeddingSubject(ArtificialSubject):
     """
     Lookup-table for word inputs.
     """
+    supports_group_checkpoints = True  # every call only looks up the words it is given
 
     def __init__(self, identifier: str, lookup,
                  layer_name: str = 'projection', average_representations=mean_over_words):
@@ -43,12 +44,18 @@ class EmbeddingSubject(ArtificialSubject):
                                recording_type: ArtificialSubject.RecordingType):
         self.neural_recordings.append((recording_target, recording_type))
 
+    def reset(self):
+        self.neural_recordings = []
+
     def digest_text(self, text: Union[str, List[str]]) -> Dict[str, NeuroidAssembly]:
         assert len(self.neural_recordings) > 0, "Unspecified what to output when not recording"
 
         if type(text) == str:
             text = [text]
 
+        if self._supports_vectorized_lookup():
+            return {'behavior': [], 'neural': self._digest_text_vectorized(text)}
+
         output = {'behavior': [], 'neural': []}
         text_iterator = tqdm(text, desc='digest text') if len(text) > 100 else text  # show progress bar if many parts
         for part_number, text_part in enumerate(text_iterator):
@@ -62,38 +69,90 @@ class EmbeddingSubject(ArtificialSubject):
         output['neural'] = merge_data_arrays(output['neural']).sortby('part_number') if output['neural'] else None
         return output
 
-    def _encode_sentence(self, text_part: str) -> np.ndarray:
+    def _supports_vectorized_lookup(self) -> bool:
+        """
+        Whether all text parts can be encoded at once, i.e. if the lookup is backed by a dense matrix
+        (providing `vectors` and `word_indices`) or can embed many words in one call (providing `lookup_batch`),
+        and representations are averaged over words.
+        """
+        return self._average_representations is mean_over_words and (
+                hasattr(self._lookup, 'lookup_batch') or
+                (hasattr(self._lookup, 'vectors') and hasattr(self._lookup, 'word_indices')))
+
+    def _digest_text_vectorized(self, text: List[str]) -> NeuroidAssembly:
+        """
+        Encode all text parts with a single batched lookup and average per part with a segment
+        reduction, then package all parts and recordings into one assembly.
+        """
+        part_words = [self._tokenize(text_part) for text_part in text]
+        part_lengths = np.array([len(words) for words in part_words])
+        features = self._lookup_words([word for words in part_words for word in words])
+
+        part_means = np.full((len(text), features.shape[1]), np.nan)
+        non_empty = part_lengths > 0
+        if non_empty.any():
+            segment_starts = (np.cumsum(part_lengths) - part_lengths)[non_empty]
+            part_sums = np.add.reduceat(features, segment_starts, axis=0)
+            part_means[non_empty] = part_sums / part_lengths[non_empty, np.newaxis]
+
+        stimuli_coords = {'stimulus': ('presentation', list(text)),
+                          'part_number': ('presentation', np.arange(len(text)))}
+        return self.package_representations(part_means, stimuli_coords=stimuli_coords)
+
+    def _lookup_words(self, words: List[str]) -> np.ndarray:
+        if hasattr(self._lookup, 'lookup_batch'):
+            return np.asarray(self._lookup.lookup_batch(words), dtype=np.float64)
+        indices = self._lookup.word_indices(words)
+        vectors = self._lookup.vectors
+        # words that are not in the vocabulary (index -1) contribute a zero vector
+        features = np.zeros((len(indices), vectors.shape[1]), dtype=np.float64)
+        in_vocabulary = indices >= 0
+        features[in_vocabulary] = vectors[indices[in_vocabulary]]
+        return features
+
+    def _tokenize(self, text_part: str) -> List[str]:
         text_part = prepare_context([text_part])
-        words = text_part.split()
-        feature_vectors = []
-        for word in words:
+        words = []
+        for word in text_part.split():
             word = remove_punctuation(word)
             word = word.rstrip("'s")
+            words.append(word)
+        return words
+
+    def _encode_sentence(self, text_part: str) -> np.ndarray:
+        feature_vectors = []
+        for word in self._tokenize(text_part):
             features = self._lookup[word]
             feature_vectors.append(features)
         return np.array(feature_vectors)
 
     def package_representations(self, representation_values: np.ndarray, stimuli_coords):
+        """
+        Package representations as a `presentation x neuroid` assembly, repeating the layer representations for
+        every recording.
+
+        :param representation_values: either a single representation `(num_units,)` for one presentation, or one
+            representation per presentation `(num_presentations, num_units)`
+        """
+        representation_values = np.atleast_2d(representation_values)
         num_units = representation_values.shape[-1]
+        num_recordings = len(self.neural_recordings)
+        neuron_number_in_layer = np.tile(np.arange(num_units), num_recordings)
+        layer = np.array([self._layer_name] * (num_units * num_recordings))
         neuroid_coords = {
-            'layer': ('neuroid', [self._layer_name] * len(representation_values)),
-            'neuron_number_in_layer': ('neuroid', np.arange(num_units)),
+            'layer': ('neuroid', layer),
+            'neuron_number_in_layer': ('neuroid', neuron_number_in_layer),
+            'neuroid_id': ('neuroid', functools.reduce(defchararray.add, [
+                layer, '--', neuron_number_in_layer.astype(str)])),
+            'recording_target': ('neuroid', np.repeat(
+                [recording_target for recording_target, _ in self.neural_recordings], num_units)),
+            'recording_type': ('neuroid', np.repeat(
+                [recording_type for _, recording_type in self.neural_recordings], num_units)),
         }
-        neuroid_coords['neuroid_id'] = 'neuroid', functools.reduce(defchararray.add, [
-            neuroid_coords['layer'][1], '--', neuroid_coords['neuron_number_in_layer'][1].astype(str)])
-        layer_representations = NeuroidAssembly(
-            [representation_values],
+        representations = NeuroidAssembly(
+            np.tile(representation_values, (1, num_recordings)),
             coords={**stimuli_coords, **neuroid_coords},
             dims=['presentation', 'neuroid'])
-        # repeat layer representations for every recording
-        representations = []
-        for recording_target, recording_type in self.neural_recordings:
-            current_representations = copy.deepcopy(layer_representations)
-            current_representations['recording_target'] = 'neuroid', [recording_target] * num_units
-            current_representations['recording_type'] = 'neuroid', [recording_type] * num_units
-            current_representations = type(current_representations)(current_representations)  # reindex
-            representations.append(current_representations)
-        representations = merge_data_arrays(representations)
         return representations
 
 
@@ -111,6 +170,18 @@ class _GensimLookup(dict):
             self._logger.warning(f"Word {word} not present in model")
             return np.zeros((self._vector_size,))
 
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._model.vectors
+
+    def word_indices(self, words: List[str]) -> np.ndarray:
+        """ Row indices of the `words` in `vectors`, or -1 for words that are not in the vocabulary """
+        key_to_index = self._model.key_to_index
+        indices = np.fromiter((key_to_index.get(word, -1) for word in words), dtype=np.int64, count=len(words))
+        for word in sorted({word for word, index in zip(words, indices) if index < 0}):
+            self._logger.warning(f"Word {word} not present in model")
+        return indices
+
 
 class GensimKeyedVectorsSubject(EmbeddingSubject):
     """
@@ -119,14 +190,42 @@ class GensimKeyedVectorsSubject(EmbeddingSubject):
 
     def __init__(self, identifier: str, weights_file: Union[str, Path], vector_size: int,
                  weights_file_binary: bool = False, weights_file_no_header: bool = False,
+                 native_cache_file: Union[None, str, Path] = None,
                  layer_name: str = 'projection', average_representations=mean_over_words):
-        model = KeyedVectors.load_word2vec_format(weights_file,
-                                                  binary=weights_file_binary, no_header=weights_file_no_header)
+        """
+        :param native_cache_file: where to keep a copy of the weights in gensim's native format. If set, the
+            word2vec-format `weights_file` is only parsed once and later runs memory-map the cached vectors,
+            so that parallel processes share the same pages.
+        """
+        model = load_keyed_vectors(weights_file, binary=weights_file_binary, no_header=weights_file_no_header,
+                                   native_cache_file=native_cache_file)
         lookup = _GensimLookup(model=model, vector_size=vector_size)
         super(GensimKeyedVectorsSubject, self).__init__(identifier=identifier, lookup=lookup, layer_name=layer_name,
                                                         average_representations=average_representations)
 
 
+def load_keyed_vectors(weights_file: Union[str, Path], binary: bool = False, no_header: bool = False,
+                       native_cache_file: Union[None, str, Path] = None) -> KeyedVectors:
+    """
+    Load word2vec-format weights, optionally converting them once to gensim's native format in `native_cache_file`
+    which is then loaded with memory-mapped, read-only vectors.
+    """
+    if native_cache_file is None:
+        return KeyedVectors.load_word2vec_format(weights_file, binary=binary, no_header=no_header)
+    native_cache_file = Path(native_cache_file)
+    if not native_cache_file.is_file():
+        _logger = logging.getLogger(__name__)
+        _logger.info(f"Converting {weights_file} to native format in {native_cache_file}")
+        model = KeyedVectors.load_word2vec_format(weights_file, binary=binary, no_header=no_header)
+        # save under a temporary name first so that concurrent processes never see a partially written cache.
+        # The main file is moved last since its presence marks the cache as complete.
+        temporary_file = native_cache_file.with_name(f"{native_cache_file.name}.{os.getpid()}.tmp")
+        model.save(str(temporary_file), separately=['vectors'])
+        os.replace(f"{temporary_file}.vectors.npy", f"{native_cache_file}.vectors.npy")
+        os.replace(temporary_file, native_cache_file)
+    return KeyedVectors.load(str(native_cache_file), mmap='r')
+
+
 def remove_punctuation(word):
     """ Remove dots, question marks, exclamation marks, and commas (`.?!,`) from the word """
     return re.sub(r'[\.\?\!,:]', '', word)
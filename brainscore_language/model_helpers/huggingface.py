@@ -11,7 +11,7 @@ from torch.utils.hooks import RemovableHandle
 from tqdm import tqdm
 from transformers import AutoModelForCausalLM, AutoTokenizer, BatchEncoding
 from transformers.modeling_outputs import CausalLMOutput
-from typing import Union, List, Tuple, Dict, Callable
+from typing import Union, List, Tuple, Dict, Callable, NamedTuple
 
 from brainscore_core.supported_data_standards.brainio.assemblies import DataAssembly, NeuroidAssembly, BehavioralAssembly
 from brainscore_language.artificial_subject import ArtificialSubject
@@ -20,7 +20,19 @@ from brainscore_language.utils import fullname
 from brainscore_language.model_helpers.localize import localize_fed10
 
 
+class _ContextSnapshot(NamedTuple):
+    """ state of the context built up by :meth:`HuggingfaceSubject.extend_context` """
+    parts: Tuple[str, ...]
+    input_ids: Union[None, torch.Tensor]  # tokens of the context
+    number_of_tokens: int  # number of tokens in the context, including tokens truncated from the model input
+    last_logits: Union[None, torch.Tensor]  # logits at the last position of the context, `(1, 1, vocab_size)`
+
+
+_EMPTY_CONTEXT = _ContextSnapshot(parts=(), input_ids=None, number_of_tokens=0, last_logits=None)
+
+
 class HuggingfaceSubject(ArtificialSubject):
+    supports_group_checkpoints = True  # every call to `digest_text` starts from an empty context
     def __init__(
             self,
             model_id: str,
@@ -59,6 +71,9 @@ class HuggingfaceSubject(ArtificialSubject):
         self.tokenizer = tokenizer if tokenizer is not None else AutoTokenizer.from_pretrained(self.model_id,
                                                                                                truncation_side='left')
         self.current_tokens = None  # keep track of current tokens
+        self._context: _ContextSnapshot = _EMPTY_CONTEXT  # context of `extend_context`
+        self._context_cache = None  # key/value cache of the model for the tokens in `self._context_cache_ids`
+        self._context_cache_ids: Union[None, torch.Tensor] = None
         self._tokenizer_returns_overflow: Union[None, bool] = None
         """ whether the tokenizer can return overflowing tokens. `None` initially before inferring tokenizer type """
 
@@ -94,6 +109,173 @@ class HuggingfaceSubject(ArtificialSubject):
                                recording_type: ArtificialSubject.RecordingType):
         self.neural_recordings.append((recording_target, recording_type))
 
+    def reset(self):
+        self.neural_recordings = []
+        self.behavioral_task = None
+        self.current_tokens = None
+        self.restore_context(None)
+
+    def snapshot_context(self) -> _ContextSnapshot:
+        """
+        :return: the current context of :meth:`extend_context`, to return to later with :meth:`restore_context`
+        """
+        return self._context
+
+    def restore_context(self, snapshot: Union[None, _ContextSnapshot]):
+        """
+        Return to a context previously obtained from :meth:`snapshot_context`, or to the empty context if `None`.
+        The model's key/value cache is cropped to the restored context if it is a prefix of the cached tokens
+        (e.g. when returning to a shared prefix after digesting one of its continuations), and discarded otherwise.
+        """
+        snapshot = snapshot if snapshot is not None else _EMPTY_CONTEXT
+        self._context = snapshot
+        if self._context_cache is None:
+            return
+        num_tokens = snapshot.input_ids.shape[-1] if snapshot.input_ids is not None else 0
+        if 0 < num_tokens <= self._context_cache_ids.shape[-1] and hasattr(self._context_cache, 'crop') \
+                and torch.equal(self._context_cache_ids[..., :num_tokens], snapshot.input_ids):
+            num_removed_tokens = self._context_cache_ids.shape[-1] - num_tokens
+            if num_removed_tokens > 0:
+                self._context_cache.crop(-num_removed_tokens)  # negative: number of tokens to remove from the end
+            self._context_cache_ids = snapshot.input_ids
+        else:
+            self._context_cache, self._context_cache_ids = None, None
+
+    def extend_context(self, text_part: str) -> Dict[str, DataAssembly]:
+        """
+        Digest `text_part` as the next part of the current context (see :meth:`restore_context`),
+        running the model only on the new tokens and re-using the key/value cache for the tokens of the context.
+        The output is the same as the output for the last part of `digest_text(context_parts + [text_part])`.
+
+        Only the behavioral tasks with their default task heads are supported;
+        anything else raises a `NotImplementedError` so that callers can fall back to :meth:`digest_text`.
+        """
+        if not self.behavioral_task or self.neural_recordings or self.basemodel.config.is_encoder_decoder \
+                or self.output_to_behavior not in (self.estimate_reading_times, self.predict_next_word):
+            raise NotImplementedError("extend_context only supports behavioral tasks with the default task heads")
+
+        parts = self._context.parts + (text_part,)
+        context = prepare_context(list(parts))
+        context_tokens, number_of_tokens = self._tokenize(context, self._context.number_of_tokens)
+        input_ids = context_tokens['input_ids']
+        num_cached = self._reusable_cache_length(input_ids)
+        logits = None
+        if input_ids.shape[-1] > num_cached:
+            with torch.no_grad():
+                base_output = self.basemodel(input_ids=input_ids[..., num_cached:],
+                                             attention_mask=context_tokens['attention_mask'],
+                                             past_key_values=self._context_cache if num_cached > 0 else None,
+                                             use_cache=True)
+            self._context_cache, self._context_cache_ids = base_output.past_key_values, input_ids
+            logits = base_output.logits
+        if num_cached > 0:
+            # The task heads only read the logits of the new tokens and of the position preceding them, which the
+            # context's last logits stand in for. Without new tokens, keep two positions for a multi-token context
+            # so that the heads can still tell that there was context.
+            num_context_positions = 1 if logits is not None else min(2, num_cached)
+            logits = torch.cat([self._context.last_logits] * num_context_positions
+                               + ([logits] if logits is not None else []), dim=1)
+        self._context = _ContextSnapshot(parts=parts, input_ids=input_ids, number_of_tokens=number_of_tokens,
+                                         last_logits=logits[:, -1:, :])
+
+        stimuli_coords = {
+            'stimulus': ('presentation', [text_part]),
+            'context': ('presentation', [context]),
+            'part_number': ('presentation', [len(parts) - 1]),
+        }
+        behavioral_output = self.output_to_behavior(base_output=CausalLMOutput(logits=logits))
+        behavior = BehavioralAssembly([behavioral_output], coords=stimuli_coords, dims=['presentation'])
+        return {'behavior': behavior, 'neural': None}
+
+    def digest_text_batch(self, texts: List[Union[str, List[str]]], batch_size: int = 16
+                          ) -> List[Dict[str, DataAssembly]]:
+        """
+        Same as `[self.digest_text(text) for text in texts]`, but running the model once on the full context of each
+        text, and on up to `batch_size` texts at a time in one padded forward pass.
+        The outputs for every part are read off the full context's logits, which is possible because the model is
+        causal and the tokens of each part's context are a prefix of the tokens of the full context.
+        Texts for which this does not hold (e.g. because they are truncated) are digested with :meth:`digest_text`.
+
+        Only the behavioral tasks with their default task heads are supported;
+        anything else raises a `NotImplementedError` so that callers can fall back to :meth:`digest_text`.
+        """
+        if not self.behavioral_task or self.neural_recordings or self.basemodel.config.is_encoder_decoder \
+                or self.output_to_behavior not in (self.estimate_reading_times, self.predict_next_word):
+            raise NotImplementedError("digest_text_batch only supports behavioral tasks with the default task heads")
+
+        outputs: List[Union[None, Dict[str, DataAssembly]]] = [None] * len(texts)
+        batchable = []  # (text index, text parts, per-part encoding, full context input ids)
+        for text_index, text in enumerate(texts):
+            text = [text] if isinstance(text, str) else text
+            encoding = self._encode_prefixes(text)
+            if encoding is None:
+                outputs[text_index] = self.digest_text(text)
+            else:
+                batchable.append((text_index, text, *encoding))
+
+        for batch_start in range(0, len(batchable), batch_size):
+            batch = batchable[batch_start:batch_start + batch_size]
+            max_length = max(input_ids.shape[-1] for *_, input_ids in batch)
+            # pad on the right: with causal attention, no actual token attends to the padding
+            batch_input_ids = torch.zeros((len(batch), max_length), dtype=torch.long)
+            batch_attention_mask = torch.zeros((len(batch), max_length), dtype=torch.long)
+            for row, (*_, input_ids) in enumerate(batch):
+                batch_input_ids[row, :input_ids.shape[-1]] = input_ids.squeeze(0)
+                batch_attention_mask[row, :input_ids.shape[-1]] = 1
+            with torch.no_grad():
+                batch_logits = self.basemodel(input_ids=batch_input_ids.to(self.device),
+                                              attention_mask=batch_attention_mask.to(self.device)).logits
+
+            for row, (text_index, text, part_encodings, _) in enumerate(batch):
+                behavior = []
+                for part_number, (context, current_tokens, num_context_tokens) in enumerate(part_encodings):
+                    self.current_tokens = current_tokens
+                    base_output = CausalLMOutput(logits=batch_logits[row:row + 1, :num_context_tokens])
+                    stimuli_coords = {
+                        'stimulus': ('presentation', [text[part_number]]),
+                        'context': ('presentation', [context]),
+                        'part_number': ('presentation', [part_number]),
+                    }
+                    behavior.append(BehavioralAssembly([self.output_to_behavior(base_output=base_output)],
+                                                       coords=stimuli_coords, dims=['presentation']))
+                outputs[text_index] = {'behavior': xr.concat(behavior, dim='presentation').sortby('part_number'),
+                                       'neural': None}
+        return outputs
+
+    def _encode_prefixes(self, text: List[str]):
+        """
+        Tokenize the context of every part of `text` like :meth:`digest_text` does.
+
+        :return: for every part its context, its `current_tokens` and the number of tokens in its context,
+            as well as the input ids of the full context; or `None` if the context of a part is empty or truncated,
+            or its tokens are not a prefix of the next context's tokens
+        """
+        part_encodings = []
+        input_ids, number_of_tokens = None, 0
+        for part_number in range(len(text)):
+            context = prepare_context(text[:part_number + 1])
+            context_tokens, next_number_of_tokens = self._tokenize(context, number_of_tokens)
+            next_input_ids = context_tokens['input_ids'].cpu()
+            if next_number_of_tokens != next_input_ids.shape[-1] or next_input_ids.shape[-1] == 0:
+                return None  # tokens were truncated, or there is no context to run the model on
+            if input_ids is not None and (next_input_ids.shape[-1] < input_ids.shape[-1] or not torch.equal(
+                    next_input_ids[..., :input_ids.shape[-1]], input_ids)):
+                return None
+            part_encodings.append((context, self.current_tokens, next_input_ids.shape[-1]))
+            input_ids, number_of_tokens = next_input_ids, next_number_of_tokens
+        if input_ids is None:  # no parts
+            return None
+        return part_encodings, input_ids
+
+    def _reusable_cache_length(self, input_ids: torch.Tensor) -> int:
+        """ :return: the number of leading `input_ids` whose keys and values are in the context's cache """
+        if self._context_cache is None:
+            return 0
+        num_cached = self._context_cache_ids.shape[-1]
+        if input_ids.shape[-1] < num_cached or not torch.equal(input_ids[..., :num_cached], self._context_cache_ids):
+            return 0  # e.g. tokens were truncated from the front or merged across the part boundary
+        return num_cached
+
     def digest_text(self, text: Union[str, List[str]]) -> Dict[str, DataAssembly]:
         """
         :param text: the text to be used for inference e.g. "the quick brown fox"
@@ -23,13 +23,35 @@ logger = logging.getLogger(__name__)
 # Code adapted from: https://github.com/bkhmsi/brain-language-suma
 
 class Fed10_langlocDataset(Dataset):
-    def __init__(self):
+    def __init__(self, tokenizer: transformers.PreTrainedTokenizer = None, max_length: int = 12):
+        """
+        :param tokenizer: if given, all stimuli are tokenized once up front, truncated and right-padded to
+            `max_length` tokens, and items are dicts of `input_ids` and `attention_mask` tensors instead of strings
+        """
         data = load_dataset("Fedorenko2010.localization")
-        self.sentences = data[data["stim14"]=="S"]["sent"]
-        self.non_words = data[data["stim14"]=="N"]["sent"]
+        self.sentences = data[data["stim14"]=="S"]["sent"].str.strip().tolist()
+        self.non_words = data[data["stim14"]=="N"]["sent"].str.strip().tolist()
+        self.tokens = None
+        if tokenizer is not None:
+            self.tokens = {"sentences": self._tokenize(tokenizer, self.sentences, max_length),
+                           "non-words": self._tokenize(tokenizer, self.non_words, max_length)}
+
+    @staticmethod
+    def _tokenize(tokenizer: transformers.PreTrainedTokenizer, texts: List[str], max_length: int):
+        # pad manually rather than with the tokenizer since e.g. GPT-2 tokenizers have no padding token.
+        # The padded positions are masked out and never read, so their token id does not matter.
+        encodings = tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+        input_ids = torch.zeros((len(texts), max_length), dtype=torch.long)
+        attention_mask = torch.zeros((len(texts), max_length), dtype=torch.long)
+        for row, ids in enumerate(encodings):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
 
     def __getitem__(self, idx):
-        return self.sentences.iloc[idx].strip(), self.non_words.iloc[idx].strip()
+        if self.tokens is not None:
+            return {kind: {key: tensor[idx] for key, tensor in tokens.items()} for kind, tokens in self.tokens.items()}
+        return self.sentences[idx], self.non_words[idx]
     
     def __len__(self):
         return len(self.sentences)
@@ -80,9 +102,11 @@ def extract_batch(
     with torch.no_grad():
         _ = model(input_ids=input_ids, attention_mask=attention_mask)
 
+    # position of the last attended token in each sample, regardless of which side is padded
+    last_positions = attention_mask.shape[1] - 1 - attention_mask.flip(-1).argmax(-1)
     for sample_idx in range(len(input_ids)):
         for layer_idx, layer_name in enumerate(layer_names):
-            activations = layer_representations[layer_name][sample_idx][-1].cpu()    
+            activations = layer_representations[layer_name][sample_idx][last_positions[sample_idx]].cpu()
             batch_activations[layer_name] += [activations]
 
     for hook in hooks:
@@ -98,7 +122,7 @@ def extract_representations(
     batch_size: int,
     device: torch.device,
 ):
-    langloc_dataset = Fed10_langlocDataset()
+    langloc_dataset = Fed10_langlocDataset(tokenizer=tokenizer)
 
     # Get the activations of the model on the dataset
     langloc_dataloader = DataLoader(langloc_dataset, batch_size=batch_size, num_workers=0)
@@ -115,11 +139,9 @@ def extract_representations(
     
     for batch_idx, batch_data in tqdm(enumerate(langloc_dataloader), total=len(langloc_dataloader)):
 
-        sents, non_words = batch_data
-        sent_tokens = tokenizer(sents, truncation=True, max_length=12, return_tensors='pt').to(device)
-        non_words_tokens = tokenizer(non_words, truncation=True, max_length=12, return_tensors='pt').to(device)
-        assert sent_tokens.input_ids.size(1) == non_words_tokens.input_ids.size(1)
-        
+        sent_tokens = {key: tensor.to(device) for key, tensor in batch_data["sentences"].items()}
+        non_words_tokens = {key: tensor.to(device) for key, tensor in batch_data["non-words"].items()}
+
         batch_real_actv = extract_batch(model, sent_tokens["input_ids"], sent_tokens["attention_mask"], layer_names)
         batch_rand_actv = extract_batch(model, non_words_tokens["input_ids"], non_words_tokens["attention_mask"], layer_names)
 
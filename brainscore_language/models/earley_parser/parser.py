@@ -1,6 +1,9 @@
+import hashlib
 import logging
+import os
+import pickle
 from pathlib import Path
-from typing import Tuple, Union, List, Dict, Optional
+from typing import Union, List, Dict, Optional
 
 import numpy as np
 import xarray as xr
@@ -15,9 +18,13 @@ from brainscore_language.utils import fullname
 
 from brainscore_language.models.earley_parser.utils import (
     ProbabilisticEarleyChartParser,
+    IncrementalEarleyParse,
+    CompiledPCFG,
 )
 
 PARSING_TRACE = 0  # how verbose the tracing output should be while parsing a text
+GRAMMAR_CACHE = Path.home() / ".cache" / "brainscore_language" / "earley_grammars"
+GRAMMAR_CACHE_VERSION = 1  # increment when the induced or compiled grammar changes
 
 
 class EarleyParserSubject(ArtificialSubject):
@@ -26,7 +33,7 @@ class EarleyParserSubject(ArtificialSubject):
         self.model_id = "earley-parser-minivocab"
         self.parser_cls = ProbabilisticEarleyChartParser
 
-        self.grammar: Optional[PCFG] = None
+        self.grammar: Optional[CompiledPCFG] = None
 
         # Load the default grammar. This can be replaced by any custom treebank
         treebank_path = str(Path(__file__).parent / "treebank")
@@ -35,8 +42,6 @@ class EarleyParserSubject(ArtificialSubject):
             fileids="sample_treebank",
         )
 
-        self.prefix_probabilities = []  # Records the partial parse probabilities
-
         self.behavioral_task: Union[None, ArtificialSubject.Task] = None
         self.task_function_mapping_dict = {
             ArtificialSubject.Task.reading_times: self.estimate_reading_times,
@@ -59,6 +64,9 @@ class EarleyParserSubject(ArtificialSubject):
             "Symbolic parsers are probabilistic models that do not support neural tasks."
         )
 
+    def reset(self):
+        self.behavioral_task = None
+
     def digest_text(self, text: Union[str, List[str]]) -> Dict[str, DataAssembly]:
         """
         :param text: the text to be used for inference e.g. "the quick brown fox"
@@ -66,8 +74,6 @@ class EarleyParserSubject(ArtificialSubject):
         """
         assert self.grammar is not None, "A grammar has not been added to this model"
 
-        self.prefix_probabilities = []
-
         if isinstance(text, str):
             text = [text]
 
@@ -82,12 +88,11 @@ class EarleyParserSubject(ArtificialSubject):
             tokens_per_part.append(len(part_tokens))
 
         # Tokenize the context. Replace words that don't exist in the grammar with <unk>
-        for token_i in range(len(all_tokens)):
-            token = all_tokens[token_i]
-            if len(self.grammar.productions(rhs=token)) == 0:
-                all_tokens[token_i] = "<unk>"
+        all_tokens = [
+            token if token in self.grammar.lexicon else "<unk>" for token in all_tokens
+        ]
 
-        chart = self.parser.chart_parse(all_tokens)
+        chart = self._incremental_parse(all_tokens)
         dot_position = 0
         for part_number, text_part in enumerate(text):
             context = " ".join(text[: part_number + 1])
@@ -123,72 +128,46 @@ class EarleyParserSubject(ArtificialSubject):
 
         return output
 
-    def estimate_reading_times(self, chart: Chart, start: int, end: int) -> float:
+    def _incremental_parse(self, tokens: List[str]) -> IncrementalEarleyParse:
+        """
+        Parse the tokens incrementally, continuing from the longest prefix shared with the previously digested text
+        (e.g. across the conditions of a SyntaxGym item) rather than re-parsing it from scratch.
         """
-        :param chart: a complete chart parse of the input sequence
+        if self._parse is None:
+            self._parse = self.parser.incremental_parse()
+        shared_prefix_length = 0
+        for parsed_token, token in zip(self._parse.tokens, tokens):
+            if parsed_token != token:
+                break
+            shared_prefix_length += 1
+        self._parse.restore(shared_prefix_length)
+        for token in tokens[shared_prefix_length:]:
+            self._parse.advance(token)
+        return self._parse
+
+    def estimate_reading_times(self, chart: IncrementalEarleyParse, start: int, end: int) -> float:
+        """
+        :param chart: an incremental parse of the input sequence
         :param start: the index of the first token in the current context (inclusive)
         :param end: the index of the last token in the current context (inclusive)
         :return: surprisal (in bits) as a proxy for reading times, following Smith & Levy 2013
             (https://www.sciencedirect.com/science/article/pii/S0010027713000413)
         """
-        # Parse context and get parses
-        edges = chart.select(end=end)
-
-        # Exclude edges from predict rules
-        edges = [p for p in edges if not p.start() == p.end()][1:]
-
-        if not edges:
+        p = chart.prefix_probability(end)
+        if p == 0:
             # Could not parse the prefix, edge case --> infinite surprisal
             return np.infty
-
-        # Identify the non-terminal parent node, added first by the scanner rule
-        nonterminal_parent = edges[0].lhs()
-        if len(edges) == 1:
-            # Only edge is the scanner edge, so only consider it
-            self._add_prefix_probability([edges[0].prob()], [edges[0].span()])
-        else:
-            # Multiple edges added by completer rule, marginalize over all edges
-            probabilities, spans = [], []
-            for e in edges:
-                if e.dot() > 0 and e.rhs()[e.dot() - 1] == nonterminal_parent:
-                    probabilities.append(e.prob())
-                    spans.append(e.span())
-            self._add_prefix_probability(probabilities, spans)
-
-        p = self.prefix_probabilities[-1]
         return -np.log2(p)
 
-    def predict_next_word(self, chart: Chart, start: int, end: int) -> str:
+    def predict_next_word(
+        self, chart: Union[Chart, IncrementalEarleyParse], start: int, end: int
+    ) -> str:
         """
-        :param chart: a complete chart parse of the input sequence
+        :param chart: a chart (or incremental parse) of the input sequence
         :param start: the index of the first token in the current context (inclusive)
         :param end: the index of the last token in the current context (inclusive)
         :return: predicted next word
         """
-        # Keeps track of non-terminals to avoid infinite recursion
-        visited_nonterminals = set()
-
-        def get_next_terminal(grammar: PCFG, lhs: Union[str, Nonterminal]) -> str:
-            """
-            Given a grammar and a starting left-hand-side (lhs), finds the lexical item
-            that is most likely to appear first. Does this by iteratively going through
-            the most likely production for the first non-terminal in the rhs. Visited
-            non-terminals are pruned to avoid infinite recursion.
-
-            :param grammar: a PCFG grammar containing lhs
-            :param lhs: a terminal string or non-terminal node in the grammar
-            """
-
-            visited_nonterminals.add(lhs)
-            if is_terminal(lhs):
-                return lhs
-
-            most_likely_production = max(
-                grammar.productions(lhs=lhs),
-                key=lambda x: x.prob() if x.rhs()[0] not in visited_nonterminals else 0,
-            )
-            return get_next_terminal(grammar, most_likely_production.rhs()[0])
-
         # Parse context and get chart edges
         edges = chart.select(end=end, is_incomplete=True)
 
@@ -200,11 +179,11 @@ class EarleyParserSubject(ArtificialSubject):
             next_word = "<unk>"
         elif len(edges) == 1:
             # The only one possible parse under this nonterminal/terminal is the observed word
-            next_word = get_next_terminal(self.grammar, edges[0].nextsym())
+            next_word = self.grammar.first_terminal(edges[0].nextsym())
         else:
             # There are multiple possible parses, so pick the one with the highest probability
             next_lhs = max(edges[:-1], key=lambda x: x.prob()).nextsym()
-            next_word = get_next_terminal(self.grammar, next_lhs)
+            next_word = self.grammar.first_terminal(next_lhs)
 
         return next_word
 
@@ -214,6 +193,7 @@ class EarleyParserSubject(ArtificialSubject):
         fileids: Union[List[str], str, None] = None,
         unk_low_frequency: bool = True,
         k=2,
+        use_cache: bool = True,
     ):
         """
         Creates a PCFG grammar given a path to a treebank corpus (e.g. PTB)
@@ -222,6 +202,8 @@ class EarleyParserSubject(ArtificialSubject):
         :param grammar_string: one or more file names to be parsed in the grammar. If None, all files will be parsed
         :param unk_low_frequency: if True, replaces all words that appear less than k times by <unk>
         :param k: the <unk> replacement threshold (min number of occurances for a word to NOT be replaced by <unk>)
+        :param use_cache: if True, the compiled grammar is stored in and loaded from `GRAMMAR_CACHE`, keyed by the
+            contents of the treebank files and the parameters above
         """
 
         # Load PTB annotations
@@ -230,6 +212,16 @@ class EarleyParserSubject(ArtificialSubject):
             r".*",
         )
 
+        cache_file = None
+        if use_cache:
+            cache_key = self._grammar_cache_key(treebank, fileids, unk_low_frequency, k)
+            cache_file = GRAMMAR_CACHE / f"{cache_key}.pkl"
+            if cache_file.is_file():
+                self._logger.debug(f"Loading grammar from {cache_file}")
+                with open(cache_file, "rb") as f:
+                    self._set_compiled_grammar(pickle.load(f))
+                return
+
         # First, get all productions and count the occurances of each lexical in all productions
         productions = []
         lexical_counts = {}
@@ -255,15 +247,35 @@ class EarleyParserSubject(ArtificialSubject):
 
         # Save grammar
         S = Nonterminal("S")
-        self.grammar = nltk.induce_pcfg(S, productions)
-
-        # Save the production probabilities for faster sentence probability estimation
-        self.production_probs = {}
-        for prod in self.grammar.productions():
-            self.production_probs[prod.lhs(), prod.rhs()] = prod.prob()
-
-        # Create parser using the constructed grammar
-        self.parser = self.parser_cls(self.grammar, trace=PARSING_TRACE)
+        grammar = CompiledPCFG.from_grammar(nltk.induce_pcfg(S, productions))
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temporary_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            with open(temporary_file, "wb") as f:
+                pickle.dump(grammar, f)
+            os.replace(temporary_file, cache_file)
+        self._set_compiled_grammar(grammar)
+
+    @staticmethod
+    def _grammar_cache_key(
+        treebank: BracketParseCorpusReader,
+        fileids: Union[List[str], str, None],
+        unk_low_frequency: bool,
+        k: int,
+    ) -> str:
+        key = hashlib.sha1(
+            repr(
+                (GRAMMAR_CACHE_VERSION, nltk.__version__, fileids, unk_low_frequency, k)
+            ).encode()
+        )
+        if fileids is None:
+            fileids = treebank.fileids()
+        elif isinstance(fileids, str):
+            fileids = [fileids]
+        for fileid in fileids:
+            with open(str(treebank.abspath(fileid)), "rb") as f:
+                key.update(f.read())
+        return key.hexdigest()
 
     def set_grammar(self, grammar_string: Union[str, None] = None):
         """
@@ -274,7 +286,7 @@ class EarleyParserSubject(ArtificialSubject):
         """
 
         if grammar_string:
-            self.grammar = PCFG.fromstring(grammar_string)
+            grammar = PCFG.fromstring(grammar_string)
         else:
             # Download NLTK Treebank if doesn't exist
             try:
@@ -291,7 +303,12 @@ class EarleyParserSubject(ArtificialSubject):
                     tree.collapse_unary()
                     tree.chomsky_normal_form()
                     productions += tree.productions()
-            self.grammar = nltk.induce_pcfg(start, productions)
+            grammar = nltk.induce_pcfg(start, productions)
+
+        self._set_compiled_grammar(CompiledPCFG.from_grammar(grammar))
+
+    def _set_compiled_grammar(self, grammar: CompiledPCFG):
+        self.grammar = grammar
 
         # Save the production probabilities for faster sentence probability estimation
         self.production_probs = {}
@@ -300,23 +317,4 @@ class EarleyParserSubject(ArtificialSubject):
 
         # Create parser using the constructed grammar
         self.parser = self.parser_cls(self.grammar, trace=PARSING_TRACE)
-
-    def _add_prefix_probability(
-        self, edge_probabilities: List[float], edge_spans: List[Tuple[int]]
-    ):
-        if not self.prefix_probabilities:
-            # First time adding a partial parse x_0: get P(x_0) by marginalizing over all possible edges
-            self.prefix_probabilities.append(sum(edge_probabilities))
-            return
-
-        # Adding prefix x_i as the sum of edge probabilities weighted by the its prefix's parse probability
-        prefix_probability = 0
-        for i in range(len(edge_probabilities)):
-            probability = edge_probabilities[i]
-            start, end = edge_spans[i]
-
-            prefix_probability += (
-                self.prefix_probabilities[start - 1] if start > 0 else 1
-            ) * probability
-
-        self.prefix_probabilities.append(prefix_probability)
+        self._parse: Optional[IncrementalEarleyParse] = None
@@ -2,11 +2,13 @@ from pathlib import Path
 import numpy as np
 import pytest
 
-from nltk.grammar import PCFG, ProbabilisticProduction
+from nltk.grammar import PCFG, ProbabilisticProduction, Nonterminal
 
 from brainscore_language import load_model
 from brainscore_language.artificial_subject import ArtificialSubject
 from brainscore_language.models.earley_parser.parser import EarleyParserSubject
+from brainscore_language.models.earley_parser import parser as parser_module
+from brainscore_language.models.earley_parser.utils import ProbabilisticEarleyChartParser, CompiledPCFG
 
 
 class grammars:
@@ -265,3 +267,82 @@ def test_next_word_2(model_identifier, grammar_string, expected_next_words):
     model.start_behavioral_task(task=ArtificialSubject.Task.next_word)
     next_words = model.digest_text(text)["behavior"]
     np.testing.assert_array_equal(next_words, expected_next_words)
+
+
+class TestIncrementalParse:
+    @staticmethod
+    def _spanning_edges(edges):
+        return [(str(edge), edge.prob()) for edge in edges if edge.start() != edge.end()]
+
+    def test_matches_chart_parse(self):
+        parser = ProbabilisticEarleyChartParser(PCFG.fromstring(grammars.GRAMMAR_1))
+        tokens = ["I", "saw", "John", "with", "my", "telescope"]
+        chart = parser.chart_parse(tokens)
+        parse = parser.incremental_parse()
+        for token in tokens:
+            parse.advance(token)
+        for end in range(len(tokens) + 1):
+            assert self._spanning_edges(parse.select(end)) == self._spanning_edges(chart.select(end=end))
+
+    def test_prefix_probabilities(self):
+        parse = ProbabilisticEarleyChartParser(PCFG.fromstring(grammars.GRAMMAR_1)).incremental_parse()
+        surprisals = [-np.log2(parse.advance(token).prefix_probability())
+                      for token in ["I", "saw", "John", "with", "my", "telescope"]]
+        np.testing.assert_allclose(surprisals, [2.4150, 3.1885, 6.4709, 7.1840, 10.5060, 11.5060], atol=0.0001)
+
+    def test_snapshot_restore(self):
+        parser = ProbabilisticEarleyChartParser(PCFG.fromstring(grammars.GRAMMAR_2))
+        parse = parser.incremental_parse()
+        for token in ["Jack", "saw"]:
+            parse.advance(token)
+        snapshot = parse.snapshot()
+        for token in ["Bob", "with", "my", "telescope"]:
+            parse.advance(token)
+        parse.restore(snapshot)
+        assert parse.tokens == ["Jack", "saw"]
+        for token in ["the", "boy"]:
+            parse.advance(token)
+        chart = parser.chart_parse(["Jack", "saw", "the", "boy"])
+        for end in range(5):
+            assert self._spanning_edges(parse.select(end)) == self._spanning_edges(chart.select(end=end))
+
+    def test_subject_multi_token_parts(self):
+        """ the surprisal of a part is that of the prefix up to its last token, not of the part index """
+        model = EarleyParserSubject()
+        model.set_grammar(grammars.GRAMMAR_1)
+        model.start_behavioral_task(task=ArtificialSubject.Task.reading_times)
+        reading_times = model.digest_text(["I saw", "John with", "my telescope"])["behavior"]
+        np.testing.assert_allclose(reading_times, [3.1885, 7.1840, 11.5060], atol=0.0001)
+
+    def test_subject_reuses_shared_prefix(self):
+        model = EarleyParserSubject()
+        model.set_grammar(grammars.GRAMMAR_2)
+        model.start_behavioral_task(task=ArtificialSubject.Task.reading_times)
+        model.digest_text(["Jack", "saw", "Bob", "with", "my", "telescope"])
+        reading_times = model.digest_text(["Jack", "saw", "Bob"])["behavior"]
+        np.testing.assert_allclose(reading_times, [2.7799, 5.0460, 7.9414], atol=0.0001)
+
+
+class TestCompiledGrammar:
+    def test_tables(self):
+        grammar = CompiledPCFG.from_grammar(PCFG.fromstring(grammars.GRAMMAR_1))
+        assert grammar.lexicon == {"John", "I", "the", "my", "man", "telescope", "ate", "saw", "with", "under"}
+        np_productions = grammar.productions_by_lhs[grammar.symbol_ids[Nonterminal("NP")]]
+        np.testing.assert_array_equal(grammar.probabilities[np_productions], [0.5, 0.25, 0.15, 0.1])
+        assert grammar.first_terminal(Nonterminal("VP")) == "saw"
+        assert grammar.first_terminal(Nonterminal("NP")) == "the"
+        assert grammar.first_terminal("with") == "with"
+        assert [str(production) for production in grammar.predictions(Nonterminal("NP"), "John")] == \
+               ["NP -> Det N [0.5]", "NP -> NP PP [0.25]", "NP -> 'John' [0.1]"]
+
+    def test_cached(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(parser_module, "GRAMMAR_CACHE", tmp_path)
+        treebank_path = str(Path(__file__).parent / "treebank")
+        model = EarleyParserSubject()  # induces the default grammar
+        assert len(list(tmp_path.glob("*.pkl"))) == 1
+        model.create_grammar(treebank_path=treebank_path, fileids="sample_treebank", k=3)
+        assert len(list(tmp_path.glob("*.pkl"))) == 2
+        induced_productions = set(model.grammar.productions())
+        model.create_grammar(treebank_path=treebank_path, fileids="sample_treebank", k=3)
+        assert len(list(tmp_path.glob("*.pkl"))) == 2
+        assert set(model.grammar.productions()) == induced_productions
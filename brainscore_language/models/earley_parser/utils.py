@@ -14,7 +14,12 @@ from nltk.parse.pchart import (
     ProbabilisticFundamentalRule,
 )
 
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from nltk.grammar import Nonterminal, ProbabilisticProduction
 from nltk.parse.chart import Chart
+from nltk.parse.earleychart import IncrementalChart
 from nltk.parse import IncrementalChartParser
 from nltk import PCFG
 
@@ -125,7 +130,14 @@ class ProbabilisticTopDownPredictRule(AbstractChartRule):
             return
 
         # Add all the edges indicated by the top down expand rule.
-        for prod in grammar.productions(lhs=nextsym):
+        productions = (
+            grammar.predictions(
+                nextsym, chart.leaf(index) if index < chart.num_leaves() else None
+            )
+            if isinstance(grammar, CompiledPCFG)
+            else grammar.productions(lhs=nextsym)
+        )
+        for prod in productions:
             # If the left corner in the predicted production is
             # leaf, it must match with the input.
             if prod.rhs():
@@ -141,6 +153,122 @@ class ProbabilisticTopDownPredictRule(AbstractChartRule):
         # Record the fact that we've applied this rule.
         self._done[nextsym, index] = (chart, grammar)
 
+    def forget(self, from_index: int):
+        """Flush the cache for all positions starting at `from_index`, e.g. after they were rolled back"""
+        for key in [key for key in self._done if key[1] >= from_index]:
+            del self._done[key]
+
+
+class CompiledPCFG(PCFG):
+    """
+    A PCFG with integer-indexed lookup tables for parsing: symbol ids, the productions of every left-hand side sorted
+    by probability, the set of terminals that productions start with, the productions the predictor can add for a
+    given next token, and the most likely first terminal of every non-terminal.
+    """
+
+    UNKNOWN_TERMINAL = "<unk>"
+
+    def __init__(self, start, productions, calculate_leftcorners=True):
+        super(CompiledPCFG, self).__init__(start, productions, calculate_leftcorners)
+        productions = self.productions()
+        self.symbols: List = list(
+            dict.fromkeys(
+                [production.lhs() for production in productions]
+                + [symbol for production in productions for symbol in production.rhs()]
+            )
+        )
+        self.symbol_ids: Dict = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.lhs_ids = np.array(
+            [self.symbol_ids[production.lhs()] for production in productions], dtype=np.int64
+        )
+        self.probabilities = np.array([production.prob() for production in productions])
+        # production indices per left-hand side, most likely first (ties in grammar order)
+        self.productions_by_lhs: Dict[int, np.ndarray] = {}
+        for lhs_id in np.unique(self.lhs_ids):
+            indices = np.flatnonzero(self.lhs_ids == lhs_id)
+            self.productions_by_lhs[int(lhs_id)] = indices[
+                np.argsort(-self.probabilities[indices], kind="stable")
+            ]
+        # terminals that start the right-hand side of a production, i.e. words the grammar can scan
+        self.lexicon = frozenset(
+            production.rhs()[0]
+            for production in productions
+            if production.rhs() and is_terminal(production.rhs()[0])
+        )
+
+        # productions per left-hand side split by whether their first symbol is a terminal
+        self._nonterminal_first: Dict[Nonterminal, List[int]] = {}
+        self._terminal_first: Dict[Tuple[Nonterminal, str], List[int]] = {}
+        for i, production in enumerate(productions):
+            rhs = production.rhs()
+            if rhs and is_terminal(rhs[0]):
+                self._terminal_first.setdefault((production.lhs(), rhs[0]), []).append(i)
+            else:
+                self._nonterminal_first.setdefault(production.lhs(), []).append(i)
+        self._predictions: Dict[Tuple[Nonterminal, Optional[str]], Tuple] = {}
+
+        self._first_terminals: Dict[Nonterminal, str] = {
+            lhs: self._most_likely_first_terminal(lhs) for lhs in self._lhs_index
+        }
+
+    @classmethod
+    def from_grammar(cls, grammar: PCFG) -> "CompiledPCFG":
+        return cls(grammar.start(), grammar.productions())
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_predictions"] = {}  # memoized lookups are cheap to rebuild
+        return state
+
+    def predictions(
+        self, lhs: Nonterminal, next_token: Optional[str]
+    ) -> Tuple[ProbabilisticProduction]:
+        """
+        Productions of `lhs` that the predictor can add before `next_token` (None at the end of the input),
+        i.e. excluding productions that start with a different terminal. Productions are in grammar order.
+        """
+        key = (lhs, next_token)
+        if key not in self._predictions:
+            indices = sorted(
+                self._nonterminal_first.get(lhs, [])
+                + self._terminal_first.get(key, [])
+            )
+            productions = self.productions()
+            self._predictions[key] = tuple(productions[i] for i in indices)
+        return self._predictions[key]
+
+    def first_terminal(self, symbol) -> str:
+        """
+        The terminal that is most likely to appear first when expanding `symbol`,
+        or `symbol` itself if it is a terminal
+        """
+        if is_terminal(symbol):
+            return symbol
+        return self._first_terminals.get(symbol, self.UNKNOWN_TERMINAL)
+
+    def _most_likely_first_terminal(self, lhs: Nonterminal) -> str:
+        """
+        Follows the most likely production for the first symbol of the right-hand side until reaching a terminal.
+        Visited non-terminals are pruned to avoid infinite recursion.
+        """
+        visited = set()
+        symbol = lhs
+        while not is_terminal(symbol):
+            visited.add(symbol)
+            lhs_productions = self.productions_by_lhs.get(self.symbol_ids.get(symbol))
+            if lhs_productions is None:  # a non-terminal without productions
+                return self.UNKNOWN_TERMINAL
+            productions = self.productions()
+            unvisited = [
+                i
+                for i in lhs_productions
+                if productions[i].rhs() and productions[i].rhs()[0] not in visited
+            ]
+            if not unvisited:  # every expansion leads back to a visited non-terminal
+                return self.UNKNOWN_TERMINAL
+            symbol = productions[unvisited[0]].rhs()[0]
+        return symbol
+
 
 PROBABILISTIC_EARLEY_STRATEGY = [
     ProbabilisticLeafInitRule(),
@@ -160,3 +288,163 @@ class ProbabilisticEarleyChartParser(IncrementalChartParser):
     def parse(self, tokens):
         chart = self.chart_parse(tokens)
         return iter(chart.parses(self._grammar.start(), tree_class=ProbabilisticTree))
+
+    def incremental_parse(self) -> "IncrementalEarleyParse":
+        return IncrementalEarleyParse(self._grammar)
+
+
+class ExtensibleIncrementalChart(IncrementalChart):
+    """
+    An `IncrementalChart` (edges indexed by their end position) whose leaves are appended one at a time,
+    and whose positions can be rolled back.
+    """
+
+    def __init__(self):
+        super(ExtensibleIncrementalChart, self).__init__([])
+        self._tokens = []
+
+    def initialize(self):
+        self._edgelists = [[] for _ in self._positions()]
+        self._edge_to_cpls = {}
+        self._indexes = {}
+
+    def _add_index(self, restr_keys):
+        super(ExtensibleIncrementalChart, self)._add_index(restr_keys)
+        self._indexes[restr_keys] = list(self._indexes[restr_keys])
+
+    def append_leaf(self, token: str):
+        self._tokens.append(token)
+        self._num_leaves += 1
+        self._edgelists.append([])
+        for index in self._indexes.values():
+            index.append({})
+
+    def truncate(self, num_leaves: int):
+        """Remove all leaves after the first `num_leaves`, and all edges ending after them"""
+        for edgelist in self._edgelists[num_leaves + 1 :]:
+            for edge in edgelist:
+                del self._edge_to_cpls[edge]
+        del self._edgelists[num_leaves + 1 :]
+        for index in self._indexes.values():
+            del index[num_leaves + 1 :]
+        del self._tokens[num_leaves:]
+        self._num_leaves = num_leaves
+
+    def truncate_position(self, end: int, num_edges: int):
+        """Keep only the first `num_edges` edges that end at position `end`"""
+        edgelist = self._edgelists[end]
+        for edge in edgelist[num_edges:]:
+            del self._edge_to_cpls[edge]
+        del edgelist[num_edges:]
+        for restr_keys, index in self._indexes.items():
+            index[end] = {}
+            for edge in edgelist:
+                vals = tuple(getattr(edge, key)() for key in restr_keys)
+                index[end].setdefault(vals, []).append(edge)
+
+
+class IncrementalEarleyParse:
+    """
+    Probabilistic Earley parse that is advanced one token at a time, yielding the same chart as
+    `ProbabilisticEarleyChartParser.chart_parse` over the tokens seen so far.
+
+    Positions before the last token are final once the following token is known (the predictor filters productions
+    whose first symbol is a terminal by the next token). Edges at the last position are completed on demand without
+    predictions: predicted edges do not span any tokens and thus do not change the edges that do.
+    The parse state at a token prefix can be stored with `snapshot` and returned to with `restore`,
+    e.g. to share a parsed prefix across multiple continuations.
+    """
+
+    def __init__(self, grammar: PCFG):
+        self._grammar = grammar
+        self._chart = ExtensibleIncrementalChart()
+        self._predict_rule = ProbabilisticTopDownPredictRule()
+        self._inference_rules = [
+            ProbabilisticCompleterRule(),
+            ProbabilisticScannerRule(),
+            self._predict_rule,
+        ]
+        list(ProbabilisticTopDownInitRule().apply(self._chart, grammar))
+        # number of edges at each position before processing, i.e. edges from the init or leaf rules
+        self._initial_edges = [len(self._chart._edgelists[0])]
+        self._frontier_completed = False
+        self._prefix_probabilities = []
+
+    @property
+    def tokens(self) -> List[str]:
+        return list(self._chart.leaves())
+
+    def advance(self, token: str) -> "IncrementalEarleyParse":
+        """Extend the parse by one token"""
+        self._grammar.check_coverage([token])
+        end = self._chart.num_leaves()
+        if self._frontier_completed:  # undo the partial processing of the previous last position
+            self._chart.truncate_position(end, self._initial_edges[end])
+            self._frontier_completed = False
+        self._chart.append_leaf(token)
+        self._chart.insert(ProbabilisticLeafEdge(token, end), ())
+        self._initial_edges.append(len(self._chart._edgelists[end + 1]))
+        # now that the next token is known, the position before it can be processed for good
+        self._process(end, predict=True)
+        return self
+
+    def select(self, end: int, **restrictions):
+        """Edges ending at position `end`, see `Chart.select`"""
+        if end == self._chart.num_leaves() and not self._frontier_completed:
+            self._process(end, predict=False)
+            self._frontier_completed = True
+        return self._chart.select(end=end, **restrictions)
+
+    def snapshot(self) -> int:
+        return self._chart.num_leaves()
+
+    def restore(self, snapshot: int):
+        """Return to the parse state at the time of `snapshot`, forgetting all tokens after it"""
+        self._chart.truncate(snapshot)
+        self._chart.truncate_position(snapshot, self._initial_edges[snapshot])
+        del self._initial_edges[snapshot + 1 :]
+        del self._prefix_probabilities[snapshot:]
+        self._predict_rule.forget(snapshot)
+        self._frontier_completed = False
+
+    def prefix_probability(self, end: Optional[int] = None) -> float:
+        """
+        Probability of the tokens before position `end` (all tokens so far by default) being the beginning of a
+        sentence in the grammar
+        """
+        end = self._chart.num_leaves() if end is None else end
+        for position in range(len(self._prefix_probabilities) + 1, end + 1):
+            self._prefix_probabilities.append(self._compute_prefix_probability(position))
+        return self._prefix_probabilities[end - 1] if end > 0 else 1
+
+    def _compute_prefix_probability(self, end: int) -> float:
+        # Exclude edges from predict rules, and the leaf edge
+        edges = [e for e in self.select(end) if not e.start() == e.end()][1:]
+        if not edges:
+            return 0
+        # Marginalize over the edges that attach the scanned word's non-terminal, weighted by the probability
+        # of the prefix before the edge
+        nonterminal_parent = edges[0].lhs()
+        if len(edges) > 1:
+            edges = [
+                e
+                for e in edges
+                if e.dot() > 0 and e.rhs()[e.dot() - 1] == nonterminal_parent
+            ]
+        return sum(
+            (self._prefix_probabilities[e.start() - 1] if e.start() > 0 else 1)
+            * e.prob()
+            for e in edges
+        )
+
+    def _process(self, end: int, predict: bool):
+        """Apply the inference rules to all edges at position `end`, in the same order as `chart_parse`"""
+        rules = self._inference_rules if predict else self._inference_rules[:-1]
+        agenda = list(self._chart.select(end=end))
+        while agenda:
+            edge = agenda.pop()
+            for rule in rules:
+                new_edges = list(rule.apply(self._chart, self._grammar, edge))
+                for new_edge in new_edges:
+                    if new_edge.end() == end:
+                        agenda.append(new_edge)
@@ -35,4 +35,4 @@ def glove(name: str, dimensions: int) -> ArtificialSubject:
     """
     weights_file = _prepare_weights(name)
     return GensimKeyedVectorsSubject(identifier='glove', weights_file=weights_file, weights_file_no_header=True,
-                                     vector_size=dimensions)
+                                     native_cache_file=weights_file.with_suffix('.kv'), vector_size=dimensions)
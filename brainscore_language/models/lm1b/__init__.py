@@ -21,7 +21,7 @@ from brainscore_core.supported_data_standards.brainio.assemblies import DataAsse
 from brainscore_language import model_registry, ArtificialSubject
 from brainscore_language.utils import fullname
 
-from .data_utils import CharsVocabulary
+from .vocabulary import CompiledCharsVocabulary
 
 MAX_WORD_LEN = 50
 RESOURCES = [
@@ -56,9 +56,7 @@ class LM1B(ArtificialSubject):
         self.region_layer_mapping: dict = region_layer_mapping
 
         self.sess, self.encoder_t, self.vocab = self._load_encoder()
-        self.ctx_word_ids: Union[
-            None, np.ndarray
-        ] = None  # keeps track of tokens in context
+        self._step_functions = {}  # compiled session callables, keyed by fetched tensor names
         self.neural_recordings: List[
             Tuple
         ] = []  # list of `(recording_target, recording_type)` tuples to record
@@ -83,6 +81,10 @@ class LM1B(ArtificialSubject):
     ):
         self.neural_recordings.append((recording_target, recording_type))
 
+    def reset(self):
+        self.neural_recordings = []
+        self.behavioral_task = None
+
     def digest_text(self, text: Union[str, List[str]]) -> Dict[str, DataAssembly]:
         """
         :param text: the text to be used for inference e.g. "the quick brown fox"
@@ -97,57 +99,39 @@ class LM1B(ArtificialSubject):
         sentence_start_token = "<S> "
         text[0] = sentence_start_token + text[0]
 
-        # Override targets and weights state
-        targets = np.zeros((1, 1), np.int32)
-        weights = np.ones((1, 1), np.float32)
-
-        inputs = np.zeros((1, 1), np.int32)
-        char_ids_inputs = np.zeros([1, 1, self.vocab.max_word_length], np.int32)
+        # split textual input into word and character ids, looking up all words at once
+        part_words = [part.split() for part in text]
+        all_word_ids, all_char_ids = self.vocab.encode_words(
+            [word for words in part_words for word in words]
+        )
+        part_boundaries = np.cumsum([len(words) for words in part_words])[:-1]
+        text_parts = list(
+            zip(
+                np.split(all_word_ids, part_boundaries),
+                np.split(all_char_ids, part_boundaries),
+            )
+        )
 
-        # split textual input into word and character ids
-        text_parts = []
-        for part in text:
-            word_ids, char_ids = [], []
-            for w in part.split():
-                word_ids.append(self.vocab.word_to_id(w))
-                char_ids.append(self.vocab.word_to_char_ids(w))
-            text_parts.append((word_ids, char_ids))
+        # Only keep the probability that the model assigned to each observed word given its preceding context
+        # (NaN for the first word which has no preceding context), rather than the full softmax for every word.
+        observed_probabilities = np.full(len(all_word_ids), np.nan, dtype=np.float32)
+        last_softmax = None
+        position = 0
 
         # Run model for each context and record behavioral and neural data after each ctx
         output = {"behavior": [], "neural": []}
         text_iterator = (
             tqdm(text_parts, desc="digest text") if len(text_parts) > 1 else text_parts
         )  # show progress bar if multiple parts
-        logits = []
         for part_number, text_part in enumerate(text_iterator):
             word_ids, char_ids = text_part
             context = " ".join(text[: part_number + 1])[len(sentence_start_token) :]
-            self.ctx_word_ids = np.asarray(word_ids)
-            for i in range(len(word_ids)):
-                inputs[0, 0] = word_ids[i]
-                char_ids_inputs[0, 0, :] = char_ids[i]
-
-                fetches = (
-                    self.encoder_t["softmax_out"],
-                    *(
-                        self.encoder_t[
-                            "lstm/%s/control_dependency"
-                            % self.region_layer_mapping[recording_target]
-                        ]
-                        for recording_target, _ in self.neural_recordings
-                    ),
-                )
-                sess_out = self.sess.run(
-                    fetches,
-                    feed_dict={
-                        self.encoder_t["char_inputs_in"]: char_ids_inputs,
-                        self.encoder_t["inputs_in"]: inputs,
-                        self.encoder_t["targets_in"]: targets,
-                        self.encoder_t["target_weights_in"]: weights,
-                    },
-                )
-                softmax, layer_representations = sess_out[0], sess_out[1:]
-                logits.append(softmax)
+            part_start = position
+            for softmax, layer_representations in self._run_sequence(word_ids, char_ids):
+                position += 1
+                if position < len(all_word_ids):
+                    observed_probabilities[position] = softmax[0, all_word_ids[position]]
+                last_softmax = softmax[0]
 
             # format output
             stimuli_coords = {
@@ -157,11 +141,10 @@ class LM1B(ArtificialSubject):
             }
 
             if self.behavioral_task:
-                # logits (seq_len, batch_size, vocab_size) --> (seq_len, vocab_size) because bz is 1
-                logits_squeezed = np.asarray(logits)[:, 0, :]
-
                 # format behavioral output into assembly
-                behavioral_output = self.output_to_behavior(logits_squeezed)
+                behavioral_output = self.output_to_behavior(
+                    observed_probabilities[part_start:position], last_softmax
+                )
                 behavior = BehavioralAssembly(
                     [behavioral_output], coords=stimuli_coords, dims=["presentation"]
                 )
@@ -187,39 +170,83 @@ class LM1B(ArtificialSubject):
         )
         return output
 
-    def estimate_reading_times(self, logits: np.ndarray) -> float:
+    def _run_sequence(self, word_ids: np.ndarray, char_ids: np.ndarray):
+        """
+        Run the model over a sequence of words, carrying over the LSTM state between words.
+
+        This is still one session call per word: the exported graph (graph-2016-09-10.pbtxt) feeds `(1, 1)` inputs
+        and keeps the LSTM state in batch-size-1 variables that every step updates in place, so neither several time
+        steps nor several passages can be fed at once without re-exporting the graph. The callable, compiled once per
+        set of fetched layers, only removes the per-call overhead of `sess.run`.
+
+        :param word_ids: word ids `(seq_len,)`
+        :param char_ids: character ids `(seq_len, max_word_length)`
+        :return: iterator over the softmax `(1, vocab_size)` and the recorded layers' representations `(1, num_units)`
+            after every word
+        """
+        step = self._step_function()
+        targets = np.zeros((1, 1), np.int32)
+        weights = np.ones((1, 1), np.float32)
+        for i in range(len(word_ids)):
+            softmax, *layer_representations = step(
+                char_ids[i].reshape(1, 1, -1), word_ids[i].reshape(1, 1), targets, weights
+            )
+            yield softmax, layer_representations
+
+    def _step_function(self):
         """
-        :param logits: the neural network's softmax output (seq_len, vocab_size)
+        Callable for a single model step that fetches the softmax and the layers of all neural recordings.
+        Unlike `sess.run`, the callable does not re-validate fetches and feeds on every call.
+        """
+        fetch_names = ("softmax_out",) + tuple(
+            "lstm/%s/control_dependency" % self.region_layer_mapping[recording_target]
+            for recording_target, _ in self.neural_recordings
+        )
+        if fetch_names not in self._step_functions:
+            self._step_functions[fetch_names] = self.sess.make_callable(
+                [self.encoder_t[name] for name in fetch_names],
+                feed_list=[
+                    self.encoder_t["char_inputs_in"],
+                    self.encoder_t["inputs_in"],
+                    self.encoder_t["targets_in"],
+                    self.encoder_t["target_weights_in"],
+                ],
+            )
+        return self._step_functions[fetch_names]
+
+    def estimate_reading_times(
+        self, observed_probabilities: np.ndarray, last_softmax: np.ndarray
+    ) -> float:
+        """
+        :param observed_probabilities: the probabilities of the part's words given their preceding context (seq_len,),
+            NaN for words without preceding context
+        :param last_softmax: the neural network's softmax output after the part's last word (vocab_size,)
         :return: surprisal (in bits) as a proxy for reading times, following Smith & Levy 2013
             (https://www.sciencedirect.com/science/article/pii/S0010027713000413)
         """
 
-        # get expectation (logits), shifted left by 1
-        predicted_logits = logits[-self.ctx_word_ids.shape[0] - 1 : -1]
-        actual_tokens = self._vector_to_one_hot(self.ctx_word_ids, logits.shape[1])
-        if (
-            actual_tokens.shape[0] == predicted_logits.shape[0] + 1
-        ):  # multiple tokens for first model input
-            actual_tokens = actual_tokens[
-                1:
-            ]  # we have no prior context to predict the 0th token
+        # we have no prior context to predict the very first token
+        observed_probabilities = observed_probabilities[~np.isnan(observed_probabilities)]
 
         # assume that reading time is additive, i.e. reading time of multiple tokens is
         # the sum of the surprisals of each individual token.
-        surprisal = -np.sum(actual_tokens * np.log2(predicted_logits))
+        surprisal = -np.sum(np.log2(observed_probabilities).astype(np.float64))
         return surprisal.item()
 
-    def predict_next_word(self, logits: np.ndarray) -> str:
+    def predict_next_word(
+        self, observed_probabilities: np.ndarray, last_softmax: np.ndarray
+    ) -> str:
         """
-        :param logits: the neural network's softmax output (seq_len, vocab_size)
+        :param observed_probabilities: the probabilities of the part's words given their preceding context (seq_len,)
+        :param last_softmax: the neural network's softmax output after the part's last word (vocab_size,)
         :return: predicted next word
         """
 
-        logits[:, 2] = 0  # mask <UNK> token for next word predictions
-        pred_id = np.argmax(logits, axis=1)
+        last_softmax = last_softmax.copy()
+        last_softmax[2] = 0  # mask <UNK> token for next word predictions
 
         # Note that this is currently only predicting the next *token* which might not always be entire words.
-        last_model_token_inference = pred_id[-1]
+        last_model_token_inference = np.argmax(last_softmax)
         next_word = self.vocab.id_to_word(last_model_token_inference)
 
         # `next_word` often includes a space ` ` in front of the actual word. Since the task already tells us to output
@@ -326,7 +353,9 @@ class LM1B(ArtificialSubject):
         ckpt_file = str(resources_dir / "ckpt-*")
         vocab_file = str(resources_dir / "vocab-2016-09-10.txt")
 
-        vocab = CharsVocabulary(vocab_file, MAX_WORD_LEN)
+        vocab = CompiledCharsVocabulary(
+            vocab_file, MAX_WORD_LEN, cache_directory=resources_dir / "compiled_vocab"
+        )
 
         # Start TF session from imported the graph and checkpoints
         with tf.Graph().as_default():
@@ -389,16 +418,6 @@ class LM1B(ArtificialSubject):
             file_path = target_directory / file_name
             urllib.request.urlretrieve(resource, file_path)
 
-    def _vector_to_one_hot(self, v: np.ndarray, vocab_size: int) -> np.ndarray:
-        """
-        Given a vector of indices and a vocab size, returns a one-hot representation of the indices
-        as vocab_size-long vectors
-        """
-
-        one_hot = np.zeros((len(v), vocab_size))
-        one_hot[np.arange(len(v)), v] = 1
-        return one_hot
-
 
 model_registry["lm1b"] = lambda: LM1B(
     model_id="lm1b",
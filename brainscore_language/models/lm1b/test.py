@@ -3,6 +3,9 @@ import pytest
 
 from brainscore_language import load_model
 from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.models.lm1b import LM1B
+from brainscore_language.models.lm1b.data_utils import CharsVocabulary
+from brainscore_language.models.lm1b.vocabulary import CompiledCharsVocabulary
 
 
 @pytest.mark.memory_intense
@@ -65,3 +68,24 @@ def test_neural(model_identifier, feature_size):
     assert len(representations["presentation"]) == len(text)
     np.testing.assert_array_equal(representations["stimulus"], text)
     assert len(representations["neuroid"]) == feature_size
+
+
+def test_reading_times_from_observed_probabilities():
+    model = LM1B.__new__(LM1B)  # surprisal only depends on the observed probabilities, no need to load weights
+    observed_probabilities = np.array([np.nan, 0.5, 0.25], dtype=np.float32)
+    reading_time = model.estimate_reading_times(observed_probabilities, last_softmax=np.ones(10) / 10)
+    assert reading_time == pytest.approx(3)
+
+
+def test_compiled_vocabulary_matches_chars_vocabulary(tmp_path):
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("<S>\n</S>\n<UNK>\nthe\nquick\nbrown\nfox\n!!!MAXTERMID\n", encoding="utf-8")
+    reference = CharsVocabulary(str(vocab_file), 12)
+    words = ["the", "fox", "zebra", "<UNK>", "the", "averyveryverylongword"]
+    for _ in range(2):  # compile, then load the compiled tables
+        vocab = CompiledCharsVocabulary(vocab_file, 12, cache_directory=tmp_path / "compiled")
+        word_ids, char_ids = vocab.encode_words(words)
+        np.testing.assert_array_equal(word_ids, [reference.word_to_id(word) for word in words])
+        np.testing.assert_array_equal(char_ids, [reference.word_to_char_ids(word) for word in words])
+        assert [vocab.id_to_word(i) for i in range(vocab.size)] == [reference.id_to_word(i) for i in range(reference.size)]
+    assert len(list((tmp_path / "compiled").iterdir())) == 1
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from .data_utils import CharsVocabulary
+
+_logger = logging.getLogger(__name__)
+
+
+def _word_hash(word: str) -> int:
+    """Process-independent 64-bit hash of a word (unlike python's salted `hash`)"""
+    return int.from_bytes(
+        hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class CompiledCharsVocabulary:
+    """
+    Read-only equivalent of `CharsVocabulary` whose tables are compiled once into `cache_directory` and
+    memory-mapped afterwards: the vocabulary as concatenated UTF-8 bytes with offsets, the char ids of every word,
+    and an index of sorted word hashes. This avoids re-building the char ids and the word dictionary for the whole
+    vocabulary on every construction, and allows looking up many words with one call to `encode_words`.
+    """
+
+    def __init__(
+        self,
+        filename: Union[str, Path],
+        max_word_length: int,
+        cache_directory: Union[str, Path],
+    ):
+        with open(filename, "rb") as f:
+            vocab_hash = hashlib.sha1(f.read()).hexdigest()
+        tables_directory = Path(cache_directory) / f"{vocab_hash}-{max_word_length}"
+        if not (tables_directory / "metadata.json").is_file():
+            self._compile(filename, max_word_length, tables_directory)
+
+        with open(tables_directory / "metadata.json") as f:
+            metadata = json.load(f)
+        self._bos, self._eos, self._unk = metadata["bos"], metadata["eos"], metadata["unk"]
+        self._max_word_length = metadata["max_word_length"]
+        self.bos_char, self.eos_char, self.bow_char, self.eow_char, self.pad_char = (
+            metadata[key] for key in ("bos_char", "eos_char", "bow_char", "eow_char", "pad_char")
+        )
+
+        def load(name):
+            return np.load(tables_directory / f"{name}.npy", mmap_mode="r")
+
+        self._word_bytes = load("word_bytes")
+        self._word_offsets = load("word_offsets")
+        self._word_char_ids = load("word_char_ids")
+        self._sorted_hashes = load("sorted_hashes")
+        self._sorted_hash_ids = load("sorted_hash_ids")
+
+        self.bos_chars = self._convert_word_to_char_ids(self.bos_char)
+        self.eos_chars = self._convert_word_to_char_ids(self.eos_char)
+
+    @staticmethod
+    def _compile(filename, max_word_length: int, tables_directory: Path):
+        _logger.info(f"Compiling vocabulary {filename} into {tables_directory}")
+        vocab = CharsVocabulary(str(filename), max_word_length)
+        word_bytes = [word.encode("utf-8") for word in vocab._id_to_word]
+        word_offsets = np.zeros(len(word_bytes) + 1, dtype=np.int64)
+        word_offsets[1:] = np.cumsum([len(word) for word in word_bytes])
+        # index the dictionary rather than the word list so that duplicate words resolve to the same id as before
+        hashes = np.array([_word_hash(word) for word in vocab._word_to_id], dtype=np.uint64)
+        ids = np.array(list(vocab._word_to_id.values()), dtype=np.int64)
+        order = np.argsort(hashes, kind="stable")
+
+        tables_directory.parent.mkdir(parents=True, exist_ok=True)
+        # write into a temporary directory first so that concurrent processes never see partial tables
+        temporary_directory = Path(tempfile.mkdtemp(dir=tables_directory.parent))
+        np.save(temporary_directory / "word_bytes.npy", np.frombuffer(b"".join(word_bytes), dtype=np.uint8))
+        np.save(temporary_directory / "word_offsets.npy", word_offsets)
+        np.save(temporary_directory / "word_char_ids.npy", vocab.word_char_ids)
+        np.save(temporary_directory / "sorted_hashes.npy", hashes[order])
+        np.save(temporary_directory / "sorted_hash_ids.npy", ids[order])
+        with open(temporary_directory / "metadata.json", "w") as f:
+            json.dump(
+                {
+                    "bos": vocab.bos, "eos": vocab.eos, "unk": vocab.unk,
+                    "max_word_length": max_word_length,
+                    "bos_char": vocab.bos_char, "eos_char": vocab.eos_char, "bow_char": vocab.bow_char,
+                    "eow_char": vocab.eow_char, "pad_char": vocab.pad_char,
+                },
+                f,
+            )
+        try:
+            os.rename(temporary_directory, tables_directory)
+        except OSError:  # another process compiled the same tables in the meantime
+            shutil.rmtree(temporary_directory)
+
+    @property
+    def bos(self):
+        return self._bos
+
+    @property
+    def eos(self):
+        return self._eos
+
+    @property
+    def unk(self):
+        return self._unk
+
+    @property
+    def size(self):
+        return len(self._word_offsets) - 1
+
+    @property
+    def word_char_ids(self):
+        return self._word_char_ids
+
+    @property
+    def max_word_length(self):
+        return self._max_word_length
+
+    def id_to_word(self, cur_id):
+        if cur_id < self.size:
+            start, end = self._word_offsets[cur_id], self._word_offsets[cur_id + 1]
+            return self._word_bytes[start:end].tobytes().decode("utf-8")
+        return "ERROR"
+
+    def word_to_id(self, word):
+        return self.encode_words([word])[0][0]
+
+    def word_to_char_ids(self, word):
+        return self.encode_words([word])[1][0]
+
+    def encode_words(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up word ids and char ids for all `words` at once.
+
+        :return: word ids `(len(words),)` with the <UNK> id for unknown words,
+            and char ids `(len(words), max_word_length)`
+        """
+        unique_words = list(dict.fromkeys(words))
+        unique_ids = self._find(unique_words)
+        unique_char_ids = np.empty((len(unique_words), self.max_word_length), dtype=np.int32)
+        known = unique_ids >= 0
+        unique_char_ids[known] = self._word_char_ids[unique_ids[known]]
+        for index in np.flatnonzero(~known):
+            unique_char_ids[index] = self._convert_word_to_char_ids(unique_words[index])
+        unique_ids[~known] = self.unk
+
+        positions = {word: position for position, word in enumerate(unique_words)}
+        inverse = np.fromiter((positions[word] for word in words), dtype=np.int64, count=len(words))
+        return unique_ids[inverse].astype(np.int32), unique_char_ids[inverse]
+
+    def _find(self, words: List[str]) -> np.ndarray:
+        """ids of the `words` in the vocabulary, -1 for words that are not part of it"""
+        hashes = np.array([_word_hash(word) for word in words], dtype=np.uint64)
+        starts = np.searchsorted(self._sorted_hashes, hashes, side="left")
+        ends = np.searchsorted(self._sorted_hashes, hashes, side="right")
+        ids = np.full(len(words), -1, dtype=np.int64)
+        for index, (word, start, end) in enumerate(zip(words, starts, ends)):
+            # compare the actual words to guard against hash collisions
+            for candidate in self._sorted_hash_ids[start:end]:
+                if self.id_to_word(candidate) == word:
+                    ids[index] = candidate
+                    break
+        return ids
+
+    def _convert_word_to_char_ids(self, word):
+        code = np.zeros([self.max_word_length], dtype=np.int32)
+        code[:] = ord(self.pad_char)
+
+        if len(word) > self.max_word_length - 2:
+            word = word[: self.max_word_length - 2]
+        cur_word = self.bow_char + word + self.eow_char
+        for j in range(len(cur_word)):
+            code[j] = ord(cur_word[j])
+        return code
@@ -14,12 +14,11 @@ Reference:
     Code: https://github.com/ebrahimfeghhi/beyond-brainscore
 """
 
-import copy
 import numpy as np
 from scipy.ndimage import gaussian_filter1d
 from typing import Union, List, Dict
 
-from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly, merge_data_arrays
+from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
 from brainscore_language.artificial_subject import ArtificialSubject
 
 
@@ -34,6 +33,7 @@ class OASMSubject(ArtificialSubject):
 
     This is mathematically equivalent to the paper's full N x N construction, adapted for
     brain-score's per-block ``digest_text`` calling convention.
+    Features are returned dense since benchmarks concatenate the blocks and metrics operate on dense values.
 
     :param identifier: Unique model identifier (e.g., 'oasm-sigma1.0').
     :param sigma: Gaussian smoothing width. Must be >= 0. sigma=0 gives pure identity.
@@ -59,6 +59,10 @@ class OASMSubject(ArtificialSubject):
         self._neural_recordings.append((recording_target, recording_type))
         self._offset = 0
 
+    def reset(self):
+        self._neural_recordings = []
+        self._offset = 0
+
     def digest_text(self, text: Union[str, List[str]]) -> Dict[str, NeuroidAssembly]:
         assert len(self._neural_recordings) > 0, "Must call start_neural_recording before digest_text"
 
@@ -85,42 +89,35 @@ class OASMSubject(ArtificialSubject):
         features[:, self._offset:self._offset + block_size] = block_features
         self._offset += block_size
 
-        # Package each stimulus as a NeuroidAssembly
-        output = {'behavior': [], 'neural': []}
-        for part_number, stimulus in enumerate(text):
-            stimuli_coords = {
-                'stimulus': ('presentation', [stimulus]),
-                'part_number': ('presentation', [part_number]),
-            }
-            neural_assembly = self._package_representations(features[part_number], stimuli_coords=stimuli_coords)
-            output['neural'].append(neural_assembly)
-
-        output['neural'] = merge_data_arrays(output['neural']).sortby('part_number')
-        return output
+        # Package all stimuli at once
+        stimuli_coords = {
+            'stimulus': ('presentation', text),
+            'part_number': ('presentation', np.arange(block_size)),
+        }
+        return {'behavior': [], 'neural': self._package_representations(features, stimuli_coords=stimuli_coords)}
 
     def _package_representations(self, representation_values: np.ndarray,
                                  stimuli_coords: dict) -> NeuroidAssembly:
-        """Package a feature vector as a NeuroidAssembly matching the brain-score interface."""
+        """
+        Package `(num_presentations, num_units)` features as a NeuroidAssembly matching the brain-score interface,
+        repeating the units for every recording (ordered by recording, then unit) like
+        :meth:`brainscore_language.model_helpers.embedding.EmbeddingSubject.package_representations`.
+        """
         layer_name = f'oasm_sigma{self._sigma}'
-        num_units = len(representation_values)
+        num_units = representation_values.shape[1]
+        num_recordings = len(self._neural_recordings)
 
+        neuron_number_in_layer = np.tile(np.arange(num_units), num_recordings)
         neuroid_coords = {
-            'layer': ('neuroid', [layer_name] * num_units),
-            'neuron_number_in_layer': ('neuroid', np.arange(num_units)),
-            'neuroid_id': ('neuroid', [f'{layer_name}--{i}' for i in range(num_units)]),
+            'layer': ('neuroid', [layer_name] * (num_units * num_recordings)),
+            'neuron_number_in_layer': ('neuroid', neuron_number_in_layer),
+            'neuroid_id': ('neuroid', [f'{layer_name}--{i}' for i in neuron_number_in_layer]),
+            'recording_target': ('neuroid', np.repeat(
+                [recording_target for recording_target, _ in self._neural_recordings], num_units)),
+            'recording_type': ('neuroid', np.repeat(
+                [recording_type for _, recording_type in self._neural_recordings], num_units)),
         }
-
-        layer_representations = NeuroidAssembly(
-            [representation_values],
+        return NeuroidAssembly(
+            np.tile(representation_values, (1, num_recordings)),
             coords={**stimuli_coords, **neuroid_coords},
             dims=['presentation', 'neuroid'])
-
-        representations = []
-        for recording_target, recording_type in self._neural_recordings:
-            current_representations = copy.deepcopy(layer_representations)
-            current_representations['recording_target'] = 'neuroid', [recording_target] * num_units
-            current_representations['recording_type'] = 'neuroid', [recording_type] * num_units
-            current_representations = type(current_representations)(current_representations)
-            representations.append(current_representations)
-        representations = merge_data_arrays(representations)
-        return representations
@@ -157,6 +157,22 @@ class TestNeuroidAssemblyStructure:
         assert r1.sizes['neuroid'] == r2.sizes['neuroid'] == r3.sizes['neuroid'] == 20
         assert r1.sizes['presentation'] + r2.sizes['presentation'] + r3.sizes['presentation'] == 6
 
+    def test_multiple_recordings(self):
+        """The units are repeated for every recording, ordered by recording and then unit."""
+        model = _make_model(sigma=1.0, max_features=4)
+        model.start_neural_recording(
+            recording_target=ArtificialSubject.RecordingTarget.language_system_left_hemisphere,
+            recording_type=ArtificialSubject.RecordingType.fMRI,
+        )
+        result = model.digest_text(['a', 'b'])['neural']
+
+        assert result.shape == (2, 8)
+        np.testing.assert_array_equal(result['neuron_number_in_layer'].values, [0, 1, 2, 3] * 2)
+        np.testing.assert_array_equal(result['recording_target'].values, [
+            ArtificialSubject.RecordingTarget.language_system] * 4 + [
+            ArtificialSubject.RecordingTarget.language_system_left_hemisphere] * 4)
+        np.testing.assert_array_equal(result.values[:, :4], result.values[:, 4:])
+
 
 class TestInputHandling:
     """Test edge cases in input normalization."""
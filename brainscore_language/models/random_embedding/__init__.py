@@ -1,6 +1,8 @@
 import numpy as np
+from collections import OrderedDict
 from hashlib import sha256
 from numpy.random import RandomState
+from typing import List
 
 from brainscore_language import model_registry
 from brainscore_language.model_helpers.embedding import EmbeddingSubject
@@ -11,25 +13,111 @@ class WordToEmbedding:
     Create an embedding of size `embedding_size` for a given `word`.
     Embeddings are consistent per word, but different across words (i.e. typically unique).
 
+    Embeddings are drawn from a counter-based Philox4x32-10 generator keyed by the word's sha256 hash, so that the
+    embeddings of many words can be generated in one vectorized call without any per-word generator state.
+    With `legacy_values=True`, every word instead seeds its own `RandomState` which reproduces the values of
+    earlier versions exactly.
+    Recently used words are kept in a least-recently-used cache of `cache_size` words.
+
     Adapted from Schrimpf et al. 2021 https://www.pnas.org/content/118/45/e2105646118,
     https://github.com/mschrimpf/neural-nlp/blob/cedac1f868c8081ce6754ef0c13895ce8bc32efc/neural_nlp/models/implementations.py#L124
     """
 
-    def __init__(self, embedding_size: int):
+    def __init__(self, embedding_size: int, legacy_values: bool = False, cache_size: int = 10_000):
         self.embedding_size = embedding_size
+        self.legacy_values = legacy_values
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
 
     def __getitem__(self, word) -> np.ndarray:
-        # Seed random state to condition on the word.
-        # We do not use a global random state to avoid ordering issues when the function is called
-        # with word1 first and then word2, or vice-versa.
-        word_hash = sha256(word.encode("utf-8"))
-        seed = np.frombuffer(word_hash.digest(), dtype='uint32')  # random state seed expects 32-bit unsigned int
-        random_state = RandomState(seed)
-        embedding = random_state.random(self.embedding_size)
-        return embedding
-
-
-model_registry['randomembedding-1600'] = lambda: EmbeddingSubject(identifier='randomembedding-1600',
-                                                                  lookup=WordToEmbedding(1600))
-model_registry['randomembedding-100'] = lambda: EmbeddingSubject(identifier='randomembedding-100',
-                                                                 lookup=WordToEmbedding(100))
+        return self.lookup_batch([word])[0]
+
+    def lookup_batch(self, words: List[str]) -> np.ndarray:
+        """ Embeddings of all `words` as a `(len(words), embedding_size)` matrix """
+        if len(words) == 0:
+            return np.zeros((0, self.embedding_size))
+        unique_words, inverse = np.unique(np.array(words, dtype=str), return_inverse=True)
+        embeddings = np.empty((len(unique_words), self.embedding_size))
+        missing = []
+        for index, word in enumerate(unique_words):
+            if word in self._cache:
+                self._cache.move_to_end(word)
+                embeddings[index] = self._cache[word]
+            else:
+                missing.append(index)
+        if missing:
+            missing_words = unique_words[missing]
+            embeddings[missing] = self._legacy_embeddings(missing_words) if self.legacy_values \
+                else self._philox_embeddings(missing_words)
+            for word, embedding in zip(missing_words, embeddings[missing]):
+                self._cache[word] = embedding
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return embeddings[inverse.reshape(-1)]
+
+    def _legacy_embeddings(self, words) -> np.ndarray:
+        embeddings = []
+        for word in words:
+            # Seed random state to condition on the word.
+            # We do not use a global random state to avoid ordering issues when the function is called
+            # with word1 first and then word2, or vice-versa.
+            word_hash = sha256(word.encode("utf-8"))
+            seed = np.frombuffer(word_hash.digest(), dtype='uint32')  # random state seed expects 32-bit unsigned int
+            random_state = RandomState(seed)
+            embeddings.append(random_state.random(self.embedding_size))
+        return np.array(embeddings)
+
+    def _philox_embeddings(self, words, chunk_size: int = 256) -> np.ndarray:
+        # generate in chunks of words to bound the memory of intermediate arrays
+        return np.concatenate([self._philox_embeddings_chunk(words[start:start + chunk_size])
+                               for start in range(0, len(words), chunk_size)])
+
+    def _philox_embeddings_chunk(self, words) -> np.ndarray:
+        # the first 64 bits of the hash key the generator, the next 64 bits fill the upper counter words so that
+        # 128 bits of the hash identify each word's stream. The lower counter word enumerates blocks within a stream.
+        hashes = np.array([np.frombuffer(sha256(word.encode("utf-8")).digest(), dtype='<u4')[:4] for word in words],
+                          dtype=np.uint64)
+        num_blocks = (self.embedding_size + 1) // 2  # every block of 4x32 bits yields two 53-bit doubles
+        counter = np.zeros((len(words), num_blocks, 4), dtype=np.uint64)
+        counter[..., 0] = np.arange(num_blocks, dtype=np.uint64)
+        counter[..., 2] = hashes[:, np.newaxis, 2]
+        counter[..., 3] = hashes[:, np.newaxis, 3]
+        key = np.broadcast_to(hashes[:, np.newaxis, :2], (len(words), num_blocks, 2))
+        bits = _philox4x32(counter, key).reshape(len(words), num_blocks * 2, 2)
+        # same conversion to [0, 1) as numpy's random: combine 27 and 26 bits into a 53-bit mantissa
+        embeddings = ((bits[..., 0] >> 5) * 67108864 + (bits[..., 1] >> 6)) / 9007199254740992.0
+        return embeddings[:, :self.embedding_size]
+
+
+_PHILOX_M0, _PHILOX_M1 = np.uint64(0xD2511F53), np.uint64(0xCD9E8D57)
+_PHILOX_W0, _PHILOX_W1 = np.uint64(0x9E3779B9), np.uint64(0xBB67AE85)
+_UINT32_MASK, _UINT32_SHIFT = np.uint64(0xFFFFFFFF), np.uint64(32)
+
+
+def _philox4x32(counter: np.ndarray, key: np.ndarray, rounds: int = 10) -> np.ndarray:
+    """
+    Philox4x32 (Salmon et al. 2011) on arrays of 32-bit values held in uint64: `counter` `(..., 4)`, `key` `(..., 2)`.
+    Returns the `(..., 4)` random words for every counter.
+    """
+    c0, c1, c2, c3 = (counter[..., i].astype(np.uint64) for i in range(4))
+    k0, k1 = (key[..., i].astype(np.uint64) for i in range(2))
+    for round_number in range(rounds):
+        if round_number > 0:
+            k0 = (k0 + _PHILOX_W0) & _UINT32_MASK
+            k1 = (k1 + _PHILOX_W1) & _UINT32_MASK
+        product0, product1 = _PHILOX_M0 * c0, _PHILOX_M1 * c2
+        c0, c1, c2, c3 = ((product1 >> _UINT32_SHIFT) ^ c1 ^ k0, product1 & _UINT32_MASK,
+                          (product0 >> _UINT32_SHIFT) ^ c3 ^ k1, product0 & _UINT32_MASK)
+    return np.stack([c0, c1, c2, c3], axis=-1)
+
+
+model_registry['randomembedding-1600'] = lambda: EmbeddingSubject(
+    identifier='randomembedding-1600', lookup=WordToEmbedding(1600))
+model_registry['randomembedding-100'] = lambda: EmbeddingSubject(
+    identifier='randomembedding-100', lookup=WordToEmbedding(100))
+
+# the per-word `RandomState` embeddings of earlier versions, e.g. to reproduce their scores
+model_registry['randomembedding-1600-legacy'] = lambda: EmbeddingSubject(
+    identifier='randomembedding-1600-legacy', lookup=WordToEmbedding(1600, legacy_values=True))
+model_registry['randomembedding-100-legacy'] = lambda: EmbeddingSubject(
+    identifier='randomembedding-100-legacy', lookup=WordToEmbedding(100, legacy_values=True))
@@ -1,8 +1,10 @@
 import numpy as np
 import pytest
-from brainscore_language import load_model, ArtificialSubject, score
+from hashlib import sha256
+from numpy.random import RandomState
 
-from brainscore_language.models.random_embedding import WordToEmbedding
+from brainscore_language import load_model, ArtificialSubject, score
+from brainscore_language.models.random_embedding import WordToEmbedding, _philox4x32
 
 
 class TestWordToEmbedding:
@@ -33,6 +35,45 @@ class TestWordToEmbedding:
         assert np.array_equal(embedding2a, embedding2b)
         assert not np.array_equal(embedding1a, embedding2a)
 
+    @pytest.mark.parametrize('legacy_values', [False, True])
+    def test_batch_matches_single_words(self, legacy_values):
+        words = ['the', 'quick', 'fox', 'the', 'jumps']
+        batch = WordToEmbedding(300, legacy_values=legacy_values).lookup_batch(words)
+        assert batch.shape == (5, 300)
+        single_embedder = WordToEmbedding(300, legacy_values=legacy_values)
+        for word, embedding in zip(reversed(words), reversed(batch)):
+            assert np.array_equal(single_embedder[word], embedding)
+
+    def test_batch_independent_of_batch_contents(self):
+        embedding_alone = WordToEmbedding(301).lookup_batch(['fox'])[0]
+        embedding_in_batch = WordToEmbedding(301).lookup_batch(['the', 'fox', 'dog'])[1]
+        assert np.array_equal(embedding_alone, embedding_in_batch)
+
+    def test_value_range(self):
+        embeddings = WordToEmbedding(1000).lookup_batch(['the', 'fox'])
+        assert embeddings.min() >= 0 and embeddings.max() < 1
+        assert embeddings.mean() == pytest.approx(.5, abs=.05)
+
+    def test_legacy_values(self):
+        seed = np.frombuffer(sha256('fox'.encode("utf-8")).digest(), dtype='uint32')
+        expected = RandomState(seed).random(300)
+        assert np.array_equal(WordToEmbedding(300, legacy_values=True)['fox'], expected)
+
+    def test_cache_bounded(self):
+        embedder = WordToEmbedding(10, cache_size=2)
+        embedding = embedder['the']
+        embedder.lookup_batch(['quick', 'brown', 'fox'])
+        assert len(embedder._cache) == 2
+        assert np.array_equal(embedder['the'], embedding)
+
+    def test_philox_known_answers(self):
+        # known-answer vectors of the Random123 reference implementation
+        np.testing.assert_array_equal(_philox4x32(np.zeros(4, dtype=np.uint64), np.zeros(2, dtype=np.uint64)),
+                                      [0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8])
+        np.testing.assert_array_equal(_philox4x32(np.full(4, 0xffffffff, dtype=np.uint64),
+                                                  np.full(2, 0xffffffff, dtype=np.uint64)),
+                                      [0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd])
+
 
 def test_neural():
     model = load_model('randomembedding-1600')
@@ -47,6 +88,19 @@ def test_neural():
     assert np.array_equal(representations.sel(part_number=2), representations.sel(part_number=4))
 
 
-def test_score():
-    result = score(model_identifier='randomembedding-100', benchmark_identifier='Pereira2018.243sentences-linear')
+@pytest.mark.parametrize('identifier, legacy_values', [
+    ('randomembedding-1600', False),
+    ('randomembedding-100', False),
+    ('randomembedding-1600-legacy', True),
+    ('randomembedding-100-legacy', True),
+])
+def test_registered_generator(identifier, legacy_values):
+    model = load_model(identifier)
+    assert model.identifier == identifier
+    assert model._lookup.legacy_values == legacy_values
+
+
+def test_score_legacy():
+    result = score(model_identifier='randomembedding-100-legacy',
+                   benchmark_identifier='Pereira2018.243sentences-linear')
     assert result == pytest.approx(.0285022, abs=.005)
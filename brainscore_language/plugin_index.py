@@ -0,0 +1,161 @@
+"""
+Index of the identifiers that plugins register, e.g. `model_registry['glove-840b'] = ...`.
+
+The index is built by statically parsing every plugin's `__init__.py` rather than importing it, so that listing and
+locating plugins does not import their (potentially heavy) dependencies such as TensorFlow or torch.
+Parsed registrations are cached on disk together with the modification time and size of each `__init__.py`,
+so that only changed plugins are re-parsed.
+"""
+
+import ast
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict
+
+from brainscore_core.plugin_management.import_plugin import ImportPlugin, installation_preference
+
+_logger = logging.getLogger(__name__)
+
+LIBRARY_ROOT = 'brainscore_language'
+LIBRARY_DIRECTORY = Path(__file__).parent
+INDEX_CACHE = Path.home() / ".cache" / "brainscore_language" / "plugin_index.json"
+INDEX_VERSION = 1  # increment when the format of the cached index changes
+
+
+def registry_name(plugin_type: str) -> str:
+    """ Name of the registry that plugins of the given type register with, e.g. `models` -> `model_registry` """
+    return plugin_type.removesuffix('s') + '_registry'
+
+
+def scan_registrations(init_file: Path) -> Dict[str, Dict[str, str]]:
+    """
+    Find all `<name>_registry['<identifier>'] = <factory>` assignments in the given file without executing it.
+
+    :return: a mapping from registry name to the identifiers registered with it and the source of their factories
+    """
+    with open(init_file, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=str(init_file))
+    registrations = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign):
+            targets = [node.target]
+        else:
+            continue
+        if node.value is None:  # annotation without assignment
+            continue
+        for target in targets:
+            if isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name) \
+                    and target.value.id.endswith('_registry') \
+                    and isinstance(target.slice, ast.Constant) and isinstance(target.slice.value, str):
+                registrations.setdefault(target.value.id, {})[target.slice.value] = ast.unparse(node.value)
+    return registrations
+
+
+class PluginIndex:
+    """
+    Registrations of all plugins of all types, keyed by plugin type and plugin directory.
+    """
+
+    def __init__(self, library_directory: Path = LIBRARY_DIRECTORY, cache_file: Path = INDEX_CACHE):
+        self._library_directory = Path(library_directory)
+        self._cache_file = cache_file
+        self._plugins: Dict[str, Dict[str, dict]] = {}  # plugin type -> plugin directory -> entry
+        self._cache_loaded = False
+
+    def plugins(self, plugin_type: str) -> Dict[str, Dict[str, Dict[str, str]]]:
+        """
+        :return: a mapping from each plugin directory of the given type to its registrations
+            (registry name -> identifier -> factory source)
+        """
+        self._load_cache()
+        plugins_directory = self._library_directory / plugin_type
+        assert plugins_directory.is_dir(), f"Plugins directory {plugins_directory} is not a directory"
+        cached_plugins = self._plugins.get(plugin_type, {})
+        plugins, changed = {}, False
+        for plugin_directory in sorted(plugins_directory.iterdir()):
+            if not plugin_directory.is_dir() or plugin_directory.name.startswith(('.', '_')):  # e.g. __pycache__
+                continue
+            init_file = plugin_directory / "__init__.py"
+            if not init_file.is_file():
+                _logger.warning(f"No __init__.py in {plugin_directory}")
+                continue
+            stat = init_file.stat()
+            entry = cached_plugins.get(plugin_directory.name)
+            if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                         'registrations': scan_registrations(init_file)}
+                changed = True
+            plugins[plugin_directory.name] = entry
+        changed = changed or plugins.keys() != cached_plugins.keys()
+        self._plugins[plugin_type] = plugins
+        if changed:
+            self._save_cache()
+        return {plugin_dirname: entry['registrations'] for plugin_dirname, entry in plugins.items()}
+
+    def identifiers(self, plugin_type: str) -> Dict[str, str]:
+        """
+        :return: a mapping from every identifier registered by plugins of the given type to its plugin directory
+        """
+        name = registry_name(plugin_type)
+        return {identifier: plugin_dirname
+                for plugin_dirname, registrations in self.plugins(plugin_type).items()
+                for identifier in registrations.get(name, {})}
+
+    def locate(self, plugin_type: str, identifier: str) -> str:
+        """ :return: the name of the plugin directory that registers `identifier` """
+        name = registry_name(plugin_type)
+        plugin_dirnames = [plugin_dirname for plugin_dirname, registrations in self.plugins(plugin_type).items()
+                           if identifier in registrations.get(name, {})]
+        assert len(plugin_dirnames) > 0, f"No registrations found for {identifier}"
+        assert len(plugin_dirnames) == 1, f"More than one registration found for {identifier}"
+        return plugin_dirnames[0]
+
+    def _load_cache(self):
+        if self._cache_loaded:
+            return
+        self._cache_loaded = True
+        try:
+            with open(self._cache_file, encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):  # no cache yet, or unreadable
+            return
+        if cache.get('version') == INDEX_VERSION and cache.get('library') == str(self._library_directory):
+            self._plugins = cache['plugins']
+
+    def _save_cache(self):
+        cache = {'version': INDEX_VERSION, 'library': str(self._library_directory), 'plugins': self._plugins}
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temporary_file = self._cache_file.with_name(f"{self._cache_file.name}.{os.getpid()}.tmp")
+            with open(temporary_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(temporary_file, self._cache_file)
+        except OSError as e:  # the index still works without its cache, e.g. on a read-only home directory
+            _logger.debug(f"Could not write plugin index cache {self._cache_file}: {e}")
+
+
+plugin_index = PluginIndex()
+
+
+class _IndexedImportPlugin(ImportPlugin):
+    """ `ImportPlugin` that locates plugins through the :data:`plugin_index` instead of reading every plugin """
+
+    def locate_plugin(self) -> str:
+        return plugin_index.locate(self.plugin_type, self.identifier)
+
+
+def import_plugin(plugin_type: str, identifier: str):
+    """
+    Install the dependencies of the plugin that registers `identifier` (unless disabled via
+    `BS_INSTALL_DEPENDENCIES=no`) and import only that plugin's package.
+    """
+    importer = _IndexedImportPlugin(library_root=LIBRARY_ROOT, plugin_type=plugin_type, identifier=identifier)
+
+    if installation_preference() != 'no':
+        importer.install_requirements()
+
+    __import__(f'{LIBRARY_ROOT}.{plugin_type}.{importer.plugin_dirname}')
@@ -0,0 +1,69 @@
+import logging
+from typing import Iterable, Iterator, List
+
+from brainscore_core.metrics import Score
+from brainscore_language import load_model, load_benchmark
+from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.plugin_index import plugin_index
+
+_logger = logging.getLogger(__name__)
+
+
+def order_benchmarks(benchmark_identifiers: Iterable[str]) -> List[str]:
+    """
+    Order benchmarks such that benchmarks from the same plugin run back-to-back, e.g. all SyntaxGym suites or both
+    Pereira2018 experiments, so that the data and caches they share are still warm when the next one runs.
+    Plugins are kept in order of their first appearance, and benchmarks in their original order within each plugin.
+    Duplicate identifiers are dropped.
+    """
+    benchmark_plugins = plugin_index.identifiers('benchmarks')
+    groups = {}
+    for benchmark_identifier in dict.fromkeys(benchmark_identifiers):
+        # benchmarks that are not in the index (i.e. registered at runtime) form their own group
+        group = benchmark_plugins.get(benchmark_identifier, benchmark_identifier)
+        groups.setdefault(group, []).append(benchmark_identifier)
+    return [benchmark_identifier for group in groups.values() for benchmark_identifier in group]
+
+
+class ScoringSession:
+    """
+    Score one model on several benchmarks, loading the model only once.
+    Between benchmarks, the model's behavioral tasks and neural recordings are cleared with
+    :meth:`~brainscore_language.artificial_subject.ArtificialSubject.reset`; models that do not implement `reset`
+    are re-loaded instead.
+
+    Unlike :meth:`~brainscore_language.score`, scoring always happens in the current environment,
+    i.e. `BS_INSTALL_DEPENDENCIES=newenv` does not create a separate environment per benchmark.
+    """
+
+    def __init__(self, model_identifier: str):
+        self.model_identifier = model_identifier
+        self.model: ArtificialSubject = load_model(model_identifier)
+        self._model_used = False
+
+    def score(self, benchmark_identifier: str) -> Score:
+        benchmark = load_benchmark(benchmark_identifier)
+        self._prepare_model()
+        score = benchmark(self.model)
+        score.attrs['model_identifier'] = self.model_identifier
+        score.attrs['benchmark_identifier'] = benchmark_identifier
+        return score
+
+    def score_all(self, benchmark_identifiers: Iterable[str]) -> Iterator[Score]:
+        """
+        Score the model on all benchmarks in the order of :meth:`order_benchmarks`,
+        yielding each score as soon as its benchmark finishes.
+        """
+        for benchmark_identifier in order_benchmarks(benchmark_identifiers):
+            _logger.info(f"Scoring {self.model_identifier} on {benchmark_identifier}")
+            yield self.score(benchmark_identifier)
+
+    def _prepare_model(self):
+        if not self._model_used:  # freshly loaded
+            self._model_used = True
+            return
+        try:
+            self.model.reset()
+        except NotImplementedError:
+            _logger.info(f"Model {self.model_identifier} cannot be reset, re-loading it")
+            self.model = load_model(self.model_identifier)
@@ -8,19 +8,36 @@ from brainscore_core import Score, Benchmark
 from brainscore_core.submission import RunScoringEndpoint, DomainPlugins
 from brainscore_core.submission.endpoints import make_argparser, resolve_models_benchmarks, get_user_id, \
     send_email_to_submitter as send_email_to_submitter_core
+from brainscore_core.plugin_management.import_plugin import installation_preference
 from brainscore_language import load_model, load_benchmark, score
+from brainscore_language.session import ScoringSession, order_benchmarks
 from brainscore_language.submission import config
 
 
 class LanguagePlugins(DomainPlugins):
+    def __init__(self):
+        super(LanguagePlugins, self).__init__()
+        self._session: Union[None, ScoringSession] = None
+        """ session of the most recently used model, so that consecutive runs of the same model only load it once """
+
+    def _model_session(self, model_identifier: str) -> ScoringSession:
+        if self._session is None or self._session.model_identifier != model_identifier:
+            self._session = None  # release the previous model before loading the next one
+            self._session = ScoringSession(model_identifier)
+        return self._session
+
     def load_model(self, model_identifier: str):
-        return load_model(model_identifier)
+        if installation_preference() == 'newenv':  # models are loaded in a separate environment for every score
+            return load_model(model_identifier)
+        return self._model_session(model_identifier).model
 
     def load_benchmark(self, benchmark_identifier: str) -> Benchmark:
         return load_benchmark(benchmark_identifier)
 
     def score(self, model_identifier: str, benchmark_identifier: str) -> Score:
-        return score(model_identifier, benchmark_identifier)
+        if installation_preference() == 'newenv':
+            return score(model_identifier, benchmark_identifier)
+        return self._model_session(model_identifier).score(benchmark_identifier)
 
 
 language_plugins = LanguagePlugins()
@@ -30,8 +47,9 @@ run_scoring_endpoint = RunScoringEndpoint(language_plugins, db_secret=config.get
 def run_scoring(args_dict: Dict[str, Union[str, List]]):
     model_ids, benchmark_ids = resolve_models_benchmarks(domain="language", args_dict=args_dict)
     
-    for benchmark in benchmark_ids:
-        for model in model_ids:
+    # models in the outer loop so that each model is loaded once and then run on all benchmarks
+    for model in model_ids:
+        for benchmark in order_benchmarks(benchmark_ids):
             run_scoring_endpoint(domain="language", jenkins_id=args_dict["jenkins_id"],
                                 model_identifier=model, benchmark_identifier=benchmark,
                                 user_id=args_dict["user_id"], model_type="artificialsubject",
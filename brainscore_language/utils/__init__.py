@@ -1,8 +1,18 @@
+import os
+from typing import Any, List, Tuple, Union
+
 import numpy as np
 
 from brainscore_core.supported_data_standards.brainio.assemblies import walk_coords
 
 
+# Floating-point precision in which metrics compute on model-side arrays. Model activations typically come from torch as
+# float32, and computing on them in float32 rather than promoting to float64 halves memory and speeds up BLAS calls.
+# Accumulations that need it (e.g. means, centering, normalization) still happen in float64.
+METRIC_PRECISION_VARIABLE = 'BS_METRIC_PRECISION'
+DEFAULT_METRIC_PRECISION = 'float32'
+
+
 def fullname(obj):
     """ Resolve the full module-qualified name of an object. Typically used for logger naming. """
     return obj.__module__ + "." + obj.__class__.__name__
@@ -15,3 +25,42 @@ def attach_presentation_meta(assembly, meta):
         if hasattr(assembly, coord):  # coordinate already part of assembly
             continue
         assembly[coord] = (dims, values)
+
+
+def group_indices(values: np.ndarray) -> Tuple[List[Tuple[Any, Union[slice, np.ndarray]]], np.ndarray]:
+    """
+    Group the positions of `values` by value, e.g. to run a benchmark's stimuli passage by passage.
+    Groups are computed once with `np.unique` and a stable sort rather than comparing every value against every group.
+
+    :return: a list of `(value, indices)` with one entry per unique value in sorted order, where `indices` are the
+        positions of that value in their original order (a `slice` if the positions are contiguous);
+        and the concatenation of all groups' positions, i.e. the order in which grouped results are stacked
+    """
+    unique_values, inverse = np.unique(values, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    group_ends = np.cumsum(np.bincount(inverse, minlength=len(unique_values)))
+    groups, group_start = [], 0
+    for value, group_end in zip(unique_values, group_ends):
+        indices = order[group_start:group_end]
+        if indices[-1] - indices[0] == len(indices) - 1:  # positions are increasing, so this means contiguous
+            indices = slice(indices[0], indices[-1] + 1)
+        groups.append((value, indices))
+        group_start = group_end
+    return groups, order
+
+
+def metric_dtype(dtype=None) -> np.dtype:
+    """
+    :param dtype: an explicit precision, or `None` for the precision set by the environment variable
+        `BS_METRIC_PRECISION` (`float32` by default)
+    :return: the floating-point dtype in which metrics compute on model-side arrays
+    """
+    dtype = np.dtype(dtype or os.getenv(METRIC_PRECISION_VARIABLE, DEFAULT_METRIC_PRECISION))
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"Metric precision has to be float32 or float64, but got {dtype}")
+    return dtype
+
+
+def as_metric_dtype(values, dtype=None) -> np.ndarray:
+    """ the values of `values` (e.g. an assembly) as an array of the metric precision, copied only if necessary """
+    return np.asarray(values).astype(metric_dtype(dtype), copy=False)
@@ -0,0 +1,86 @@
+"""
+Checkpoints of the per-group predictions of a benchmark run (e.g. per story or passage), so that a run that is
+interrupted can be resumed without re-computing the groups that already completed.
+
+Checkpointing is enabled by setting the environment variable `BS_RUN_DIRECTORY` to a local directory.
+Each run stores its groups in a sub-directory keyed by model identifier, benchmark identifier and benchmark version.
+Resuming assumes that the predictions for one group do not depend on which groups the model has seen before,
+so only subjects that declare `supports_group_checkpoints` are checkpointed.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import re
+import shutil
+from pathlib import Path
+from typing import Callable, Hashable, Union
+
+from brainscore_core.benchmarks import Benchmark
+from brainscore_core.supported_data_standards.brainio.assemblies import DataAssembly
+from brainscore_language.artificial_subject import ArtificialSubject
+
+_logger = logging.getLogger(__name__)
+
+RUN_DIRECTORY_VARIABLE = 'BS_RUN_DIRECTORY'
+
+
+def _model_identifier(candidate: ArtificialSubject) -> Union[None, str]:
+    # `load_model` overwrites the `identifier` method with the registry identifier
+    identifier = candidate.identifier
+    if callable(identifier):
+        try:
+            identifier = identifier()
+        except NotImplementedError:
+            return None
+    return identifier
+
+
+class GroupCheckpoints:
+    def __init__(self, directory: Union[None, Path]):
+        """
+        :param directory: where to store the group predictions of this run, or `None` to not store any
+        """
+        self.directory = directory
+
+    @classmethod
+    def for_run(cls, candidate: ArtificialSubject, benchmark: Benchmark) -> 'GroupCheckpoints':
+        """
+        Checkpoints for running `candidate` on `benchmark`, disabled if `BS_RUN_DIRECTORY` is not set, the candidate
+        carries state across `digest_text` calls, or the candidate has no identifier to key its run by.
+        """
+        run_directory = os.getenv(RUN_DIRECTORY_VARIABLE)
+        if not run_directory or not getattr(candidate, 'supports_group_checkpoints', False):
+            return cls(None)
+        model_identifier = _model_identifier(candidate)
+        if model_identifier is None:
+            return cls(None)
+        run_key = f"{model_identifier}--{benchmark.identifier}--v{benchmark.version}"
+        run_key = re.sub(r'[^\w.\-]', '_', run_key)  # safe as a directory name
+        return cls(Path(run_directory) / run_key)
+
+    def __call__(self, group: Hashable, compute: Callable[[], DataAssembly]) -> DataAssembly:
+        """
+        :return: the checkpointed predictions for `group` if this run already completed it,
+            otherwise the result of `compute()` which is checkpointed before being returned
+        """
+        if self.directory is None:
+            return compute()
+        group_file = self.directory / f"{hashlib.sha1(str(group).encode('utf-8')).hexdigest()}.pkl"
+        if group_file.is_file():
+            _logger.debug(f"Re-using checkpointed predictions for group {group} from {group_file}")
+            with open(group_file, 'rb') as f:
+                return pickle.load(f)
+        predictions = compute()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary_file = group_file.with_name(f"{group_file.name}.{os.getpid()}.tmp")
+        with open(temporary_file, 'wb') as f:
+            pickle.dump(predictions, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file, group_file)  # never leave a partially written checkpoint behind
+        return predictions
+
+    def clear(self):
+        """ remove the checkpoints of this run, once it completed """
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
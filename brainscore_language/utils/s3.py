@@ -1,5 +1,14 @@
+import hashlib
 import logging
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import requests
+import xarray as xr
 
 from brainscore_core.supported_data_standards.brainio import fetch
 from brainscore_core.supported_data_standards.brainio.assemblies import AssemblyLoader, NeuroidAssembly, DataAssembly
@@ -14,6 +23,16 @@ _logger = logging.getLogger(__name__)
 #   - key prefix: brainscore-language/
 _BUCKET = "brainscore-storage"
 _FOLDER = "brainscore-language"
+BUCKET_URL = f"https://{_BUCKET}.s3.amazonaws.com"
+
+# Fetched netCDF files are converted into a memory-mappable format (a `.npy` file of the data plus the pickled
+# metadata), keyed by the netCDF file's sha1. Loading a converted assembly maps the data read-only instead of parsing
+# the netCDF file, so that repeated loads are near-instant and processes on the same node share the data's pages.
+CONVERTED_ASSEMBLIES_DIRECTORY = Path.home() / ".cache" / "brainscore_language" / "assemblies"
+CONVERSION_VERSION = 1  # increment when the converted format changes
+_CONVERTED_DATA = "data.npy"
+_CONVERTED_METADATA = "metadata.pkl"
+_UNCONVERTIBLE = "unconvertible"  # marks assemblies whose data cannot be memory-mapped, e.g. of object dtype
 
 
 def upload_data_assembly(assembly, assembly_identifier, bucket_name=_BUCKET, assembly_prefix="assy_"):
@@ -37,14 +56,147 @@ def upload_data_assembly(assembly, assembly_identifier, bucket_name=_BUCKET, ass
     return response
 
 
+class S3File(NamedTuple):
+    """
+    An assembly file in the S3 bucket, referenced the same way as in :meth:`load_from_s3`,
+    so that the file can be located (and e.g. downloaded ahead of time) without loading it.
+    """
+    identifier: str
+    sha1: str
+    version_id: Optional[str] = None
+    assembly_prefix: str = "assy_"
+
+    @property
+    def remote_path(self) -> str:
+        return f"{_FOLDER}/{self.assembly_prefix}{self.identifier.replace('.', '_')}.nc"
+
+    @property
+    def local_path(self) -> Path:
+        """ where `fetch_file` stores this file """
+        return Path(fetch.get_local_data_path()) / self.sha1 / Path(self.remote_path).name
+
+    @property
+    def converted_directory(self) -> Path:
+        """ where :meth:`convert_netcdf` stores this file's memory-mappable conversion """
+        return CONVERTED_ASSEMBLIES_DIRECTORY / f"{self.sha1}-v{CONVERSION_VERSION}"
+
+    def is_local(self) -> bool:
+        return (self.converted_directory / _CONVERTED_METADATA).is_file() or self.local_path.is_file()
+
+    def load(self, cls=NeuroidAssembly) -> DataAssembly:
+        return load_from_s3(self.identifier, sha1=self.sha1, version_id=self.version_id,
+                            assembly_prefix=self.assembly_prefix, cls=cls)
+
+
 def load_from_s3(identifier, sha1, version_id=None, assembly_prefix="assy_", cls=NeuroidAssembly) -> DataAssembly:
-    filename = f"{assembly_prefix}{identifier.replace('.', '_')}.nc"
-    remote_path = f"{_FOLDER}/{filename}"
-    file_path = fetch_file(location_type="S3",
-                           location=f"https://{_BUCKET}.s3.amazonaws.com/{remote_path}",
-                           version_id=version_id,
-                           sha1=sha1)
-    loader = AssemblyLoader(cls=cls, file_path=file_path)
+    s3_file = S3File(identifier, sha1=sha1, version_id=version_id, assembly_prefix=assembly_prefix)
+    converted_directory = s3_file.converted_directory if sha1 else None
+    if converted_directory is not None and (converted_directory / _CONVERTED_METADATA).is_file():
+        loader = MemoryMappedAssemblyLoader(cls=cls, directory=converted_directory)
+    else:
+        file_path = fetch_file(location_type="S3",
+                               location=f"{BUCKET_URL}/{s3_file.remote_path}",
+                               version_id=version_id,
+                               sha1=sha1)
+        loader = AssemblyLoader(cls=cls, file_path=file_path)
+        if converted_directory is not None and not (converted_directory / _UNCONVERTIBLE).is_file():
+            try:
+                convert_netcdf(file_path, converted_directory)
+                loader = MemoryMappedAssemblyLoader(cls=cls, directory=converted_directory)
+            except (OSError, ValueError) as e:  # e.g. read-only cache or object data, load the netCDF file instead
+                _logger.debug(f"Could not convert {file_path} to a memory-mappable format: {e}")
     assembly = loader.load()
     assembly.attrs['identifier'] = identifier
     return assembly
+
+
+def download_files(s3_files: Iterable[S3File], max_workers: int = 8) -> List[S3File]:
+    """
+    Download files that are not available locally yet, concurrently and with pooled connections,
+    to where :meth:`load_from_s3` would fetch them to. The sha1 of each file is verified while downloading.
+
+    :return: the files that were downloaded
+    """
+    missing_files = [s3_file for s3_file in dict.fromkeys(s3_files) if not s3_file.is_local()]
+    if not missing_files:
+        return []
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # consume all results so that the first failed download is raised
+            list(executor.map(lambda s3_file: _download_file(session, s3_file), missing_files))
+    return missing_files
+
+
+def _download_file(session: requests.Session, s3_file: S3File, chunk_size: int = 2 ** 20):
+    _logger.debug(f"Downloading {s3_file.remote_path} to {s3_file.local_path}")
+    params = {'versionId': s3_file.version_id} if s3_file.version_id else None
+    s3_file.local_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_file = s3_file.local_path.with_name(f"{s3_file.local_path.name}.{os.getpid()}.tmp")
+    sha1_hash = hashlib.sha1()
+    try:
+        with session.get(f"{BUCKET_URL}/{s3_file.remote_path}", params=params, stream=True) as response:
+            response.raise_for_status()
+            with open(temporary_file, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    sha1_hash.update(chunk)
+                    f.write(chunk)
+        if sha1_hash.hexdigest() != s3_file.sha1:
+            raise ValueError(f"SHA1 mismatch for {s3_file.remote_path}. "
+                             f"Expected: {s3_file.sha1}, Actual: {sha1_hash.hexdigest()}")
+        os.replace(temporary_file, s3_file.local_path)
+    finally:
+        temporary_file.unlink(missing_ok=True)
+
+
+def convert_netcdf(netcdf_file: Path, directory: Path):
+    """
+    Convert an assembly's netCDF file into a `.npy` file of its data, which can be memory-mapped,
+    and a pickle of its dimensions, coordinates, and attributes.
+    The metadata is written last, so that its presence marks a complete conversion.
+    Data that cannot be memory-mapped raises a `ValueError` and is marked in `directory` so that it is not re-tried.
+    """
+    directory.mkdir(parents=True, exist_ok=True)  # fails before parsing the file if the cache is not writable
+    with xr.open_dataarray(netcdf_file) as assembly:
+        assembly = assembly.load()
+    if assembly.dtype.hasobject:
+        (directory / _UNCONVERTIBLE).touch()
+        raise ValueError(f"Data of dtype {assembly.dtype} in {netcdf_file} cannot be memory-mapped")
+    metadata = {'name': assembly.name, 'dims': assembly.dims, 'attrs': assembly.attrs,
+                'coords': {name: (coord.dims, coord.values, coord.attrs) for name, coord in assembly.coords.items()}}
+    temporary_suffix = f".{os.getpid()}.tmp"
+    temporary_data, temporary_metadata = (directory / (_CONVERTED_DATA + temporary_suffix),
+                                          directory / (_CONVERTED_METADATA + temporary_suffix))
+    try:
+        with open(temporary_data, 'wb') as f:
+            np.save(f, assembly.values, allow_pickle=False)
+        with open(temporary_metadata, 'wb') as f:
+            pickle.dump(metadata, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_data, directory / _CONVERTED_DATA)
+        os.replace(temporary_metadata, directory / _CONVERTED_METADATA)
+    finally:
+        temporary_data.unlink(missing_ok=True)
+        temporary_metadata.unlink(missing_ok=True)
+
+
+class MemoryMappedAssemblyLoader(AssemblyLoader):
+    """
+    Loads a DataAssembly from the output of :meth:`convert_netcdf`, memory-mapping its data read-only.
+    """
+
+    def __init__(self, cls, directory: Path, **kwargs):
+        super(MemoryMappedAssemblyLoader, self).__init__(cls=cls, file_path=directory / _CONVERTED_DATA, **kwargs)
+        self.directory = directory
+
+    def load(self):
+        with open(self.directory / _CONVERTED_METADATA, 'rb') as f:
+            metadata = pickle.load(f)
+        data = np.load(self.file_path, mmap_mode='r')
+        result = xr.DataArray(data, dims=metadata['dims'], name=metadata['name'], attrs=metadata['attrs'],
+                              coords={name: xr.Variable(dims, values, attrs=attrs)
+                                      for name, (dims, values, attrs) in metadata['coords'].items()})
+        result = self.correct_stimulus_id_name(result)
+        result = self.assembly_class(data=result)
+        return result
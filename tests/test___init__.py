@@ -1,3 +1,83 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+import brainscore_language
+from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
+
+
 def test_can_import():
     # noinspection PyUnresolvedReferences
     import brainscore_language
+
+
+class TestLoadDataset:
+    @pytest.fixture
+    def factory_calls(self, monkeypatch):
+        factory_calls = []
+
+        def load_assembly():
+            factory_calls.append('dummy-data')
+            return NeuroidAssembly(np.arange(6.).reshape(3, 2), coords={
+                'stimulus_id': ('presentation', ['a', 'b', 'c']), 'neuroid_id': ('neuroid', [0, 1])},
+                                   dims=['presentation', 'neuroid'])
+
+        monkeypatch.setattr(brainscore_language, 'import_plugin', lambda plugin_type, identifier: None)
+        monkeypatch.setitem(brainscore_language.data_registry, 'dummy-data', load_assembly)
+        monkeypatch.setattr(brainscore_language, '_loaded_datasets', {})
+        return factory_calls
+
+    def test_loaded_once(self, factory_calls):
+        first = brainscore_language.load_dataset('dummy-data')
+        second = brainscore_language.load_dataset('dummy-data')
+        assert factory_calls == ['dummy-data']
+        xr.testing.assert_identical(first, second)
+
+    def test_copies_independent(self, factory_calls):
+        first = brainscore_language.load_dataset('dummy-data')
+        first.attrs['identifier'] = 'changed'
+        first = first.isel(presentation=[0])
+        second = brainscore_language.load_dataset('dummy-data')
+        assert 'identifier' not in second.attrs
+        assert len(second['presentation']) == 3
+        with pytest.raises(ValueError, match="read-only"):
+            second.values[0, 0] = -1
+
+    def test_lazy_data_loaded(self, factory_calls, monkeypatch, tmp_path):
+        assembly = brainscore_language.data_registry['dummy-data']()
+        assembly.reset_index('presentation').to_netcdf(tmp_path / 'data.nc')
+        monkeypatch.setitem(brainscore_language.data_registry, 'dummy-data',
+                            lambda: xr.open_dataarray(tmp_path / 'data.nc'))
+        dataset = brainscore_language.load_dataset('dummy-data')
+        assert dataset.variable._in_memory
+        np.testing.assert_array_equal(dataset.values, np.arange(6.).reshape(3, 2))
+
+    def test_memory_mapped_data_kept(self, factory_calls, monkeypatch, tmp_path):
+        np.save(tmp_path / 'data.npy', np.arange(6.).reshape(3, 2))
+        monkeypatch.setitem(brainscore_language.data_registry, 'dummy-data', lambda: NeuroidAssembly(
+            np.load(tmp_path / 'data.npy', mmap_mode='r'), coords={
+                'stimulus_id': ('presentation', ['a', 'b', 'c']), 'neuroid_id': ('neuroid', [0, 1])},
+            dims=['presentation', 'neuroid']))
+        data = brainscore_language.load_dataset('dummy-data').data
+        while not isinstance(data, np.memmap):
+            assert data.base is not None, "data was copied out of the memory map"
+            data = data.base
+
+    def test_reloaded_when_factory_changes(self, factory_calls, monkeypatch):
+        brainscore_language.load_dataset('dummy-data')
+        monkeypatch.setitem(brainscore_language.data_registry, 'dummy-data', lambda: ['replaced'])
+        assert brainscore_language.load_dataset('dummy-data') == ['replaced']
+
+
+def test_prefetch_collects_remote_files(monkeypatch):
+    class DummyBenchmark:
+        def __init__(self, remote_files):
+            self.remote_files = remote_files
+
+    benchmarks = {'dummy-1': DummyBenchmark(['a', 'b']), 'dummy-2': DummyBenchmark(['b', 'c']), 'dummy-3': object()}
+    monkeypatch.setattr(brainscore_language, 'load_benchmark', lambda identifier: benchmarks[identifier])
+    requested = []
+    monkeypatch.setattr(brainscore_language, 'download_files',
+                        lambda remote_files, max_workers: requested.append((remote_files, max_workers)) or ['a'])
+    assert brainscore_language.prefetch(['dummy-1', 'dummy-2', 'dummy-3'], max_workers=4) == ['a']
+    assert requested == [(['a', 'b', 'b', 'c'], 4)]
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from brainscore_core.benchmarks import BenchmarkBase
+from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly
+from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.models.oasm.model import OASMSubject
+from brainscore_language.utils.checkpoints import GroupCheckpoints, RUN_DIRECTORY_VARIABLE
+
+
+class DummyModel(ArtificialSubject):
+    supports_group_checkpoints = True
+
+    def __init__(self, fail_on_group=None):
+        self.identifier = 'dummy-model'
+        self.fail_on_group = fail_on_group
+        self.digested_groups = []
+
+    def digest_text(self, group):
+        if group == self.fail_on_group:
+            raise RuntimeError("preempted")
+        self.digested_groups.append(group)
+        values = np.random.RandomState(group).random(size=(3, 4))
+        return {'neural': NeuroidAssembly(values, coords={
+            'stimulus_id': ('presentation', np.arange(3) + 3 * group),
+            'neuroid_id': ('neuroid', np.arange(4))}, dims=['presentation', 'neuroid'])}
+
+
+class DummyBenchmark(BenchmarkBase):
+    def __init__(self):
+        super(DummyBenchmark, self).__init__(identifier='dummy-benchmark', version=1, parent='test', ceiling=None)
+
+    def __call__(self, candidate):
+        checkpoints = GroupCheckpoints.for_run(candidate, self)
+        predictions = [checkpoints(group, lambda: candidate.digest_text(group)['neural']) for group in range(4)]
+        predictions = xr.concat(predictions, dim='presentation')
+        checkpoints.clear()
+        return predictions
+
+
+class TestGroupCheckpoints:
+    def test_resume(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(RUN_DIRECTORY_VARIABLE, str(tmp_path))
+        benchmark = DummyBenchmark()
+        uninterrupted = DummyBenchmark()(DummyModel())
+
+        interrupted_model = DummyModel(fail_on_group=2)
+        with pytest.raises(RuntimeError, match="preempted"):
+            benchmark(interrupted_model)
+        assert interrupted_model.digested_groups == [0, 1]
+
+        resumed_model = DummyModel()
+        resumed = benchmark(resumed_model)
+        assert resumed_model.digested_groups == [2, 3]
+        xr.testing.assert_identical(resumed, uninterrupted)
+        assert list(tmp_path.iterdir()) == []  # checkpoints are removed once the run completed
+
+    def test_keyed_by_version(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(RUN_DIRECTORY_VARIABLE, str(tmp_path))
+        benchmark = DummyBenchmark()
+        with pytest.raises(RuntimeError):
+            benchmark(DummyModel(fail_on_group=2))
+        benchmark._version = 2
+        model = DummyModel()
+        benchmark(model)
+        assert model.digested_groups == [0, 1, 2, 3]
+
+    def test_disabled_without_run_directory(self, monkeypatch):
+        monkeypatch.delenv(RUN_DIRECTORY_VARIABLE, raising=False)
+        assert GroupCheckpoints.for_run(DummyModel(), DummyBenchmark()).directory is None
+
+    def test_disabled_without_model_identifier(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(RUN_DIRECTORY_VARIABLE, str(tmp_path))
+        anonymous_model = ArtificialSubject()
+        anonymous_model.supports_group_checkpoints = True
+        assert GroupCheckpoints.for_run(anonymous_model, DummyBenchmark()).directory is None
+
+    def test_disabled_for_stateful_subject(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(RUN_DIRECTORY_VARIABLE, str(tmp_path))
+        assert GroupCheckpoints.for_run(DummyModel(), DummyBenchmark()).directory is not None
+        assert GroupCheckpoints.for_run(OASMSubject('oasm', sigma=1.), DummyBenchmark()).directory is None
+
+    def test_resume_stateful_subject(self, tmp_path, monkeypatch):
+        """ OASM places every group at the next feature offset, so resuming must re-digest all groups """
+        monkeypatch.setenv(RUN_DIRECTORY_VARIABLE, str(tmp_path))
+
+        class PassageBenchmark(DummyBenchmark):
+            def __call__(self, candidate):
+                candidate.start_neural_recording(ArtificialSubject.RecordingTarget.language_system,
+                                                 ArtificialSubject.RecordingType.fMRI)
+                checkpoints = GroupCheckpoints.for_run(candidate, self)
+                predictions = [checkpoints(group, lambda: candidate.digest_text([f'{group}.{part}' for part in range(3)])
+                                           ['neural']) for group in range(4)]
+                checkpoints.clear()
+                return xr.concat(predictions, dim='presentation')
+
+        benchmark = PassageBenchmark()
+        uninterrupted = benchmark(OASMSubject('oasm', sigma=1., max_features=12))
+
+        class PreemptedOASM(OASMSubject):
+            def digest_text(self, text):
+                if text[0].startswith('2.'):
+                    raise RuntimeError("preempted")
+                return super(PreemptedOASM, self).digest_text(text)
+
+        with pytest.raises(RuntimeError, match="preempted"):
+            benchmark(PreemptedOASM('oasm', sigma=1., max_features=12))
+
+        resumed = benchmark(OASMSubject('oasm', sigma=1., max_features=12))
+        xr.testing.assert_identical(resumed, uninterrupted)
+        assert list(tmp_path.iterdir()) == []
@@ -61,11 +61,11 @@ def test_score(model_identifier, benchmark_identifier, expected_score):
 @pytest.mark.parametrize(
     "model_identifier, benchmark_identifier, expected_score, install_dependencies",
     [
-        ("randomembedding-100", "Pereira2018.243sentences-linear",
+        ("randomembedding-100-legacy", "Pereira2018.243sentences-linear",
          approx(0.0285022, abs=_SCORE_ATOL), "newenv"),
-        ("randomembedding-100", "Pereira2018.243sentences-linear",
+        ("randomembedding-100-legacy", "Pereira2018.243sentences-linear",
          approx(0.0285022, abs=_SCORE_ATOL), "yes"),
-        ("randomembedding-100", "Pereira2018.243sentences-linear",
+        ("randomembedding-100-legacy", "Pereira2018.243sentences-linear",
          approx(0.0285022, abs=_SCORE_ATOL), "no"),
     ]
 )
@@ -88,7 +88,7 @@ def test_commandline_score():
             sys.executable,
             "brainscore_language",
             "score",
-            "--model_identifier=randomembedding-100",
+            "--model_identifier=randomembedding-100-legacy",
             "--benchmark_identifier=Pereira2018.243sentences-linear",
         ],
         cwd=Path(__file__).parent.parent,
@@ -101,5 +101,5 @@ def test_commandline_score():
     assert "Score" in output
     assert "0.0285" in output
     assert "<xarray.Score ()>\narray(0.0285022)" in output
-    assert "model_identifier:      randomembedding-100" in output
+    assert "model_identifier:      randomembedding-100-legacy" in output
     assert "benchmark_identifier:  Pereira2018.243sentences-linear" in output
@@ -1,4 +1,6 @@
+import io
 import logging
+import pickle
 
 import numpy as np
 import pytest
@@ -6,7 +8,7 @@ from pytest import approx
 
 from brainscore_language import load_model
 from brainscore_language.artificial_subject import ArtificialSubject
-from brainscore_language.model_helpers.container import ContainerSubject
+from brainscore_language.model_helpers.container import ContainerSubject, PayloadFormat, _ResponseCache
 
 logging.basicConfig(level=logging.INFO)
 
@@ -166,3 +168,94 @@ class TestNeural:
             ArtificialSubject.RecordingTarget.language_system_left_hemisphere,
             ArtificialSubject.RecordingTarget.language_system_right_hemisphere,
         }
+
+
+class TestPayloadFormats:
+    def test_json(self):
+        output = ContainerSubject._parse_output(b'{"tokens": [1, 2], "measure": [[0.1, 0.2], [0.3, 0.4]]}')
+        assert output["tokens"] == [1, 2]
+        np.testing.assert_allclose(output["measure"], [[0.1, 0.2], [0.3, 0.4]])
+
+    def test_npy(self):
+        logits = np.random.RandomState(0).random((3, 10)).astype(np.float32)
+        buffer = io.BytesIO()
+        np.savez(buffer, tokens=np.array([4, 2, 7]), measure=logits)
+        output = ContainerSubject._parse_output(buffer.getvalue(), payload_format=PayloadFormat.npy)
+        np.testing.assert_array_equal(output["tokens"], [4, 2, 7])
+        np.testing.assert_array_equal(output["measure"], logits)
+
+    def test_npy_next_word(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, measure=np.array("fox"))
+        output = ContainerSubject._parse_output(buffer.getvalue(), payload_format=PayloadFormat.npy)
+        assert output["measure"].item() == "fox"
+
+    def test_file(self, tmp_path):
+        representation = np.arange(650, dtype=np.float32)[np.newaxis, :]
+        np.save(tmp_path / "measure.npy", representation)
+        output = ContainerSubject._parse_output(b"", payload_format=PayloadFormat.file, payload_dir=tmp_path)
+        assert isinstance(output["measure"], np.memmap)
+        np.testing.assert_array_equal(output["measure"], representation)
+
+
+class TestResponseCache:
+    def test_roundtrip(self, tmp_path):
+        cache = _ResponseCache(tmp_path / "cache.sqlite", max_bytes=1024 ** 2)
+        key = cache.key("sha256:abc", "rnn-lm-ptb", "lstm-mean", "the quick", "quick")
+        assert cache.get(key) is None
+        cache.put(key, {"measure": np.arange(5)})
+        np.testing.assert_array_equal(cache.get(key)["measure"], np.arange(5))
+
+    def test_key_depends_on_image(self):
+        request = ("rnn-lm-ptb", "lstm-mean", "the quick", "quick")
+        assert _ResponseCache.key("sha256:abc", *request) != _ResponseCache.key("sha256:def", *request)
+
+    def test_persists_across_instances(self, tmp_path):
+        _ResponseCache(tmp_path / "cache.sqlite", max_bytes=1024 ** 2).put("key", {"measure": "fox"})
+        cache = _ResponseCache(tmp_path / "cache.sqlite", max_bytes=1024 ** 2)
+        assert cache.get("key") == {"measure": "fox"}
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        value = {"measure": np.zeros(1000)}  # ~8KB pickled
+        cache = _ResponseCache(tmp_path / "cache.sqlite", max_bytes=20000)
+        cache.put("a", value)
+        cache.put("b", value)
+        cache.get("a")  # "b" is now the least recently used entry
+        cache.put("c", value)
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_picklable(self, tmp_path):
+        cache = _ResponseCache(tmp_path / "cache.sqlite", max_bytes=1024 ** 2)
+        cache.put("key", {"measure": "fox"})
+        restored = pickle.loads(pickle.dumps(cache))
+        assert restored.get("key") == {"measure": "fox"}
+
+    @pytest.fixture
+    def digest_calls(self, tmp_path, monkeypatch):
+        """ container subjects are created without a container backend, recording their image digest calls """
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.setattr(ContainerSubject, "_select_container_backend", lambda self: "singularity")
+        monkeypatch.setattr(ContainerSubject, "_download_container", lambda self: None)
+        digest_calls = []
+        monkeypatch.setattr(ContainerSubject, "_get_image_digest",
+                            lambda self: digest_calls.append(self._container) or "sha256:abc")
+        monkeypatch.setattr(ContainerSubject, "_run_container",
+                            lambda self, context, text, measure: {"measure": f"{text} {measure}"})
+        return digest_calls
+
+    def test_image_digest_computed_on_first_lookup(self, digest_calls):
+        model = ContainerSubject(container="user/model:latest", entrypoint="python run.py", identifier="model",
+                                 region_layer_mapping={})
+        assert digest_calls == []
+        assert model._evaluate_container("the quick", "quick", "lstm-mean") == {"measure": "quick lstm-mean"}
+        assert model._evaluate_container("the quick", "quick", "lstm-mean") == {"measure": "quick lstm-mean"}
+        assert digest_calls == ["user/model:latest"]
+
+    def test_no_image_digest_without_cache(self, digest_calls):
+        model = ContainerSubject(container="user/model:latest", entrypoint="python run.py", identifier="model",
+                                 region_layer_mapping={}, cache_responses=False)
+        assert model._response_cache is None
+        assert model._evaluate_container("the quick", "quick", "lstm-mean") == {"measure": "quick lstm-mean"}
+        assert digest_calls == []
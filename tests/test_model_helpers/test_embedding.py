@@ -1,11 +1,12 @@
 import logging
+import shutil
 from pathlib import Path
 
 import numpy as np
 import pytest
 
 from brainscore_language.artificial_subject import ArtificialSubject
-from brainscore_language.model_helpers.embedding import GensimKeyedVectorsSubject, remove_punctuation
+from brainscore_language.model_helpers.embedding import GensimKeyedVectorsSubject, remove_punctuation, mean_over_words
 
 logging.basicConfig(level=logging.INFO)
 
@@ -94,3 +95,61 @@ class TestPunctuation:
 
     def test_not_removes_apostrophe(self):
         assert remove_punctuation("they're") == "they're"
+
+
+class TestVectorized:
+    def _model(self, average_representations=mean_over_words):
+        model = GensimKeyedVectorsSubject(
+            identifier='dummy', weights_file=Path(__file__).parent / 'mini_embeddings.word2vec', vector_size=3,
+            average_representations=average_representations)
+        model.start_neural_recording(
+            recording_target=ArtificialSubject.RecordingTarget.language_system_left_hemisphere,
+            recording_type=ArtificialSubject.RecordingType.fMRI)
+        model.start_neural_recording(
+            recording_target=ArtificialSubject.RecordingTarget.language_system_right_hemisphere,
+            recording_type=ArtificialSubject.RecordingType.fMRI)
+        return model
+
+    def test_matches_per_word_encoding(self):
+        text = ['the quick', 'brown fox.', 'jumps over', 'the lazy dog', 'fox']
+        vectorized = self._model()
+        assert vectorized._supports_vectorized_lookup()
+        per_word = self._model(average_representations=lambda features: np.mean(features, axis=0))
+        assert not per_word._supports_vectorized_lookup()
+        vectorized_representations = vectorized.digest_text(text)['neural']
+        per_word_representations = per_word.digest_text(text)['neural']
+        np.testing.assert_array_equal(vectorized_representations['stimulus'], text)
+        np.testing.assert_array_equal(vectorized_representations['part_number'], np.arange(len(text)))
+        per_word_representations = per_word_representations.sortby(['recording_target', 'neuron_number_in_layer'])
+        vectorized_representations = vectorized_representations.sortby(['recording_target', 'neuron_number_in_layer'])
+        np.testing.assert_allclose(vectorized_representations.values, per_word_representations.values, rtol=1e-6)
+
+    def test_mean_values(self):
+        representations = self._model().digest_text(['quick brown', 'fox over'])['neural']
+        left = representations[{'neuroid': representations['recording_target'].values ==
+                                           ArtificialSubject.RecordingTarget.language_system_left_hemisphere}]
+        np.testing.assert_allclose(left.values, [[2, 2, 2], [4, 3, .5]])
+
+
+class TestNativeCache:
+    def _model(self, weights_file, native_cache_file):
+        model = GensimKeyedVectorsSubject(identifier='dummy', weights_file=weights_file, vector_size=3,
+                                          native_cache_file=native_cache_file)
+        model.start_neural_recording(
+            recording_target=ArtificialSubject.RecordingTarget.language_system_left_hemisphere,
+            recording_type=ArtificialSubject.RecordingType.fMRI)
+        return model
+
+    def test_creates_and_reuses_cache(self, tmp_path):
+        weights_file = tmp_path / 'mini_embeddings.word2vec'
+        shutil.copy(Path(__file__).parent / 'mini_embeddings.word2vec', weights_file)
+        native_cache_file = tmp_path / 'mini_embeddings.kv'
+        first = self._model(weights_file, native_cache_file).digest_text(['quick brown fox'])['neural']
+        assert native_cache_file.is_file()
+        assert not list(tmp_path.glob('*.tmp*'))
+        weights_file.unlink()  # the cache alone has to suffice from now on
+        second_model = self._model(weights_file, native_cache_file)
+        assert isinstance(second_model._lookup.vectors, np.memmap)
+        second = second_model.digest_text(['quick brown fox'])['neural']
+        np.testing.assert_array_equal(first.values, second.values)
+        np.testing.assert_allclose(second.values, [[4, 10 / 3, 5 / 3]])
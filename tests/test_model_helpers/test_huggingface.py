@@ -139,6 +139,63 @@ class TestReadingTimes:
             reading_times, [139.66634, 111.14671, 136.64108], atol=_ATOL)
 
 
+class TestExtendContext:
+    def test_matches_digest_text(self):
+        model = HuggingfaceSubject(model_id='distilgpt2', region_layer_mapping={})
+        text = ['the', 'quick', 'brown', 'fox', '', 'jumps', 'over', 'the', 'lazy.']
+        model.start_behavioral_task(task=ArtificialSubject.Task.reading_times)
+        expected = model.digest_text(text)['behavior']
+        model.restore_context(None)
+        reading_times = [model.extend_context(text_part)['behavior'].item() for text_part in text]
+        np.testing.assert_allclose(reading_times, expected, atol=_ATOL)
+
+    def test_restore_snapshot(self):
+        model = HuggingfaceSubject(model_id='distilgpt2', region_layer_mapping={})
+        model.start_behavioral_task(task=ArtificialSubject.Task.reading_times)
+        model.restore_context(None)
+        model.extend_context('the quick brown fox')
+        snapshot = model.snapshot_context()
+        model.extend_context('sleeps under')
+        model.restore_context(snapshot)
+        reading_times = [model.extend_context(text_part)['behavior'].item() for text_part in ['jumps over', 'the lazy']]
+        np.testing.assert_allclose(reading_times, [14.554907, 14.064276], atol=_ATOL)
+
+    def test_neural_not_supported(self):
+        model = HuggingfaceSubject(model_id='distilgpt2', region_layer_mapping={
+            ArtificialSubject.RecordingTarget.language_system: 'transformer.h.0'})
+        model.start_neural_recording(recording_target=ArtificialSubject.RecordingTarget.language_system,
+                                     recording_type=ArtificialSubject.RecordingType.fMRI)
+        with pytest.raises(NotImplementedError):
+            model.extend_context('the quick brown fox')
+
+
+class TestDigestTextBatch:
+    @pytest.mark.parametrize('task', [ArtificialSubject.Task.reading_times, ArtificialSubject.Task.next_word])
+    def test_matches_digest_text(self, task):
+        model = HuggingfaceSubject(model_id='distilgpt2', region_layer_mapping={})
+        model.start_behavioral_task(task=task)
+        texts = [['the quick brown fox', 'jumps over', 'the lazy'], 'the quick brown fox',
+                 ['fox', '', 'is', 'quick.'], ['beekeepers', 'often', 'go', 'beekeeping']]
+        expected = [model.digest_text(text)['behavior'] for text in texts]
+        outputs = model.digest_text_batch(texts, batch_size=3)
+        for output, expected_behavior in zip(outputs, expected):
+            assert output['behavior'].dtype == expected_behavior.dtype
+            if task == ArtificialSubject.Task.reading_times:
+                np.testing.assert_allclose(output['behavior'], expected_behavior, atol=_ATOL)
+            else:
+                np.testing.assert_array_equal(output['behavior'], expected_behavior)
+            np.testing.assert_array_equal(output['behavior']['context'], expected_behavior['context'])
+
+    def test_truncated_text_falls_back(self):
+        model = HuggingfaceSubject(model_id='distilgpt2', region_layer_mapping={})
+        model.start_behavioral_task(task=ArtificialSubject.Task.reading_times)
+        texts = [['lorem ipsum dolor sit amet' * 250, 'lorem'], ['the quick brown fox', 'jumps over']]
+        expected = [model.digest_text(text)['behavior'] for text in texts]
+        outputs = model.digest_text_batch(texts)
+        for output, expected_behavior in zip(outputs, expected):
+            np.testing.assert_allclose(output['behavior'], expected_behavior, atol=_ATOL)
+
+
 class TestNeural:
     def test_list_input(self):
         """
@@ -0,0 +1,35 @@
+import numpy as np
+import torch
+
+from brainscore_language.model_helpers.localize import Fed10_langlocDataset, extract_batch
+
+
+class WordTokenizer:
+    """ tokenizes words into their lengths, so that encodings of different texts differ in length """
+
+    def __call__(self, texts, truncation, max_length):
+        return {"input_ids": [[len(word) for word in text.split()][:max_length] for text in texts]}
+
+
+class EchoModel(torch.nn.Module):
+    def __init__(self):
+        super(EchoModel, self).__init__()
+        self.echo = torch.nn.Identity()
+
+    def forward(self, input_ids, attention_mask):
+        return self.echo(input_ids.unsqueeze(-1).float())
+
+
+class TestFed10LanglocDataset:
+    def test_tokens_padded(self):
+        dataset = Fed10_langlocDataset(tokenizer=WordTokenizer(), max_length=14)
+        for kind, texts in [("sentences", dataset.sentences), ("non-words", dataset.non_words)]:
+            tokens = dataset.tokens[kind]
+            assert tokens["input_ids"].shape == tokens["attention_mask"].shape == (len(texts), 14)
+            np.testing.assert_array_equal(tokens["attention_mask"].sum(-1), [len(text.split()) for text in texts])
+
+    def test_last_attended_token(self):
+        input_ids = torch.tensor([[5, 6, 7, 0], [5, 6, 7, 8], [0, 0, 5, 6]])
+        attention_mask = torch.tensor([[1, 1, 1, 0], [1, 1, 1, 1], [0, 0, 1, 1]])
+        activations = extract_batch(EchoModel(), input_ids, attention_mask, layer_names=["echo"])
+        np.testing.assert_array_equal(torch.stack(activations["echo"]).squeeze(-1), [7, 8, 6])
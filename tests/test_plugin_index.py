@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from brainscore_language.plugin_index import PluginIndex, registry_name, scan_registrations
+
+
+def _write_plugin(plugins_directory: Path, plugin_dirname: str, source: str) -> Path:
+    plugin_directory = plugins_directory / plugin_dirname
+    plugin_directory.mkdir(parents=True, exist_ok=True)
+    init_file = plugin_directory / "__init__.py"
+    init_file.write_text(source)
+    return init_file
+
+
+@pytest.mark.parametrize('plugin_type, expected', [
+    ('models', 'model_registry'),
+    ('benchmarks', 'benchmark_registry'),
+    ('data', 'data_registry'),
+    ('submissions', 'submission_registry'),
+])
+def test_registry_name(plugin_type, expected):
+    assert registry_name(plugin_type) == expected
+
+
+def test_scan_registrations(tmp_path):
+    init_file = _write_plugin(tmp_path, 'plugin', """
+import heavy_dependency_that_is_not_installed
+from brainscore_language import model_registry
+
+model_registry['model-a'] = lambda: ModelA()
+model_registry["model-b"] = ModelB
+model_registry[dynamic_name] = ModelC
+other = {}
+other['not-a-registry'] = 1
+""")
+    registrations = scan_registrations(init_file)
+    assert registrations == {'model_registry': {'model-a': 'lambda: ModelA()', 'model-b': 'ModelB'}}
+
+
+class TestPluginIndex:
+    @pytest.fixture
+    def library(self, tmp_path):
+        library_directory = tmp_path / 'library'
+        _write_plugin(library_directory / 'models', 'first', "model_registry['model-1'] = Model1\n"
+                                                             "model_registry['model-2'] = Model2\n")
+        _write_plugin(library_directory / 'models', 'second', "model_registry['model-3'] = Model3\n")
+        (library_directory / 'models' / '__pycache__').mkdir()
+        return library_directory
+
+    def test_identifiers(self, library, tmp_path):
+        index = PluginIndex(library, cache_file=tmp_path / 'index.json')
+        assert index.identifiers('models') == {'model-1': 'first', 'model-2': 'first', 'model-3': 'second'}
+        assert index.locate('models', 'model-3') == 'second'
+
+    def test_locate_missing(self, library, tmp_path):
+        index = PluginIndex(library, cache_file=tmp_path / 'index.json')
+        with pytest.raises(AssertionError, match="No registrations found for model-4"):
+            index.locate('models', 'model-4')
+
+    def test_locate_duplicate(self, library, tmp_path):
+        _write_plugin(library / 'models', 'third', "model_registry['model-3'] = Model3\n")
+        index = PluginIndex(library, cache_file=tmp_path / 'index.json')
+        with pytest.raises(AssertionError, match="More than one registration found for model-3"):
+            index.locate('models', 'model-3')
+
+    def test_cache_reused(self, library, tmp_path, monkeypatch):
+        cache_file = tmp_path / 'index.json'
+        PluginIndex(library, cache_file=cache_file).identifiers('models')
+        assert cache_file.is_file()
+
+        import brainscore_language.plugin_index as plugin_index_module
+        scanned = []
+        monkeypatch.setattr(plugin_index_module, 'scan_registrations',
+                            lambda init_file: scanned.append(init_file) or {})
+        assert PluginIndex(library, cache_file=cache_file).locate('models', 'model-1') == 'first'
+        assert scanned == []
+
+    def test_rescan_changed_plugin(self, library, tmp_path):
+        cache_file = tmp_path / 'index.json'
+        PluginIndex(library, cache_file=cache_file).identifiers('models')
+        init_file = library / 'models' / 'second' / '__init__.py'
+        init_file.write_text("model_registry['model-3b'] = Model3\n")
+        os.utime(init_file, ns=(0, 0))  # ensure a different modification time even on coarse file systems
+        _write_plugin(library / 'models', 'fourth', "model_registry['model-4'] = Model4\n")
+        assert PluginIndex(library, cache_file=cache_file).identifiers('models') == {
+            'model-1': 'first', 'model-2': 'first', 'model-3b': 'second', 'model-4': 'fourth'}
+
+
+def test_list_without_importing_plugins(tmp_path):
+    script = """
+import sys
+from pathlib import Path
+from brainscore_language.plugin_index import PluginIndex
+index = PluginIndex(cache_file=Path(sys.argv[1]))
+assert index.locate('models', 'glove-840b') == 'glove'
+assert index.locate('benchmarks', 'Futrell2018-pearsonr') == 'futrell2018'
+heavy = [module for module in sys.modules
+         if module.split('.')[0] in ('tensorflow', 'torch', 'transformers', 'gensim')
+         or module.startswith('brainscore_language.models.')]
+assert not heavy, heavy
+"""
+    subprocess.run([sys.executable, '-c', script, str(tmp_path / 'index.json')], check=True)
+
+
+def test_cli_does_not_import_session():
+    script = """
+import sys
+import brainscore_language.__main__
+assert 'brainscore_language.session' not in sys.modules
+"""
+    subprocess.run([sys.executable, '-c', script], check=True)
@@ -0,0 +1,76 @@
+import pytest
+
+from brainscore_core.metrics import Score
+from brainscore_language import session as session_module
+from brainscore_language.artificial_subject import ArtificialSubject
+from brainscore_language.session import ScoringSession, order_benchmarks
+
+
+class DummyModel(ArtificialSubject):
+    def __init__(self):
+        self.neural_recordings = []
+        self.resets = 0
+
+    def start_neural_recording(self, recording_target, recording_type):
+        self.neural_recordings.append((recording_target, recording_type))
+
+    def reset(self):
+        self.neural_recordings = []
+        self.resets += 1
+
+
+class NonResettableModel(DummyModel):
+    def reset(self):
+        raise NotImplementedError()
+
+
+class DummyBenchmark:
+    def __call__(self, candidate):
+        candidate.start_neural_recording(ArtificialSubject.RecordingTarget.language_system,
+                                         ArtificialSubject.RecordingType.fMRI)
+        return Score(len(candidate.neural_recordings))
+
+
+@pytest.fixture
+def loaded_models(monkeypatch):
+    loaded_models = []
+
+    def load_model(identifier):
+        model = NonResettableModel() if identifier == 'non-resettable' else DummyModel()
+        loaded_models.append(model)
+        return model
+
+    monkeypatch.setattr(session_module, 'load_model', load_model)
+    monkeypatch.setattr(session_module, 'load_benchmark', lambda identifier: DummyBenchmark())
+    return loaded_models
+
+
+class TestScoringSession:
+    def test_model_loaded_once(self, loaded_models):
+        session = ScoringSession('dummy')
+        scores = list(session.score_all(['benchmark-1', 'benchmark-2', 'benchmark-3']))
+        assert len(loaded_models) == 1
+        assert loaded_models[0].resets == 2
+        # recordings of previous benchmarks do not carry over
+        assert [score.item() for score in scores] == [1, 1, 1]
+        assert [score.attrs['benchmark_identifier'] for score in scores] == \
+               ['benchmark-1', 'benchmark-2', 'benchmark-3']
+        assert all(score.attrs['model_identifier'] == 'dummy' for score in scores)
+
+    def test_reload_non_resettable(self, loaded_models):
+        session = ScoringSession('non-resettable')
+        scores = list(session.score_all(['benchmark-1', 'benchmark-2']))
+        assert len(loaded_models) == 2
+        assert [score.item() for score in scores] == [1, 1]
+
+    def test_scores_stream(self, loaded_models):
+        scores = ScoringSession('dummy').score_all(['benchmark-1', 'benchmark-2'])
+        next(scores)
+        assert loaded_models[0].resets == 0  # second benchmark has not started yet
+
+
+def test_order_benchmarks():
+    ordered = order_benchmarks(['Pereira2018.243sentences-linear', 'Futrell2018-pearsonr', 'unregistered',
+                                'Pereira2018.384sentences-linear', 'Futrell2018-pearsonr'])
+    assert ordered == ['Pereira2018.243sentences-linear', 'Pereira2018.384sentences-linear',
+                       'Futrell2018-pearsonr', 'unregistered']
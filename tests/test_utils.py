@@ -0,0 +1,166 @@
+import functools
+import hashlib
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from brainscore_core.supported_data_standards.brainio import fetch
+from brainscore_core.supported_data_standards.brainio.assemblies import NeuroidAssembly, AssemblyLoader
+from brainscore_core.supported_data_standards.brainio.packaging import write_netcdf
+from brainscore_language.utils import as_metric_dtype, group_indices, metric_dtype, s3
+
+
+class TestGroupIndices:
+    def test_groups_sorted_and_order_preserved(self):
+        values = np.array(['b', 'a', 'b', 'c', 'a'])
+        groups, order = group_indices(values)
+        assert [value for value, indices in groups] == ['a', 'b', 'c']
+        assert [np.arange(len(values))[indices].tolist() for value, indices in groups] == [[1, 4], [0, 2], [3]]
+        assert order.tolist() == [1, 4, 0, 2, 3]
+
+    def test_contiguous_groups_are_slices(self):
+        groups, order = group_indices(np.array([3, 3, 1, 2, 2, 2]))
+        assert [(value, indices) for value, indices in groups] == [
+            (1, slice(2, 3)), (2, slice(3, 6)), (3, slice(0, 2))]
+        assert order.tolist() == [2, 3, 4, 5, 0, 1]
+
+
+class TestMetricDtype:
+    def test_default_float32(self, monkeypatch):
+        monkeypatch.delenv('BS_METRIC_PRECISION', raising=False)
+        assert metric_dtype() == np.float32
+        assert as_metric_dtype(np.arange(3.)).dtype == np.float32
+
+    def test_configured(self, monkeypatch):
+        monkeypatch.setenv('BS_METRIC_PRECISION', 'float64')
+        assert metric_dtype() == np.float64
+        assert metric_dtype(np.float32) == np.float32
+
+    def test_invalid(self):
+        with pytest.raises(ValueError, match="float32 or float64"):
+            metric_dtype('float16')
+
+    def test_no_copy(self):
+        values = np.arange(3, dtype=np.float32)
+        assert as_metric_dtype(values, np.float32) is values
+
+
+class TestLoadFromS3:
+    @pytest.fixture
+    def netcdf_file(self, tmp_path, monkeypatch):
+        assembly = NeuroidAssembly(np.random.RandomState(0).random(size=(4, 3)), coords={
+            'stimulus_id': ('presentation', ['a', 'b', 'c', 'd']),
+            'stimulus': ('presentation', ['the', 'quick', 'brown', 'fox']),
+            'neuroid_id': ('neuroid', [1, 2, 3]),
+            'subject': ('neuroid', ['s1', 's1', 's2'])}, dims=['presentation', 'neuroid'])
+        netcdf_file = tmp_path / 'assy_dummy.nc'
+        sha1 = write_netcdf(assembly, netcdf_file)
+        monkeypatch.setattr(s3, 'CONVERTED_ASSEMBLIES_DIRECTORY', tmp_path / 'converted')
+        fetched = []
+        monkeypatch.setattr(s3, 'fetch_file', lambda **kwargs: fetched.append(kwargs['sha1']) or netcdf_file)
+        return netcdf_file, sha1, fetched
+
+    def test_converted_once(self, netcdf_file):
+        netcdf_file, sha1, fetched = netcdf_file
+        first = s3.load_from_s3('dummy', sha1=sha1)
+        second = s3.load_from_s3('dummy', sha1=sha1)
+        assert fetched == [sha1]
+        expected = AssemblyLoader(cls=NeuroidAssembly, file_path=netcdf_file).load()
+        expected.attrs['identifier'] = 'dummy'
+        xr.testing.assert_identical(first, expected)
+        xr.testing.assert_identical(second, expected)
+
+    def test_data_memory_mapped(self, netcdf_file):
+        netcdf_file, sha1, fetched = netcdf_file
+        assembly = s3.load_from_s3('dummy', sha1=sha1)
+        assert not assembly.values.flags.writeable
+        assert assembly.sel(subject='s1').shape == (4, 2)
+
+    def test_unconvertible_parsed_once(self, tmp_path, monkeypatch):
+        assembly = NeuroidAssembly(np.array([['a', 'b'], ['c', 'd']], dtype=object), coords={
+            'stimulus_id': ('presentation', ['s1', 's2']), 'stimulus': ('presentation', ['x', 'y']),
+            'neuroid_id': ('neuroid', [1, 2]), 'subject': ('neuroid', ['s1', 's1'])}, dims=['presentation', 'neuroid'])
+        netcdf_file = tmp_path / 'assy_dummy.nc'
+        sha1 = write_netcdf(assembly, netcdf_file)
+        monkeypatch.setattr(s3, 'CONVERTED_ASSEMBLIES_DIRECTORY', tmp_path / 'converted')
+        monkeypatch.setattr(s3, 'fetch_file', lambda **kwargs: netcdf_file)
+        first = s3.load_from_s3('dummy', sha1=sha1)
+        converted_directory = s3.S3File('dummy', sha1=sha1).converted_directory
+        assert [path.name for path in converted_directory.iterdir()] == ['unconvertible']  # no temporary files
+
+        def convert_netcdf(*args):
+            raise AssertionError("should not re-try converting")
+
+        monkeypatch.setattr(s3, 'convert_netcdf', convert_netcdf)
+        second = s3.load_from_s3('dummy', sha1=sha1)
+        xr.testing.assert_identical(first, second)
+        assert second.values.tolist() == [['a', 'b'], ['c', 'd']]
+
+    def test_failed_write_cleaned_up(self, netcdf_file, monkeypatch):
+        netcdf_file, sha1, fetched = netcdf_file
+
+        def dump(*args):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(s3.pickle, 'dump', dump)
+        assembly = s3.load_from_s3('dummy', sha1=sha1)
+        assert assembly.values.flags.writeable  # loaded from the netCDF file
+        assert list(s3.S3File('dummy', sha1=sha1).converted_directory.iterdir()) == []
+
+
+class TestDownloadFiles:
+    @pytest.fixture
+    def bucket(self, tmp_path, monkeypatch):
+        """ serve `tmp_path / 'bucket'` over http in place of the S3 bucket, and download to `tmp_path / 'local'` """
+        bucket_directory = tmp_path / 'bucket'
+        (bucket_directory / s3._FOLDER).mkdir(parents=True)
+        requested = []
+
+        class Handler(SimpleHTTPRequestHandler):
+            def do_GET(self):
+                requested.append(self.path)
+                super(Handler, self).do_GET()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Handler, directory=str(bucket_directory)))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        monkeypatch.setattr(s3, 'BUCKET_URL', f"http://127.0.0.1:{server.server_address[1]}")
+        monkeypatch.setattr(fetch, '_local_data_path', str(tmp_path / 'local'))
+
+        def add_file(identifier, contents: bytes) -> s3.S3File:
+            (bucket_directory / s3._FOLDER / f"assy_{identifier}.nc").write_bytes(contents)
+            return s3.S3File(identifier=identifier, sha1=hashlib.sha1(contents).hexdigest())
+
+        yield add_file, requested
+        server.shutdown()
+        server.server_close()
+
+    def test_downloads_missing_files(self, bucket):
+        add_file, requested = bucket
+        files = [add_file(f"file{i}", f"contents {i}".encode() * 1000) for i in range(5)]
+        downloaded = s3.download_files(files + files[:2], max_workers=3)
+        assert downloaded == files
+        for i, s3_file in enumerate(files):
+            assert s3_file.is_local()
+            assert s3_file.local_path.read_bytes() == f"contents {i}".encode() * 1000
+        assert sorted(requested) == sorted(f"/{s3_file.remote_path}" for s3_file in files)
+
+    def test_skips_local_files(self, bucket):
+        add_file, requested = bucket
+        s3_file = add_file('file', b'contents')
+        assert s3.download_files([s3_file]) == [s3_file]
+        assert s3.download_files([s3_file]) == []
+        assert len(requested) == 1
+
+    def test_sha1_mismatch(self, bucket):
+        add_file, requested = bucket
+        s3_file = add_file('file', b'contents')._replace(sha1=hashlib.sha1(b'other contents').hexdigest())
+        with pytest.raises(ValueError, match="SHA1 mismatch"):
+            s3.download_files([s3_file])
+        assert not s3_file.local_path.parent.exists() or not any(s3_file.local_path.parent.iterdir())